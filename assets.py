@@ -0,0 +1,50 @@
+import base64
+import hashlib
+import mmap
+import os
+
+# Armazém dos arquivos de som/ compartilhado pelo processo inteiro. Cada
+# arquivo é mapeado em memória só para leitura: as páginas vêm do cache do
+# sistema operacional, são as mesmas para todas as sessões e nenhuma cópia
+# dos bytes é feita por rerun. O base64 (modo "inline") é gerado na hora, a
+# partir do mapa, só quando o bundle da página é montado.
+
+
+class AssetStore:
+    def __init__(self, directory, filenames):
+        self.directory = directory
+        self.files = {}
+        self.errors = {}
+        self.versions = {}
+        for filename in filenames:
+            filepath = os.path.join(directory, filename)
+            try:
+                self.files[filename] = self._map(filepath)
+            except Exception as e:
+                self.errors[filename] = f"Erro ao carregar arquivo {filepath}: {e}"
+                continue
+            self.versions[filename] = hashlib.sha256(self.files[filename]).hexdigest()[:12]
+
+    @staticmethod
+    def _map(filepath):
+        with open(filepath, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b"")
+            # O mapa continua válido depois de fechar o arquivo
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    # Visão somente leitura dos bytes, sem cópia
+    def bytes(self, filename):
+        return self.files.get(filename, memoryview(b""))
+
+    def version(self, filename):
+        return self.versions.get(filename, "")
+
+    def data_uri(self, filename, mime):
+        data = self.files.get(filename)
+        if not data:
+            return ""
+        return f"data:{mime};base64," + base64.b64encode(data).decode("ascii")
+
+    def nbytes(self):
+        return sum(view.nbytes for view in self.files.values())
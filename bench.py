@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    from playwright.sync_api import sync_playwright
+except ImportError:  # dependência só do bench, fora do requirements.txt
+    sync_playwright = None
+
+# Custo do frame no navegador, sem ninguém no mouse: abre o HTML do jogo num
+# Chromium headless (Playwright) e roda as cenas de estresse do
+# window.__breakout.bench (BenchRunner, no GAME_JS de game.py), uma página
+# nova por cena. Cada cena é semeada e roda um número fixo de frames de um
+# tick; o relatório traz os percentis de frame, física e desenho, impactos
+# resolvidos por tick, partículas vivas e as coletas de lixo percebidas no
+# heap. Com --baseline, compara com o relatório de outro commit.
+#
+# O HTML sai do próprio game.py pelo AppTest, com os sons embutidos, e é
+# aberto como arquivo local: não precisa de servidor do Streamlit.
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(APP_DIR, "game.py")
+REPORT_VERSION = 1
+
+# Sem limite de fps e com heap preciso e gc() exposto. Tudo roda sem GPU,
+# então o desenho custa mais que num navegador comum: compare relatórios
+# da mesma máquina.
+CHROMIUM_ARGS = [
+    "--enable-precise-memory-info",
+    "--js-flags=--expose-gc",
+    "--disable-frame-rate-limit",
+    "--disable-gpu-vsync",
+]
+
+# Limites absolutos por cena: passar de um deles é regressão
+THRESHOLDS = {
+    "frame_p95_ms": 1000 / 60,
+}
+
+# Com --baseline, quanto cada número pode piorar em relação ao anterior
+TOLERANCE = 0.20
+
+# Diferenças menores que esta são ruído do relógio do navegador
+SLACK_MS = 0.1
+
+# Números conferidos em cada cena: nome, série do perfilador e percentil
+METRICS = {
+    "frame_p95_ms": ("frame", "p95"),
+    "update_p95_ms": ("update", "p95"),
+    "render_p95_ms": ("render", "p95"),
+    "particles_p95_ms": ("particles", "p95"),
+    "bricks_p95_ms": ("bricks", "p95"),
+}
+
+
+# HTML do jogo como o Streamlit entrega no iframe, com os sons embutidos
+def game_html():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_FILE, default_timeout=60)
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"Falha ao executar game.py: {at.exception[0].message}")
+    return at.get("iframe")[0].proto.srcdoc
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scenes(url, scenes, frames, warmup, seed, chromium):
+    results = {}
+    with sync_playwright() as p:
+        browser = p.chromium.launch(executable_path=chromium, args=CHROMIUM_ARGS)
+        version = browser.version
+
+        def open_page(scene=None):
+            page = browser.new_page()
+            if scene:
+                page.add_init_script(f"window.__BREAKOUT_BENCH__ = {json.dumps(scene)};")
+            page.goto(url)
+            page.wait_for_function("window.__breakout && window.__breakout.bench")
+            return page
+
+        if not scenes:
+            page = open_page()
+            scenes = [scene["name"] for scene in page.evaluate("window.__breakout.bench.scenes()")]
+            page.close()
+
+        for scene in scenes:
+            page = open_page(scene)
+            run = "([name, options]) => window.__breakout.bench.run(name, options)"
+            # Uma rodada curta antes, fora da conta: JIT e caches do canvas
+            if warmup:
+                page.evaluate(run, [scene, {"frames": warmup, "seed": seed}])
+            results[scene] = page.evaluate(run, [scene, {"frames": frames, "seed": seed}])
+            page.close()
+        browser.close()
+    return version, results
+
+
+def metric(scene_report, name):
+    series, key = METRICS[name]
+    try:
+        return scene_report["profile"]["series"][series][key]
+    except (KeyError, TypeError):
+        return None
+
+
+# Lista de regressões (vazia se tudo passou)
+def check(report, thresholds=THRESHOLDS, baseline=None, tolerance=TOLERANCE):
+    failures = []
+    for scene, result in report["scenes"].items():
+        for name, limit in thresholds.items():
+            value = metric(result, name)
+            if value is not None and value > limit:
+                failures.append(f"{scene}: {name} = {value:.3f} passa do limite {limit:.3f}")
+        before = baseline["scenes"].get(scene) if baseline else None
+        if before is None:
+            continue
+        for name in METRICS:
+            value, previous = metric(result, name), metric(before, name)
+            if value is None or previous is None:
+                continue
+            if value > previous * (1 + tolerance) + SLACK_MS:
+                failures.append(
+                    f"{scene}: {name} = {value:.3f} piorou mais de {tolerance:.0%} (antes {previous:.3f})"
+                )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cenas de estresse do Breakout num Chromium headless")
+    parser.add_argument("scenes", nargs="*", help="cenas a rodar (padrão: todas)")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=120, help="frames descartados antes de cada cena")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--chromium", help="executável do Chromium (padrão: o do Playwright)")
+    parser.add_argument("--out", default="bench.json")
+    parser.add_argument("--baseline", help="relatório anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    if sync_playwright is None:
+        print("bench.py precisa do Playwright: pip install playwright && playwright install chromium",
+              file=sys.stderr)
+        return 2
+
+    # Página autossuficiente, e placar e telemetria longe dos dados do app.
+    # Precisa vir antes de qualquer import de config.
+    scratch = tempfile.mkdtemp(prefix="breakout-bench-")
+    os.environ["BREAKOUT_ASSET_MODE"] = "inline"
+    os.environ.setdefault("BREAKOUT_DB", os.path.join(scratch, "leaderboard.db"))
+    os.environ.setdefault("BREAKOUT_TELEMETRY_DIR", os.path.join(scratch, "telemetry"))
+    os.environ["BREAKOUT_RENDER_THREAD"] = "main"
+    os.chdir(APP_DIR)
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    page = os.path.join(scratch, "breakout.html")
+    with open(page, "w", encoding="utf-8") as f:
+        f.write(game_html())
+
+    start = time.perf_counter()
+    version, scenes = run_scenes(
+        "file://" + page, args.scenes, args.frames, args.warmup, args.seed, args.chromium
+    )
+    report = {
+        "version": REPORT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "browser": version,
+        "frames": args.frames,
+        "seed": args.seed,
+        "seconds": round(time.perf_counter() - start, 2),
+        "scenes": scenes,
+        "thresholds": THRESHOLDS,
+    }
+    report["failures"] = check(report, THRESHOLDS, baseline, args.tolerance)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Chromium {version}, {args.frames} frames por cena, commit {report['commit']}")
+    print("cena          tijolos   frame p50/p95   física p95   desenho p95   impactos p99   partículas   GCs")
+    for name, result in scenes.items():
+        series = result["profile"]["series"]
+        gc = result["gc"]["collections"] if result["gc"] else "-"
+        print(
+            f"{name:<12} {result['bricks']:>8}   {series['frame']['p50']:>6.2f} {series['frame']['p95']:>6.2f}"
+            f"   {series['update']['p95']:>10.3f}   {series['render']['p95']:>11.3f}"
+            f"   {series['impacts']['p99']:>12.0f}   {result['particles']['mean']:>10.0f}   {gc:>3}"
+        )
+    for failure in report["failures"]:
+        print("REGRESSÃO:", failure)
+    print(f"relatório em {args.out}")
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+# Canal de eventos do jogo (iframe) para o Python. O components.html só
+# exibe conteúdo; para receber dados o app declara um componente invisível
+# (channel_frontend/index.html) que o jogo alimenta pelo documento pai.
+# Cada evento chega com um número de sequência por instância do canal
+# (token); o último processado volta para o componente como confirmação.
+
+CHANNEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "channel_frontend")
+
+_channel = components.declare_component("breakout_channel", path=CHANNEL_DIR)
+
+
+# Eventos novos desde o último rerun desta sessão (lista vazia se nenhum)
+def receive(key="breakout_channel"):
+    ack = st.session_state.setdefault("_channel_ack", {"token": None, "seq": 0})
+    value = _channel(ack=dict(ack), key=key, default=None)
+    if not isinstance(value, dict) or not isinstance(value.get("events"), list):
+        return []
+    if value.get("token") != ack["token"]:
+        ack["token"] = value.get("token")
+        ack["seq"] = 0
+    events = [
+        event for event in value["events"]
+        if isinstance(event, dict) and isinstance(event.get("seq"), int) and event["seq"] > ack["seq"]
+    ]
+    if events:
+        ack["seq"] = max(event["seq"] for event in events)
+    return events
@@ -0,0 +1,108 @@
+import os
+
+# Constantes do jogo, compartilhadas entre o app Streamlit (game.py) e as
+# ferramentas offline em Python (physics.py). O JavaScript recebe os mesmos
+# valores via GAME_CONFIG, então mudar algo aqui muda os dois lados.
+
+# Configurações do jogo
+WINDOW_WIDTH = 900
+WINDOW_HEIGHT = 600
+BAR_WIDTH = 100
+BAR_HEIGHT = 20
+BALL_RADIUS = 10
+BRICK_ROWS = 5
+BRICK_COLUMNS = 9
+BRICK_WIDTH = WINDOW_WIDTH // BRICK_COLUMNS
+BRICK_HEIGHT = 30
+BRICK_TOP = 50            # distância do topo do canvas até a primeira fileira
+FPS = 60
+MAX_PARTICLES = 300       # teto do pool de partículas (máquinas fortes aguentam mais)
+
+# Progressão de dificuldade
+MAX_LEVEL = 5
+BALL_SPEED = 7.0          # velocidade da bola no nível 1 (px por frame de 60fps)
+LEVEL_SPEED_STEP = 0.10   # +10% de velocidade a cada nível
+RALLY_ACCEL = 1.015       # aceleração a cada rebatida na barra
+RALLY_MAX = 1.5           # teto da aceleração dentro de um mesmo nível
+LIVES = 3
+
+# Semente fixa para todas as partidas (BREAKOUT_SEED); sem ela, cada partida
+# sorteia a sua. Mesma semente e mesmas entradas reproduzem a mesma partida.
+GAME_SEED = int(os.environ["BREAKOUT_SEED"]) if os.environ.get("BREAKOUT_SEED") else None
+
+# Cores
+BLACK = "#000000"
+RED = "#FF0000"
+ORANGE = "#FFA500"
+YELLOW = "#FFFF00"
+GREEN = "#00FF00"
+BLUE = "#0000FF"
+BRICK_COLORS = [RED, ORANGE, YELLOW, GREEN, BLUE]
+
+# Arquivos de som locais (pasta "som")
+SOUND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "som")
+SOUND_FILES = {
+    "bounce": "cell-phone-1-nr7.mp3",
+    "brick": "gun-gunshot-02.mp3",
+    "gameOver": "fail-trombone-01.mp3",
+    "victory": "applause-8.mp3",
+    "loseLife": "fail-buzzer-01.mp3"
+}
+
+# Logo local do Python (pasta "som")
+PYTHON_LOGO_FILE = "python-logo.png"
+
+# Como os arquivos de "som" chegam ao navegador: "static" usa a rota estática
+# do Streamlit (static/ é um link para som/), com URLs versionadas pelo hash e
+# cache longo; "inline" embute tudo em base64 no HTML do jogo.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+ASSET_MODE = os.environ.get("BREAKOUT_ASSET_MODE", "static")
+
+# Quando o navegador carrega os sons: "idle" espera o primeiro frame e o
+# navegador ficar ocioso, "gesture" só no primeiro clique/toque/tecla e
+# "eager" logo na abertura. O jogo nunca espera por eles.
+AUDIO_LOADING = os.environ.get("BREAKOUT_AUDIO_LOADING", "idle")
+
+# Qualidade dos efeitos (partículas, rastro, tremor, clarão): "auto" ajusta
+# ao desempenho do aparelho durante o jogo; "alta", "média", "baixa" ou
+# "mínima" fixam um nível.
+QUALITY = os.environ.get("BREAKOUT_QUALITY", "auto")
+
+# Modo demonstração: depois de ATTRACT_DELAY segundos parado na tela inicial
+# (ou de fim de partida), o jogo passa a jogar sozinho por trás do convite,
+# até a primeira entrada do jogador ou por no máximo ATTRACT_LENGTH segundos.
+# Depois disso volta à tela inicial e o loop dorme até alguém mexer: uma aba
+# esquecida não fica desenhando para sempre. BREAKOUT_ATTRACT_DELAY=0 desliga.
+ATTRACT_DELAY = float(os.environ.get("BREAKOUT_ATTRACT_DELAY", "20"))
+ATTRACT_LENGTH = float(os.environ.get("BREAKOUT_ATTRACT_LENGTH", "120"))
+
+# Onde roda o loop do jogo: "main" na thread da página; "worker" leva física
+# e desenho para um Web Worker com OffscreenCanvas, longe dos reruns e do
+# layout do Streamlit. Navegador sem suporte volta sozinho para "main".
+RENDER_THREAD = os.environ.get("BREAKOUT_RENDER_THREAD", "main")
+
+# Placar compartilhado entre todas as sessões, num arquivo SQLite local
+# (BREAKOUT_DB troca o caminho). Leituras ficam em cache por alguns segundos.
+LEADERBOARD_DB = os.environ.get("BREAKOUT_DB") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "leaderboard.db"
+)
+LEADERBOARD_SIZE = 10
+LEADERBOARD_TTL = 5.0     # segundos
+# Conferência dos replays em segundo plano: a cada LEADERBOARD_VERIFY_INTERVAL
+# segundos os placares novos são refeitos por replay.py, em
+# LEADERBOARD_VERIFY_WORKERS processos. Até lá aparecem como "a conferir";
+# os reprovados saem do placar. BREAKOUT_VERIFY_INTERVAL=0 desliga (sobra o
+# leaderboard.py --verify).
+LEADERBOARD_VERIFY_INTERVAL = float(os.environ.get("BREAKOUT_VERIFY_INTERVAL", "60"))
+LEADERBOARD_VERIFY_WORKERS = int(os.environ.get("BREAKOUT_VERIFY_WORKERS", "1"))
+
+# Telemetria de jogo: o navegador manda lotes comprimidos a cada
+# TELEMETRY_INTERVAL segundos e o servidor grava em arquivos SQLite
+# rotativos em TELEMETRY_DIR (BREAKOUT_TELEMETRY=0 desliga).
+TELEMETRY_ENABLED = os.environ.get("BREAKOUT_TELEMETRY", "1") != "0"
+TELEMETRY_DIR = os.environ.get("BREAKOUT_TELEMETRY_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "telemetry"
+)
+TELEMETRY_INTERVAL = 10          # segundos entre lotes
+TELEMETRY_FILE_BYTES = 16 << 20  # tamanho de cada arquivo antes de rodar
+TELEMETRY_FILES = 8              # arquivos mantidos (os mais antigos saem)
@@ -1,8 +1,30 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import base64
+from streamlit.logger import get_logger
+import hashlib
 import json
 import os
+import threading
+import time
+
+from assets import AssetStore
+from channel import receive
+from leaderboard import Leaderboard
+from telemetry import TelemetryStore
+from memory import memory_report
+from replay import decode
+from config import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, BAR_WIDTH, BAR_HEIGHT, BALL_RADIUS,
+    BRICK_ROWS, BRICK_COLUMNS, BRICK_WIDTH, BRICK_HEIGHT, BRICK_TOP, FPS, MAX_PARTICLES,
+    MAX_LEVEL, BALL_SPEED, LEVEL_SPEED_STEP, RALLY_ACCEL, RALLY_MAX, LIVES, GAME_SEED,
+    BLACK, RED, BLUE, GREEN, YELLOW, BRICK_COLORS,
+    SOUND_DIR, SOUND_FILES, PYTHON_LOGO_FILE, STATIC_DIR, ASSET_MODE, AUDIO_LOADING,
+    LEADERBOARD_SIZE, QUALITY, RENDER_THREAD, TELEMETRY_ENABLED, TELEMETRY_INTERVAL,
+    ATTRACT_DELAY, ATTRACT_LENGTH, LEADERBOARD_VERIFY_INTERVAL, LEADERBOARD_VERIFY_WORKERS,
+)
+
+logger = get_logger(__name__)
+script_start = time.perf_counter()
 
 # Configuração inicial do Streamlit
 st.set_page_config(page_title="Breakout Web Game", page_icon="🎮", layout="wide")
@@ -11,74 +33,56 @@ st.markdown("""
     <h1 style='text-align: center;'>🎮Breakout Web Game</h1>
 """, unsafe_allow_html=True)
 
-# Configurações do jogo
-WINDOW_WIDTH = 900
-WINDOW_HEIGHT = 600
-BAR_WIDTH = 100
-BAR_HEIGHT = 20
-BALL_RADIUS = 10
-BRICK_ROWS = 5
-BRICK_COLUMNS = 9
-BRICK_WIDTH = WINDOW_WIDTH // BRICK_COLUMNS
-BRICK_HEIGHT = 30
-FPS = 60
-
-# Progressão de dificuldade
-MAX_LEVEL = 5
-BALL_SPEED = 7.0          # velocidade da bola no nível 1 (px por frame de 60fps)
-LEVEL_SPEED_STEP = 0.10   # +10% de velocidade a cada nível
-RALLY_ACCEL = 1.015       # aceleração a cada rebatida na barra
-RALLY_MAX = 1.5           # teto da aceleração dentro de um mesmo nível
-LIVES = 3
-
-# Cores
-BLACK = "#000000"
-RED = "#FF0000"
-ORANGE = "#FFA500"
-YELLOW = "#FFFF00"
-GREEN = "#00FF00"
-BLUE = "#0000FF"
-BRICK_COLORS = [RED, ORANGE, YELLOW, GREEN, BLUE]
-
-# Arquivos de som locais (pasta "som")
-SOUND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "som")
-SOUND_FILES = {
-    "bounce": "cell-phone-1-nr7.mp3",
-    "brick": "gun-gunshot-02.mp3",
-    "gameOver": "fail-trombone-01.mp3",
-    "victory": "applause-8.mp3",
-    "loseLife": "fail-buzzer-01.mp3"
-}
-
-# Logo local do Python (pasta "som")
-PYTHON_LOGO_FILE = "python-logo.png"
-
 
-# Função para carregar arquivos locais em base64 com tratamento de erro.
+# Arquivos de som/ mapeados em memória, um único armazém por processo e por
+# versão dos arquivos (stamps). Substitui o st.cache_data, que devolvia uma
+# cópia nova de cada string base64 a cada chamada, em cada sessão.
 # show_spinner=False é obrigatório: o spinner só aparece na primeira execução e,
 # ao sumir, altera a árvore de elementos entre um run e outro — o que faz o React
 # remontar o iframe e reiniciar a partida no primeiro rerun (o dos balões).
-@st.cache_data(show_spinner=False)
-def load_asset(filename):
-    filepath = os.path.join(SOUND_DIR, filename)
-    try:
-        with open(filepath, "rb") as f:
-            return base64.b64encode(f.read()).decode('utf-8')
-    except Exception as e:
-        st.error(f"Erro ao carregar arquivo {filepath}: {e}")
-        return ""
+@st.cache_resource(show_spinner=False, max_entries=2)
+def asset_store(stamps):
+    return AssetStore(SOUND_DIR, list(stamps))
+
+
+def report_asset_errors(store):
+    for message in store.errors.values():
+        st.error(message)
+
+
+# Caminho relativo: o iframe do components.html é um srcdoc e resolve URLs
+# relativas a partir da página do app.
+def static_url(store, filename):
+    version = store.version(filename)
+    return f"app/static/{filename}?v={version}" if version else ""
 
 
-def data_uri(mime, encoded):
-    return f"data:{mime};base64,{encoded}" if encoded else ""
+# A rota estática só existe com server.enableStaticServing ligado (ver
+# .streamlit/config.toml) e com a pasta static/ presente (um link para som/).
+# Sem elas, volta a embutir os arquivos em base64 no HTML.
+def use_static_assets():
+    return (
+        ASSET_MODE == "static"
+        and st.get_option("server.enableStaticServing")
+        and os.path.isdir(STATIC_DIR)
+    )
 
 
-# Carrega recursos
-python_logo_base64 = load_asset(PYTHON_LOGO_FILE)
-sounds_base64 = {key: load_asset(filename) for key, filename in SOUND_FILES.items()}
+# Estado dos arquivos de som/ sem abri-los: um stat por arquivo a cada rerun.
+def asset_stamps():
+    stamps = {}
+    for filename in [PYTHON_LOGO_FILE, *SOUND_FILES.values()]:
+        try:
+            info = os.stat(os.path.join(SOUND_DIR, filename))
+            stamps[filename] = (info.st_mtime_ns, info.st_size)
+        except OSError:
+            stamps[filename] = None
+    return stamps
+
 
 # Configuração entregue ao JavaScript como JSON, para não misturar as chaves
-# do JS com as da f-string do Python.
+# do JS com as da f-string do Python. Os recursos (logo e sons) entram só na
+# montagem da página, em page_config.
 GAME_CONFIG = {
     "windowWidth": WINDOW_WIDTH,
     "windowHeight": WINDOW_HEIGHT,
@@ -89,13 +93,23 @@ GAME_CONFIG = {
     "brickColumns": BRICK_COLUMNS,
     "brickWidth": BRICK_WIDTH,
     "brickHeight": BRICK_HEIGHT,
+    "brickTop": BRICK_TOP,
     "fps": FPS,
+    "maxParticles": MAX_PARTICLES,
     "maxLevel": MAX_LEVEL,
     "ballSpeed": BALL_SPEED,
     "levelSpeedStep": LEVEL_SPEED_STEP,
     "rallyAccel": RALLY_ACCEL,
     "rallyMax": RALLY_MAX,
     "lives": LIVES,
+    "seed": GAME_SEED,
+    "audioLoading": AUDIO_LOADING,
+    "quality": QUALITY,
+    "renderThread": RENDER_THREAD,
+    "telemetry": TELEMETRY_ENABLED,
+    "telemetryInterval": TELEMETRY_INTERVAL,
+    "attractDelay": ATTRACT_DELAY,
+    "attractLength": ATTRACT_LENGTH,
     "brickColors": BRICK_COLORS,
     "colors": {
         "black": BLACK,
@@ -104,10 +118,29 @@ GAME_CONFIG = {
         "green": GREEN,
         "yellow": YELLOW,
     },
-    "logo": data_uri("image/png", python_logo_base64),
-    "sounds": {key: data_uri("audio/mp3", value) for key, value in sounds_base64.items()},
 }
 
+
+# id do bloco JSON com os sons embutidos (modo "inline")
+SOUND_DATA_ID = "breakoutSounds"
+
+
+def page_config(static_assets, store):
+    if static_assets:
+        logo = static_url(store, PYTHON_LOGO_FILE)
+        sounds = {key: static_url(store, filename) for key, filename in SOUND_FILES.items()}
+    else:
+        logo = store.data_uri(PYTHON_LOGO_FILE, "image/png")
+        # O base64 dos sons vai num bloco JSON à parte (inline_sounds), que o
+        # navegador não interpreta ao abrir: só é lido quando o áudio carrega.
+        sounds = SOUND_DATA_ID
+    return dict(GAME_CONFIG, logo=logo, sounds=sounds)
+
+
+def inline_sounds(store):
+    return {key: store.data_uri(filename, "audio/mp3") for key, filename in SOUND_FILES.items()}
+
+
 GAME_CSS = """
     body {
         margin: 0;
@@ -156,7 +189,19 @@ GAME_CSS = """
 
 GAME_JS = """
 (function () {
-    const cfg = window.__BREAKOUT_CFG__;
+    // O mesmo código roda na página e, no modo "worker", dentro de um Web
+    // Worker (sem DOM): nele cfg chega pelo prefixo do Blob, o canvas é um
+    // OffscreenCanvas e som, armazenamento e canal ficam na página.
+    const IN_WORKER = typeof document === "undefined";
+    const GAME_SOURCE = IN_WORKER || !document.currentScript ? "" : document.currentScript.textContent;
+    // Cenas de estresse com outra grade de tijolos (ver BenchRunner) só
+    // valem a partir do carregamento: bench.py põe o nome da cena em
+    // window.__BREAKOUT_BENCH__ antes do jogo e a grade dela vale para a
+    // página toda.
+    const BENCH_CONFIG = {
+        parede: { brickRows: 40, brickColumns: 30, brickWidth: 30, brickHeight: 10 }
+    };
+    const cfg = Object.assign({}, self.__BREAKOUT_CFG__, BENCH_CONFIG[self.__BREAKOUT_BENCH__]);
     const W = cfg.windowWidth;
     const H = cfg.windowHeight;
     const BAR_W = cfg.barWidth;
@@ -164,45 +209,498 @@ GAME_JS = """
     const R = cfg.ballRadius;
     const BRICK_W = cfg.brickWidth;
     const BRICK_H = cfg.brickHeight;
-    const IS_TOUCH = window.matchMedia("(hover: none)").matches;
+    const BRICK_TOP = cfg.brickTop;
+    const STEP = 1 / cfg.fps;
+    // Limite de impactos resolvidos por tick (proteção contra laços em cantos)
+    const MAX_HITS = 16;
+    const HIT_NONE = 0, HIT_LEFT = 1, HIT_RIGHT = 2, HIT_TOP = 3, HIT_BOTTOM = 4,
+        HIT_PADDLE = 5, HIT_BRICK = 6;
+    const ROWS = cfg.brickRows;
+    const COLS = cfg.brickColumns;
+    // Área desenhada de cada tijolo: a célula menos 1px de folga de cada lado
+    const BRICK_IW = BRICK_W - 2;
+    const BRICK_IH = BRICK_H - 2;
+    const IS_TOUCH = IN_WORKER ? cfg.isTouch : window.matchMedia("(hover: none)").matches;
     const ACTION = IS_TOUCH ? "toque" : "clique";
-    const MAX_PARTICLES = 300;
 
-    // localStorage pode lançar em contextos restritos: degrada para memória.
-    const store = {
+    // PRNG pequeno e semeável (mulberry32): a mesma semente reproduz a mesma
+    // partida, coisa que o Math.random não permite.
+    function mulberry32(seed) {
+        let a = seed >>> 0;
+        return function () {
+            a = (a + 0x6D2B79F5) >>> 0;
+            let t = Math.imul(a ^ (a >>> 15), a | 1);
+            t = (t + Math.imul(t ^ (t >>> 7), t | 61)) ^ t;
+            return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+        };
+    }
+
+    // Seno e cosseno por série de Taylor (Horner), só com somas e produtos:
+    // Math.sin/Math.cos variam no último bit entre motores JS e a libm do
+    // NumPy, e o replay verificado em Python (replay.py) precisa da mesma
+    // conta bit a bit. Com 11 termos o erro fica abaixo de 1e-16 nos ângulos
+    // da barra (até ±0,4π).
+    const SIN_TERMS = [];
+    const COS_TERMS = [];
+    for (let n = 0, fact = 1; n < 22; n++, fact *= n) {
+        const term = (n % 4 < 2 ? 1 : -1) / fact;
+        (n % 2 ? SIN_TERMS : COS_TERMS).push(term);
+    }
+
+    function taylor(terms, x2) {
+        let sum = terms[terms.length - 1];
+        for (let k = terms.length - 2; k >= 0; k--) sum = sum * x2 + terms[k];
+        return sum;
+    }
+
+    function exactSin(x) {
+        return x * taylor(SIN_TERMS, x * x);
+    }
+
+    function exactCos(x) {
+        return taylor(COS_TERMS, x * x);
+    }
+
+    function randomSeed() {
+        return Math.floor(Math.random() * 4294967296);
+    }
+
+    function brickX(col) {
+        return col * BRICK_W + 1;
+    }
+
+    function brickY(row) {
+        return row * BRICK_H + BRICK_TOP;
+    }
+
+    // Varredura de um ponto contra uma caixa (slabs): instante de entrada,
+    // em frações de (dx, dy), e se a entrada foi pelas faces laterais. A bola
+    // vira ponto quando a caixa é expandida pelo raio. Resultado em sweepHit,
+    // reaproveitado para não alocar por teste.
+    const sweepHit = { t: 0, axisX: false };
+
+    function sweepBox(x, y, dx, dy, left, top, right, bottom) {
+        let enterX = -Infinity, exitX = Infinity;
+        let enterY = -Infinity, exitY = Infinity;
+        if (dx !== 0) {
+            const t1 = (left - x) / dx;
+            const t2 = (right - x) / dx;
+            enterX = Math.min(t1, t2);
+            exitX = Math.max(t1, t2);
+        } else if (x < left || x > right) {
+            return false;
+        }
+        if (dy !== 0) {
+            const t1 = (top - y) / dy;
+            const t2 = (bottom - y) / dy;
+            enterY = Math.min(t1, t2);
+            exitY = Math.max(t1, t2);
+        } else if (y < top || y > bottom) {
+            return false;
+        }
+        const enter = Math.max(enterX, enterY);
+        const exit = Math.min(exitX, exitY);
+        // Saindo (ou só encostada e se afastando) não conta
+        if (enter > exit || exit <= 0) return false;
+        sweepHit.t = Math.max(0, enter);
+        sweepHit.axisX = enterX > enterY;
+        return true;
+    }
+
+    function brickColor(row) {
+        return cfg.brickColors[row % cfg.brickColors.length];
+    }
+
+    // Canvas fora da tela para camadas pré-desenhadas
+    function createLayer(width, height) {
+        if (typeof OffscreenCanvas !== "undefined") return new OffscreenCanvas(width, height);
+        const layer = document.createElement("canvas");
+        layer.width = width;
+        layer.height = height;
+        return layer;
+    }
+
+    // requestAnimationFrame existe em workers dedicados no Chrome e no
+    // Firefox; onde não existir, um timer no ritmo do jogo faz o papel.
+    function requestFrame(callback) {
+        if (self.requestAnimationFrame) return self.requestAnimationFrame(callback);
+        return setTimeout(() => callback(performance.now()), 1000 / cfg.fps);
+    }
+
+    // Armazenamento write-behind: get/set só mexem num Map em memória, e as
+    // escritas pendentes vão em lote para o IndexedDB, um tempo depois da
+    // última mudança ou na hora em pausa, aba escondida, fim de partida e
+    // pagehide. Nada de E/S síncrona no caminho do frame. Sem IndexedDB
+    // (modo privado de alguns navegadores, erro ao abrir) o lote vai para o
+    // localStorage; se nem ele existir, fica só a memória.
+    const STORE_PREFIX = "breakout:";
+    const STORE_DB = "breakout";
+    const STORE_TABLE = "kv";
+    const STORE_FLUSH_DELAY = 2000;   // ms
+    const STORE_OPEN_TIMEOUT = 1000;  // ms
+    // Chaves gravadas no localStorage por um lote que o IndexedDB recusou:
+    // lá estão mais novas que no IndexedDB. Fora do prefixo, não é um valor.
+    const STORE_PENDING = "breakout-store:pending";
+
+    function openStoreDb() {
+        return new Promise((resolve, reject) => {
+            const request = indexedDB.open(STORE_DB, 1);
+            request.onupgradeneeded = () => request.result.createObjectStore(STORE_TABLE);
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+            request.onblocked = () => reject(new Error("IndexedDB bloqueado"));
+        });
+    }
+
+    function readStoreDb(db) {
+        return new Promise((resolve, reject) => {
+            const entries = [];
+            const request = db.transaction(STORE_TABLE, "readonly").objectStore(STORE_TABLE).openCursor();
+            request.onsuccess = () => {
+                const cursor = request.result;
+                if (!cursor) {
+                    resolve(entries);
+                    return;
+                }
+                entries.push([cursor.key, cursor.value]);
+                cursor.continue();
+            };
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    class WriteBehindStore {
+        constructor() {
+            this.values = new Map();
+            this.dirty = new Map();
+            this.db = null;
+            this.timer = 0;
+            this.flushes = 0;
+            // Chaves gravadas por set() desde que a página abriu
+            this.touched = new Set();
+            this.pending = new Set();
+        }
+
+        // Leitura síncrona do localStorage (versões anteriores e lotes que o
+        // IndexedDB recusou), antes do jogo começar: o jogo não espera o
+        // IndexedDB.
+        loadLocal() {
+            try {
+                for (let i = 0; i < localStorage.length; i++) {
+                    const key = localStorage.key(i);
+                    if (key.startsWith(STORE_PREFIX)) this.values.set(key, localStorage.getItem(key));
+                }
+                this.pending = new Set(JSON.parse(localStorage.getItem(STORE_PENDING) || "[]"));
+            } catch (e) { /* sem localStorage, ou lista corrompida */ }
+        }
+
+        // Abre o IndexedDB com o jogo já rodando. Resolve com os valores que
+        // mudaram (para BreakoutGame.applyStorage), ou null. Não passa por
+        // cima do que é mais novo que ele: o que o jogo já gravou nesta
+        // página e as chaves em STORE_PENDING. O que falta no IndexedDB, ou
+        // está mais velho lá, é copiado para ele no próximo flush.
+        open() {
+            if (typeof indexedDB === "undefined") return Promise.resolve(null);
+
+            let timedOut = false;
+            const timeout = new Promise((resolve, reject) => setTimeout(() => {
+                timedOut = true;
+                reject(new Error("IndexedDB não respondeu"));
+            }, STORE_OPEN_TIMEOUT));
+            const open = openStoreDb().then((db) => readStoreDb(db).then((entries) => {
+                if (timedOut) {
+                    db.close();
+                    return null;
+                }
+                const stored = new Map(entries);
+                let changed = null;
+                for (const [key, value] of stored) {
+                    if (this.touched.has(key) || this.pending.has(key) || this.values.get(key) === value) continue;
+                    this.values.set(key, value);
+                    changed = changed || {};
+                    changed[key] = value;
+                }
+                for (const [key, value] of this.values) {
+                    if (stored.get(key) !== value && !this.dirty.has(key)) this.dirty.set(key, value);
+                }
+                this.db = db;
+                return changed;
+            }));
+            return Promise.race([open, timeout]).catch((e) => {
+                console.warn("IndexedDB indisponível, usando localStorage:", e);
+                return null;
+            });
+        }
+
         get(key, fallback) {
+            const value = this.values.get(key);
+            return value === undefined || value === null ? fallback : value;
+        }
+
+        set(key, value) {
+            if (this.values.get(key) === value) return;
+            this.values.set(key, value);
+            this.dirty.set(key, value);
+            this.touched.add(key);
+            clearTimeout(this.timer);
+            this.timer = setTimeout(() => this.flush(), STORE_FLUSH_DELAY);
+        }
+
+        snapshot() {
+            return Object.fromEntries(this.values);
+        }
+
+        flush() {
+            clearTimeout(this.timer);
+            this.timer = 0;
+            if (!this.dirty.size) return;
+            const batch = this.dirty;
+            this.dirty = new Map();
+            this.flushes++;
+            if (this.db) {
+                try {
+                    const transaction = this.db.transaction(STORE_TABLE, "readwrite");
+                    const table = transaction.objectStore(STORE_TABLE);
+                    for (const [key, value] of batch) table.put(value, key);
+                    transaction.oncomplete = () => this.committed(batch);
+                    // Lote recusado (cota, banco fechado): vai de novo, pelo localStorage
+                    transaction.onabort = () => {
+                        console.warn("Falha ao gravar no IndexedDB, usando localStorage:", transaction.error);
+                        this.db = null;
+                        this.requeue(batch);
+                        this.flush();
+                    };
+                    return;
+                } catch (e) {
+                    this.db = null;
+                }
+            }
             try {
-                const value = localStorage.getItem(key);
-                return value === null ? fallback : value;
-            } catch (e) {
-                return fallback;
+                for (const [key, value] of batch) {
+                    localStorage.setItem(key, value);
+                    this.pending.add(key);
+                }
+                this.savePending();
+            } catch (e) { /* sem persistência */ }
+        }
+
+        // Lote no IndexedDB: as cópias do localStorage deixam de ser as mais novas
+        committed(batch) {
+            let changed = false;
+            for (const key of batch.keys()) changed = this.pending.delete(key) || changed;
+            if (changed) this.savePending();
+        }
+
+        savePending() {
+            try {
+                if (this.pending.size) localStorage.setItem(STORE_PENDING, JSON.stringify([...this.pending]));
+                else localStorage.removeItem(STORE_PENDING);
+            } catch (e) { /* sem localStorage */ }
+        }
+
+        // Devolve um lote à fila sem passar por cima de valores mais novos
+        requeue(batch) {
+            for (const [key, value] of batch) {
+                if (!this.dirty.has(key)) this.dirty.set(key, value);
             }
+        }
+    }
+
+    // No worker não há nem localStorage nem a cópia carregada: as leituras
+    // vêm do snapshot que a página mandou em cfg.storage, e escritas e
+    // flushes voltam para o WriteBehindStore da página.
+    const store = IN_WORKER ? {
+        get(key, fallback) {
+            const value = cfg.storage[key];
+            return value === undefined || value === null ? fallback : value;
         },
         set(key, value) {
+            if (cfg.storage[key] === value) return;
+            cfg.storage[key] = value;
+            self.postMessage({ type: "store", key: key, value: value });
+        },
+        flush() {
+            self.postMessage({ type: "storeFlush" });
+        }
+    } : new WriteBehindStore();
+
+    // Estatísticas do jogador deste navegador, num único JSON no store.
+    // Atualizadas só em fim de nível e de partida, nunca por frame. Os
+    // tempos de nível contam ticks jogados (sem pausas e menus).
+    class PlayerStats {
+        constructor() {
+            this.data = { games: 0, victories: 0, bestLevel: 0, bestScore: 0, levels: {} };
             try {
-                localStorage.setItem(key, value);
-            } catch (e) { /* sem persistência */ }
+                Object.assign(this.data, JSON.parse(store.get("breakout:stats", "{}")));
+            } catch (e) { /* JSON corrompido: recomeça do zero */ }
         }
-    };
 
-    // Um único objeto Audio por som corta o som anterior quando dois tocam
-    // juntos; sons curtos e sobrepostos ganham um pool de canais.
+        levelCompleted(level, seconds) {
+            const entry = this.data.levels[level] || { completed: 0, best: null, total: 0 };
+            entry.completed++;
+            entry.total += seconds;
+            entry.best = entry.best === null ? seconds : Math.min(entry.best, seconds);
+            this.data.levels[level] = entry;
+            this.save();
+        }
+
+        gameEnded(level, score, victory) {
+            this.data.games++;
+            if (victory) this.data.victories++;
+            this.data.bestLevel = Math.max(this.data.bestLevel, level);
+            this.data.bestScore = Math.max(this.data.bestScore, score);
+            this.save();
+        }
+
+        save() {
+            store.set("breakout:stats", JSON.stringify(this.data));
+        }
+    }
+
+    // A rota estática do Streamlit entrega MP3 como text/plain com nosniff, e
+    // há navegador que recusa tocar mídia assim. Baixar e reembalar num Blob
+    // com o tipo certo resolve, e o fetch continua usando o cache HTTP.
+    function audioSource(src) {
+        if (src.startsWith("data:")) return Promise.resolve(src);
+        return fetch(src)
+            .then((response) => {
+                if (!response.ok) throw new Error(response.status + " " + src);
+                return response.blob();
+            })
+            .then((blob) => URL.createObjectURL(new Blob([blob], { type: "audio/mpeg" })));
+    }
+
+    // Bytes do arquivo para o Web Audio decodificar; fetch aceita data: URI.
+    function audioBytes(src) {
+        return fetch(src).then((response) => {
+            if (!response.ok) throw new Error(response.status + " " + src);
+            return response.arrayBuffer();
+        });
+    }
+
+    // Safari antigo só conhece a forma com callbacks de decodeAudioData
+    function decodeAudio(context, data) {
+        return new Promise((resolve, reject) => context.decodeAudioData(data, resolve, reject));
+    }
+
+    const AudioContextClass = self.AudioContext || self.webkitAudioContext;
+
+    // No modo "inline" cfg.sounds é o id do bloco JSON com os data URIs,
+    // interpretado só aqui, quando o áudio de fato carrega.
+    function soundSources(sources) {
+        if (typeof sources !== "string") return sources;
+        const block = document.getElementById(sources);
+        return block ? JSON.parse(block.textContent) : {};
+    }
+
+    function whenIdle(callback) {
+        if (window.requestIdleCallback) {
+            window.requestIdleCallback(callback, { timeout: 2000 });
+        } else {
+            setTimeout(callback, 200);
+        }
+    }
+
+    // Com Web Audio cada som é decodificado uma vez num AudioBuffer e cada
+    // disparo é uma fonte descartável barata, que pode se sobrepor às outras.
+    // Sem Web Audio, sons curtos e sobrepostos ganham um pool de objetos
+    // Audio. Nos dois casos play() só anota o pedido: flush(), uma vez por
+    // frame, toca cada som no máximo uma vez (com o maior volume pedido), e
+    // várias batidas no mesmo frame não viram um coro.
     class SoundBank {
-        constructor(sources) {
+        constructor(sources, loading = "idle") {
             this.muted = store.get("breakout:muted", "0") === "1";
-            this.channels = {};
-            for (const [name, src] of Object.entries(sources)) {
+            this.sources = sources;
+            this.pending = new Map();
+            this.context = null;
+            this.loading = false;
+            // Nada de áudio antes do primeiro frame: o canvas pinta e o loop
+            // começa já; os sons chegam depois, ociosos ou no primeiro gesto.
+            // Enquanto um som não chega, o disparo dele só é ignorado.
+            if (loading === "eager") {
+                this.loadAll();
+            } else if (loading === "idle" && !this.muted) {
+                requestAnimationFrame(() => whenIdle(() => this.loadAll()));
+            }
+        }
+
+        loadAll() {
+            if (this.loading) return;
+            this.loading = true;
+            try {
+                if (AudioContextClass) this.context = new AudioContextClass();
+            } catch (e) { /* segue com HTMLAudio */ }
+            if (this.context) {
+                this.buffers = {};
+                this.active = new Set();
+                this.output = this.context.createGain();
+                this.output.connect(this.context.destination);
+            } else {
+                this.channels = {};
+            }
+            for (const [name, src] of Object.entries(soundSources(this.sources))) {
                 if (!src) continue;
-                const size = (name === "bounce" || name === "brick") ? 5 : 1;
+                this.load(name, src).catch((e) => console.warn("Som indisponível:", name, e));
+            }
+        }
+
+        load(name, src) {
+            if (this.context) {
+                return audioBytes(src)
+                    .then((data) => decodeAudio(this.context, data))
+                    .then((buffer) => { this.buffers[name] = buffer; });
+            }
+            const size = (name === "bounce" || name === "brick") ? 5 : 1;
+            return audioSource(src).then((url) => {
                 this.channels[name] = {
-                    pool: Array.from({ length: size }, () => new Audio(src)),
+                    pool: Array.from({ length: size }, () => new Audio(url)),
                     next: 0
                 };
+            });
+        }
+
+        // O AudioContext nasce suspenso até um gesto do usuário; chamado de
+        // dentro dos handlers de clique/toque/tecla. Com o som ligado, o
+        // primeiro gesto também dispara o carregamento, se ainda não houve.
+        unlock() {
+            if (!this.muted) this.loadAll();
+            if (this.context && this.context.state === "suspended") {
+                this.context.resume().catch(() => { /* tenta no próximo gesto */ });
             }
         }
 
         play(name, volume = 1) {
             if (this.muted) return;
+            const queued = this.pending.get(name);
+            if (queued === undefined || volume > queued) this.pending.set(name, volume);
+        }
+
+        flush() {
+            if (!this.pending.size) return;
+            for (const [name, volume] of this.pending) this.start(name, volume);
+            this.pending.clear();
+        }
+
+        start(name, volume) {
+            if (!this.loading) return;
+            if (this.context) {
+                const buffer = this.buffers[name];
+                if (!buffer || this.context.state !== "running") return;
+                const source = this.context.createBufferSource();
+                source.buffer = buffer;
+                if (volume === 1) {
+                    source.connect(this.output);
+                } else {
+                    const gain = this.context.createGain();
+                    gain.gain.value = volume;
+                    gain.connect(this.output);
+                    source.connect(gain);
+                }
+                this.active.add(source);
+                source.onended = () => this.active.delete(source);
+                source.start();
+                return;
+            }
             const channel = this.channels[name];
             if (!channel) return;
             const audio = channel.pool[channel.next];
@@ -213,6 +711,13 @@ GAME_JS = """
         }
 
         stopAll() {
+            this.pending.clear();
+            if (!this.loading) return;
+            if (this.context) {
+                for (const source of this.active) source.stop();
+                this.active.clear();
+                return;
+            }
             for (const channel of Object.values(this.channels)) {
                 for (const audio of channel.pool) {
                     audio.pause();
@@ -221,23 +726,882 @@ GAME_JS = """
             }
         }
 
-        toggleMute() {
-            this.muted = !this.muted;
-            if (this.muted) this.stopAll();
-            store.set("breakout:muted", this.muted ? "1" : "0");
-            return this.muted;
+        toggleMute() {
+            this.muted = !this.muted;
+            this.unlock();
+            if (this.muted) this.stopAll();
+            store.set("breakout:muted", this.muted ? "1" : "0");
+            return this.muted;
+        }
+    }
+
+    // Gravação compacta de uma partida para reprodução no Python (replay.py).
+    // Só a semente e as entradas por tick bastam, porque a física é
+    // determinística. Tudo é varint (LEB128) num único buffer, em base64:
+    //   versão, semente, ticks, pontos, nível, vidas, vitória (0/1),
+    //   nº de ações, ticks das ações (delta do anterior),
+    //   posição da barra por tick: delta zigzag do tick anterior; um delta 0
+    //   vem seguido de quantos ticks a barra ficou parada (RLE).
+    // btoa só aceita string binária; vai em pedaços para não estourar a pilha
+    function bytesToBase64(bytes) {
+        let text = "";
+        for (let i = 0; i < bytes.length; i += 0x8000) {
+            text += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+        }
+        return btoa(text);
+    }
+
+    const REPLAY_VERSION = 1;
+
+    class ReplayRecorder {
+        constructor(seed, barX) {
+            this.seed = seed;
+            this.lastX = barX;
+            this.ticks = 0;
+            this.still = 0;
+            this.actions = [];
+            this.paddle = new Uint8Array(1024);
+            this.length = 0;
+        }
+
+        record(action, barX) {
+            if (action) this.actions.push(this.ticks);
+            const delta = barX - this.lastX;
+            this.lastX = barX;
+            if (delta === 0) {
+                this.still++;
+            } else {
+                this.flushStill();
+                this.write(delta < 0 ? -2 * delta - 1 : 2 * delta);
+            }
+            this.ticks++;
+        }
+
+        flushStill() {
+            if (!this.still) return;
+            this.write(0);
+            this.write(this.still);
+            this.still = 0;
+        }
+
+        write(value) {
+            if (this.length + 5 > this.paddle.length) {
+                const grown = new Uint8Array(this.paddle.length * 2);
+                grown.set(this.paddle);
+                this.paddle = grown;
+            }
+            while (value >= 0x80) {
+                this.paddle[this.length++] = (value & 0x7F) | 0x80;
+                value = Math.floor(value / 128);
+            }
+            this.paddle[this.length++] = value;
+        }
+
+        finish(score, level, lives, victory) {
+            this.flushStill();
+            const body = this.paddle.subarray(0, this.length);
+            this.paddle = new Uint8Array(64 + 5 * this.actions.length);
+            this.length = 0;
+            for (const value of [REPLAY_VERSION, this.seed, this.ticks, score, level, lives, victory ? 1 : 0]) {
+                this.write(value);
+            }
+            this.write(this.actions.length);
+            let previous = 0;
+            for (const tick of this.actions) {
+                this.write(tick - previous);
+                previous = tick;
+            }
+            const bytes = new Uint8Array(this.length + body.length);
+            bytes.set(this.paddle.subarray(0, this.length));
+            bytes.set(body, this.length);
+            return bytesToBase64(bytes);
+        }
+    }
+
+    // Atlas de sprites: bola, rastro e partículas desenhados uma vez numa
+    // camada fora da tela. No render cada um vira um drawImage do mesmo
+    // atlas, sem montar caminho (arc) nem trocar fillStyle/globalAlpha.
+    //   linha 0: a bola e TRAIL_SPRITES círculos do rastro, com o raio e a
+    //            transparência de cada posição já aplicados;
+    //   linhas seguintes: um quadrado por cor de partícula, em
+    //            PARTICLE_ALPHAS níveis de transparência.
+    const TRAIL_SPRITES = 12;
+    const PARTICLE_ALPHAS = 16;
+    const PARTICLE_SPRITE = 4;
+    const MAX_PARTICLE_COLORS = 16;
+
+    class SpriteAtlas {
+        constructor() {
+            this.cell = 2 * R + 2;
+            this.layer = createLayer(
+                this.cell * (TRAIL_SPRITES + 1),
+                this.cell + MAX_PARTICLE_COLORS * PARTICLE_SPRITE
+            );
+            this.ctx = this.layer.getContext("2d");
+            this.colors = 0;
+
+            const ctx = this.ctx;
+            const center = this.cell / 2;
+            ctx.fillStyle = cfg.colors.red;
+            for (let k = 0; k <= TRAIL_SPRITES; k++) {
+                // k = 0 é a bola; k > 0, o rastro com fade = k / TRAIL_SPRITES
+                const fade = k / TRAIL_SPRITES;
+                ctx.globalAlpha = k === 0 ? 1 : fade * 0.3;
+                ctx.beginPath();
+                ctx.arc(k * this.cell + center, center, k === 0 ? R : R * fade * 0.9, 0, Math.PI * 2);
+                ctx.fill();
+            }
+            ctx.globalAlpha = 1;
+        }
+
+        // Linha de partículas de uma cor nova (índice da paleta do pool)
+        addColor(index, color) {
+            const ctx = this.ctx;
+            const y = this.cell + index * PARTICLE_SPRITE;
+            ctx.fillStyle = color;
+            for (let a = 0; a < PARTICLE_ALPHAS; a++) {
+                ctx.globalAlpha = (a + 1) / PARTICLE_ALPHAS;
+                ctx.fillRect(a * PARTICLE_SPRITE, y, PARTICLE_SPRITE, PARTICLE_SPRITE);
+            }
+            ctx.globalAlpha = 1;
+        }
+    }
+
+    // Partículas em struct-of-arrays pré-alocado: nada é criado por frame e a
+    // partícula morta dá lugar à última do pool (ordem não importa aqui).
+    // As cores viram índices numa paleta que cresce conforme aparecem, cada
+    // uma com sua linha no atlas (no máximo MAX_PARTICLE_COLORS).
+    class ParticlePool {
+        constructor(capacity, atlas) {
+            this.atlas = atlas;
+            this.capacity = capacity;
+            this.count = 0;
+            this.x = new Float32Array(capacity);
+            this.y = new Float32Array(capacity);
+            this.vx = new Float32Array(capacity);
+            this.vy = new Float32Array(capacity);
+            this.life = new Float32Array(capacity);
+            this.maxLife = new Float32Array(capacity);
+            this.size = new Float32Array(capacity);
+            this.color = new Uint8Array(capacity);
+            this.palette = [];
+        }
+
+        colorIndex(color) {
+            let index = this.palette.indexOf(color);
+            if (index < 0) {
+                if (this.palette.length === MAX_PARTICLE_COLORS) return -1;
+                index = this.palette.length;
+                this.palette.push(color);
+                this.atlas.addColor(index, color);
+            }
+            return index;
+        }
+
+        update(deltaTime) {
+            let i = 0;
+            while (i < this.count) {
+                this.life[i] -= deltaTime;
+                if (this.life[i] <= 0) {
+                    this.removeAt(i);
+                    continue;
+                }
+                this.vy[i] += 500 * deltaTime;
+                this.x[i] += this.vx[i] * deltaTime;
+                this.y[i] += this.vy[i] * deltaTime;
+                i++;
+            }
+        }
+
+        removeAt(i) {
+            const last = --this.count;
+            this.x[i] = this.x[last];
+            this.y[i] = this.y[last];
+            this.vx[i] = this.vx[last];
+            this.vy[i] = this.vy[last];
+            this.life[i] = this.life[last];
+            this.maxLife[i] = this.maxLife[last];
+            this.size[i] = this.size[last];
+            this.color[i] = this.color[last];
+        }
+    }
+
+    // Perfilador de frame, desligado por padrão (tecla F, ?debug=perf na URL
+    // do app ou window.__breakout.profile.start()). Cada fase guarda as
+    // últimas amostras num anel; os percentis saem de uma cópia ordenada só
+    // quando alguém pede (o painel, a cada meio segundo, ou profile.stats()).
+    // performance.now() tem resolução reduzida em alguns navegadores, então
+    // fases muito curtas aparecem quantizadas.
+    const PROFILE_SAMPLES = 600;
+    const FRAME_BUDGET = 1000 / cfg.fps;
+    const PROFILE_SERIES = [
+        "frame", "interval", "ticks", "pointer", "update", "impacts", "effects", "render", "draws",
+        "logo", "bricks", "trail", "ball", "bar", "particles", "hud", "messages"
+    ];
+
+    class FrameProfiler {
+        constructor(samples = PROFILE_SAMPLES) {
+            this.samples = samples;
+            this.series = {};
+            for (const name of PROFILE_SERIES) {
+                this.series[name] = { data: new Float32Array(samples), next: 0, count: 0 };
+            }
+            this.frames = 0;
+            this.dropped = 0;
+            this.lastFrame = 0;
+            this.frameStart = 0;
+            this.lines = [];
+            this.linesAt = -Infinity;
+        }
+
+        add(name, value) {
+            const series = this.series[name];
+            series.data[series.next] = value;
+            series.next = (series.next + 1) % this.samples;
+            if (series.count < this.samples) series.count++;
+        }
+
+        // Registra o tempo desde start na fase e devolve o instante atual,
+        // para encadear as fases sem chamar performance.now() duas vezes.
+        lap(name, start) {
+            const now = performance.now();
+            this.add(name, now - start);
+            return now;
+        }
+
+        // Frame perdido: cada período de 1/fps a mais entre dois frames
+        beginFrame(timestamp) {
+            if (this.lastFrame) {
+                const interval = timestamp - this.lastFrame;
+                this.add("interval", interval);
+                this.dropped += Math.max(0, Math.round(interval / FRAME_BUDGET) - 1);
+            }
+            this.lastFrame = timestamp;
+            this.frames++;
+            this.frameStart = performance.now();
+        }
+
+        endFrame(ticks) {
+            this.add("ticks", ticks);
+            this.add("frame", performance.now() - this.frameStart);
+        }
+
+        stats(name) {
+            const series = this.series[name];
+            if (!series.count) return null;
+            const sorted = series.data.slice(0, series.count).sort();
+            const at = (q) => sorted[Math.min(series.count - 1, Math.floor(q * series.count))];
+            let sum = 0;
+            for (let i = 0; i < series.count; i++) sum += sorted[i];
+            return {
+                p50: at(0.5), p95: at(0.95), p99: at(0.99),
+                max: sorted[series.count - 1], mean: sum / series.count, samples: series.count
+            };
+        }
+
+        snapshot() {
+            const series = {};
+            for (const name of PROFILE_SERIES) {
+                const stats = this.stats(name);
+                if (stats) series[name] = stats;
+            }
+            return { frames: this.frames, dropped: this.dropped, window: this.samples, series: series };
+        }
+
+        // Linhas do painel, refeitas no máximo a cada meio segundo
+        hudLines(now) {
+            if (now - this.linesAt < 500) return this.lines;
+            this.linesAt = now;
+            const ms = (value) => value.toFixed(2).padStart(6);
+            this.lines = ["fase        p50    p95    p99  (ms)"];
+            for (const name of ["frame", "update", "effects", "render", "bricks", "particles", "interval"]) {
+                const stats = this.stats(name);
+                if (stats) this.lines.push(name.padEnd(9) + ms(stats.p50) + ms(stats.p95) + ms(stats.p99));
+            }
+            const draws = this.stats("draws");
+            if (draws) this.lines.push("desenhos/frame p50 " + draws.p50 + " · p99 " + draws.p99);
+            const impacts = this.stats("impacts");
+            this.lines.push(
+                "perdidos " + this.dropped + " de " + this.frames +
+                (impacts ? " · impactos/tick p99 " + impacts.p99 : "")
+            );
+            return this.lines;
+        }
+    }
+
+    // Níveis de qualidade dos efeitos, do mais caro ao mais barato. Só mudam
+    // o que é visual (partículas, rastro, tremor e clarão); física, placar e
+    // replay não dependem deles.
+    const QUALITY_LEVELS = [
+        { name: "alta", particles: 1, trail: 12, shake: 1, flash: 1 },
+        { name: "média", particles: 0.5, trail: 6, shake: 0.6, flash: 0.7 },
+        { name: "baixa", particles: 0.25, trail: 3, shake: 0.3, flash: 0.4 },
+        { name: "mínima", particles: 0, trail: 0, shake: 0, flash: 0 }
+    ];
+    const QUALITY_WINDOW = 30;        // frames por avaliação (meio segundo a 60fps)
+    const QUALITY_UP_WINDOWS = 4;     // janelas folgadas seguidas para subir
+    const QUALITY_LOG_SIZE = 20;
+    const QUALITY_LATE_LOAD = 0.5;    // trabalho mínimo para o atraso contar
+
+    // Governador de qualidade: mede o trabalho de cada frame (ticks + desenho)
+    // e o intervalo entre frames. O orçamento é o intervalo da própria tela,
+    // a mediana da janela (nunca menos que 1/fps): numa tela de 30Hz (modo
+    // de economia do iOS, iframe estrangulado) o frame tem 33ms e não conta
+    // como atrasado. Numa janela com trabalho médio acima de 80% do
+    // orçamento, ou com mais de um quarto dos frames atrasados e trabalho
+    // acima de QUALITY_LATE_LOAD, desce um nível; depois de várias janelas
+    // seguidas abaixo de 40%, sobe um. Subir exige mais folga que descer,
+    // para não ficar oscilando. Intervalos longos (aba em segundo plano) não
+    // contam.
+    class QualityGovernor {
+        constructor(mode) {
+            const fixed = QUALITY_LEVELS.findIndex((level) => level.name === mode);
+            this.auto = fixed < 0;
+            this.index = this.auto ? 0 : fixed;
+            this.level = QUALITY_LEVELS[this.index];
+            this.log = [];
+            this.intervals = new Float64Array(QUALITY_WINDOW);
+            this.resetWindow();
+            this.calm = 0;
+        }
+
+        resetWindow() {
+            this.frames = 0;
+            this.work = 0;
+        }
+
+        sample(work, interval) {
+            if (!this.auto || interval > 250) return;
+            this.intervals[this.frames++] = interval;
+            this.work += work;
+            if (this.frames < QUALITY_WINDOW) return;
+
+            const intervals = this.intervals.sort();
+            const refresh = intervals[QUALITY_WINDOW >> 1];
+            let late = 0;
+            for (let i = 0; i < QUALITY_WINDOW; i++) {
+                if (intervals[i] > refresh * 1.5) late++;
+            }
+            late /= QUALITY_WINDOW;
+            const load = this.work / this.frames / Math.max(FRAME_BUDGET, refresh);
+            this.resetWindow();
+            if (load > 0.8 || (late > 0.25 && load > QUALITY_LATE_LOAD)) {
+                this.calm = 0;
+                this.change(this.index + 1, load, late);
+            } else if (load < 0.4 && late < 0.05) {
+                if (++this.calm >= QUALITY_UP_WINDOWS) {
+                    this.calm = 0;
+                    this.change(this.index - 1, load, late);
+                }
+            } else {
+                this.calm = 0;
+            }
+        }
+
+        change(index, load, late) {
+            index = Math.max(0, Math.min(QUALITY_LEVELS.length - 1, index));
+            if (index === this.index) return;
+            const from = this.level.name;
+            this.index = index;
+            this.level = QUALITY_LEVELS[index];
+            const entry = {
+                at: Math.round(performance.now()), from: from, to: this.level.name,
+                load: Math.round(load * 100) / 100, late: Math.round(late * 100) / 100
+            };
+            this.log.push(entry);
+            if (this.log.length > QUALITY_LOG_SIZE) this.log.shift();
+            console.info(
+                "Qualidade " + from + " → " + this.level.name +
+                " (trabalho " + Math.round(load * 100) + "% do frame, " +
+                Math.round(late * 100) + "% dos frames atrasados)"
+            );
+        }
+    }
+
+    // Telemetria de jogo (telemetry.py no servidor). Os eventos vão para um
+    // anel de tamanho fixo, cada um uma linha [ms, tipo, nível, a, b, c] num
+    // Float64Array, sem alocar nada por evento. A cada cfg.telemetryInterval
+    // segundos (e no fim da partida) o anel vira um lote JSON comprimido com
+    // gzip (CompressionStream, fora da thread do jogo) que segue pelo canal:
+    // um rerun do fragmento por lote, nunca por evento. Anel cheio descarta
+    // os mais antigos e conta quantos.
+    const TELEMETRY_VERSION = 1;
+    const TELEMETRY_CAPACITY = 4096;
+    const TELEMETRY_FIELDS = 6;
+    const EVENT_BRICK = 1;          // a: célula, b: acertos que faltam
+    const EVENT_LIFE_LOST = 2;      // a: vidas restantes, b: rebatidas no rally, c: x da bola
+    const EVENT_LEVEL_COMPLETE = 3; // a: segundos jogados no nível, b: vidas
+    const EVENT_GAME_START = 4;     // a: semente
+    const EVENT_GAME_END = 5;       // a: pontos, b: vitória (0/1)
+    const EVENT_FRAMES = 6;         // a: trabalho médio (ms), b: pior frame (ms), c: frames atrasados
+    const TELEMETRY_FRAME_WINDOW = 300;
+
+    function gzipBase64(text) {
+        const stream = new Blob([text]).stream().pipeThrough(new CompressionStream("gzip"));
+        return new Response(stream).arrayBuffer().then((buffer) => bytesToBase64(new Uint8Array(buffer)));
+    }
+
+    class Telemetry {
+        constructor(interval) {
+            this.session = Math.random().toString(36).slice(2) + Date.now().toString(36);
+            this.events = new Float64Array(TELEMETRY_CAPACITY * TELEMETRY_FIELDS);
+            this.next = 0;
+            this.count = 0;
+            this.dropped = 0;
+            this.seq = 0;
+            this.frames = 0;
+            this.frameWork = 0;
+            this.frameWorst = 0;
+            this.frameLate = 0;
+            this.timer = setInterval(() => this.flush(), interval * 1000);
+        }
+
+        add(type, level, a = 0, b = 0, c = 0) {
+            const k = this.next * TELEMETRY_FIELDS;
+            this.events[k] = Math.round(performance.now());
+            this.events[k + 1] = type;
+            this.events[k + 2] = level;
+            this.events[k + 3] = a;
+            this.events[k + 4] = b;
+            this.events[k + 5] = c;
+            this.next = (this.next + 1) % TELEMETRY_CAPACITY;
+            if (this.count < TELEMETRY_CAPACITY) this.count++;
+            else this.dropped++;
+        }
+
+        // Amostras de frame viram um evento a cada TELEMETRY_FRAME_WINDOW frames
+        frame(level, work, late) {
+            this.frames++;
+            this.frameWork += work;
+            if (work > this.frameWorst) this.frameWorst = work;
+            if (late) this.frameLate++;
+            if (this.frames < TELEMETRY_FRAME_WINDOW) return;
+            this.add(EVENT_FRAMES, level,
+                Math.round(this.frameWork / this.frames * 100) / 100,
+                Math.round(this.frameWorst * 100) / 100, this.frameLate);
+            this.frames = 0;
+            this.frameWork = 0;
+            this.frameWorst = 0;
+            this.frameLate = 0;
+        }
+
+        // compress = false manda o JSON puro e na hora (pagehide: não dá
+        // para esperar a compressão terminar)
+        flush(compress = true) {
+            if (!this.count) return;
+            const rows = [];
+            const first = (this.next - this.count + TELEMETRY_CAPACITY) % TELEMETRY_CAPACITY;
+            for (let i = 0; i < this.count; i++) {
+                const k = ((first + i) % TELEMETRY_CAPACITY) * TELEMETRY_FIELDS;
+                rows.push(Array.from(this.events.subarray(k, k + TELEMETRY_FIELDS)));
+            }
+            const batch = JSON.stringify({
+                v: TELEMETRY_VERSION, session: this.session, seq: ++this.seq,
+                dropped: this.dropped, events: rows
+            });
+            this.count = 0;
+            this.dropped = 0;
+            if (!compress || typeof CompressionStream === "undefined") {
+                appChannel.send({ type: "telemetry", encoding: "json", data: batch });
+                return;
+            }
+            gzipBase64(batch).then(
+                (data) => appChannel.send({ type: "telemetry", encoding: "gzip", data: data }),
+                () => appChannel.send({ type: "telemetry", encoding: "json", data: batch })
+            );
+        }
+    }
+
+    // Eventos para o Python pelo canal (channel.py), que registra a função de
+    // entrega no documento pai. Cada evento tem um tipo ("levelComplete",
+    // "victory", "score"); os do mesmo frame seguem juntos numa só entrega, e
+    // cada entrega vira um único rerun do fragmento do canal, não do app.
+    // Enquanto o canal não existe (ainda montando, ou pai inacessível) os
+    // eventos esperam numa fila curta.
+    const appChannel = {
+        outbox: [],
+        timer: 0,
+        send(event) {
+            if (IN_WORKER) {
+                self.postMessage({ type: "channel", event: event });
+                return;
+            }
+            this.outbox.push(event);
+            // Fila cheia: telemetria sai antes de placar e celebrações
+            if (this.outbox.length > 20) {
+                const telemetry = this.outbox.findIndex((item) => item.type === "telemetry");
+                this.outbox.splice(telemetry >= 0 ? telemetry : 0, 1);
+            }
+            if (!this.timer) {
+                this.timer = setTimeout(() => {
+                    this.timer = 0;
+                    this.flush();
+                }, 0);
+            }
+        },
+        flush() {
+            try {
+                const deliver = window.parent.__breakoutChannel;
+                if (typeof deliver === "function") {
+                    deliver(this.outbox);
+                    this.outbox = [];
+                }
+            } catch (e) { /* sem acesso ao pai */ }
+            if (this.outbox.length && !this.timer) {
+                this.timer = setTimeout(() => {
+                    this.timer = 0;
+                    this.flush();
+                }, 1000);
+            }
+        }
+    };
+
+    // Cenas de estresse para medir o custo do frame sem ninguém no mouse
+    // (window.__breakout.bench, dirigido pelo bench.py num Chromium headless).
+    // Cada cena parte de uma semente fixa e roda um número fixo de frames de
+    // exatamente um tick cada, com o perfilador ligado e a qualidade presa
+    // em "alta". A cena é uma partida de demonstração (setDemo), que não
+    // conta para nada, e as vidas não acabam. A barra segue
+    // a bola (com um desvio sorteado, para variar os ângulos) e a parede
+    // volta inteira quando está para acabar, então o nível nunca termina.
+    const BENCH_FRAMES = 600;
+
+    const BENCH_SCENES = {
+        particulas: {
+            description: "pool de partículas sempre cheio, com rajadas novas a cada frame",
+            setup() {},
+            frame(game, rng) {
+                const pool = game.particles;
+                for (let i = 0; i < 8 && pool.count < pool.capacity; i++) {
+                    const color = cfg.brickColors[Math.floor(rng() * cfg.brickColors.length)];
+                    game.spawnParticles(rng() * W, BRICK_TOP + rng() * (H - BRICK_TOP) * 0.7, color, 40, 220);
+                }
+            }
+        },
+        parede: {
+            description: "parede de " + BENCH_CONFIG.parede.brickRows * BENCH_CONFIG.parede.brickColumns +
+                " tijolos pequenos (grade própria, só carregando a página com a cena)",
+            setup() {},
+            frame() {}
+        },
+        rally: {
+            description: "último nível com a bola no teto de velocidade (rallyMax)",
+            setup(game) {
+                game.level = cfg.maxLevel;
+                game.startLevel();
+                game.ballStuckToBar = false;
+            },
+            // Bola perdida volta na velocidade base: acelera de novo
+            frame(game) {
+                if (game.speed >= game.maxSpeed) return;
+                const scale = game.maxSpeed / game.speed;
+                game.speed = game.maxSpeed;
+                game.ballVelocity[0] *= scale;
+                game.ballVelocity[1] *= scale;
+            }
+        },
+        rajadas: {
+            description: "tijolos quebrando sem parar, vários por frame, com partículas e tremor",
+            setup() {},
+            frame(game, rng) {
+                for (let i = 0; i < 3; i++) {
+                    // Algumas tentativas por tijolo vivo; a parede volta antes de acabar
+                    for (let attempt = 0; attempt < 8; attempt++) {
+                        const cell = Math.floor(rng() * ROWS * COLS);
+                        if (game.brickHits[cell] > 0) {
+                            game.damageBrick(cell);
+                            break;
+                        }
+                    }
+                }
+            }
+        }
+    };
+
+    function heapSize() {
+        return performance.memory ? performance.memory.usedJSHeapSize : null;
+    }
+
+    class BenchRunner {
+        constructor(game) {
+            this.game = game;
+            this.current = null;
+        }
+
+        scenes() {
+            return Object.keys(BENCH_SCENES).map((name) => ({
+                name: name,
+                description: BENCH_SCENES[name].description,
+                reload: name in BENCH_CONFIG,
+                ready: this.ready(name)
+            }));
+        }
+
+        // A grade da cena já é a da página?
+        ready(name) {
+            const grid = BENCH_CONFIG[name];
+            return !grid || Object.keys(grid).every((key) => cfg[key] === grid[key]);
+        }
+
+        // Roda uma cena e resolve com o relatório dela
+        run(name, options = {}) {
+            const scene = BENCH_SCENES[name];
+            if (!scene) return Promise.reject(new Error("Cena desconhecida: " + name));
+            if (this.current) return Promise.reject(new Error("Já há uma cena rodando"));
+            if (!this.ready(name)) {
+                return Promise.reject(new Error(
+                    "A cena " + name + " precisa da página carregada com window.__BREAKOUT_BENCH__ = '" + name + "'"
+                ));
+            }
+            const frames = options.frames || BENCH_FRAMES;
+            const seed = (options.seed ?? 1) >>> 0;
+            // Com --js-flags=--expose-gc, cada cena começa com o heap limpo
+            if (typeof gc === "function") gc();
+
+            const game = this.game;
+            game.stopAutopilot();
+            return new Promise((resolve) => {
+                this.current = {
+                    name: name, scene: scene, frames: frames, seed: seed, resolve: resolve,
+                    rng: mulberry32(seed ^ 0x85EBCA6B),
+                    frame: 0, frameStart: 0, started: performance.now(),
+                    particles: 0, particlesMax: 0,
+                    heap: heapSize(), heapStart: heapSize(), collections: 0, freed: 0, gcFrames: [],
+                    saved: { quality: game.quality, profiler: game.profiler }
+                };
+                game.quality = new QualityGovernor("alta");
+                game.profiler = new FrameProfiler(frames);
+
+                game.setDemo(true);
+                game.resetGame(seed);
+                game.gameState = "playing";
+                game.ballStuckToBar = false;
+                game.pendingAction = false;
+                game.accumulator = 0;
+                scene.setup(game, this.current.rng);
+                game.bench = this;
+                game.wake();
+            });
+        }
+
+        // Antes dos ticks do frame: barra atrás da bola, parede cheia e a
+        // carga própria da cena
+        beforeFrame() {
+            const run = this.current;
+            const game = this.game;
+            run.frameStart = performance.now();
+            game.lives = cfg.lives;
+            game.ballStuckToBar = false;
+            game.pointerX = game.ballPosition[0] + (run.rng() - 0.5) * BAR_W * 0.6;
+            if (game.bricksLeft <= MAX_HITS) game.createBricks();
+            run.scene.frame(game, run.rng, run.frame);
+        }
+
+        // GC sem API própria: uma queda do heap usado entre dois frames
+        // (precisa de performance.memory, só no Chromium, e de
+        // --enable-precise-memory-info para não vir arredondado)
+        afterFrame() {
+            const run = this.current;
+            const game = this.game;
+            run.particles += game.particles.count;
+            run.particlesMax = Math.max(run.particlesMax, game.particles.count);
+            const heap = heapSize();
+            if (heap !== null) {
+                if (heap < run.heap) {
+                    run.collections++;
+                    run.freed += run.heap - heap;
+                    run.gcFrames.push(performance.now() - run.frameStart);
+                }
+                run.heap = heap;
+            }
+            if (++run.frame >= run.frames) this.finish();
+        }
+
+        finish() {
+            const run = this.current;
+            const game = this.game;
+            const report = {
+                scene: run.name,
+                description: run.scene.description,
+                seed: run.seed,
+                frames: run.frames,
+                seconds: Math.round(performance.now() - run.started) / 1000,
+                bricks: ROWS * COLS,
+                particles: { mean: run.particles / run.frames, max: run.particlesMax, capacity: game.particles.capacity },
+                gc: null,
+                profile: game.profiler.snapshot()
+            };
+            if (run.heapStart !== null) {
+                const sorted = run.gcFrames.sort((a, b) => a - b);
+                const mb = (bytes) => Math.round(bytes / 1048576 * 100) / 100;
+                report.gc = {
+                    collections: run.collections,
+                    freedMB: mb(run.freed),
+                    heapStartMB: mb(run.heapStart),
+                    heapEndMB: mb(run.heap),
+                    frameMs: sorted.length ? {
+                        p50: sorted[Math.floor(sorted.length / 2)], max: sorted[sorted.length - 1]
+                    } : null
+                };
+            }
+
+            Object.assign(game, run.saved);
+            game.bench = null;
+            this.current = null;
+            game.setDemo(false);
+            game.resetGame();
+            run.resolve(report);
+        }
+
+        // Todas as cenas que a página comporta, uma depois da outra
+        async runAll(options = {}) {
+            const reports = [];
+            for (const scene of this.scenes()) {
+                if (scene.ready) reports.push(await this.run(scene.name, options));
+            }
+            return reports;
+        }
+    }
+
+    // Som mudo das partidas de demonstração (setDemo)
+    const SILENT_SOUNDS = { play() {}, flush() {}, unlock() {} };
+
+    // Jogador automático, para testes de longa duração (vazamento de memória,
+    // frames que pioram com o tempo) e para a demonstração na tela de espera
+    // (window.__breakout.autopilot). A cada tick ele prevê onde a bola vai
+    // cruzar a altura da barra, com as rebatidas nas paredes e no teto, e
+    // leva a barra até lá com velocidade limitada, como um jogador rápido,
+    // mirando um ponto sorteado da barra a cada rebatida para variar os
+    // ângulos. Nas telas de espera ele "clica" depois de um tempo, e no fim
+    // da partida começa outra. Todo sorteio sai do próprio gerador, semeado:
+    // a mesma semente repete as mesmas partidas, em qualquer velocidade.
+    const AUTOPILOT_PADDLE_SPEED = 16;   // px por tick
+    const AUTOPILOT_WAIT = 60;           // ticks em cada tela de espera
+    const AUTOPILOT_MAX_SPEED = 64;
+    const AUTOPILOT_SAMPLES = 720;       // duas horas com uma amostra a cada 10s
+
+    class Autopilot {
+        constructor(game, options) {
+            this.game = game;
+            this.attract = Boolean(options.attract);
+            this.speed = Math.max(1, Math.min(AUTOPILOT_MAX_SPEED, Math.floor(options.speed || 1)));
+            this.seed = (options.seed ?? randomSeed()) >>> 0;
+            this.rng = mulberry32(this.seed);
+            this.sampleEvery = (options.sampleEvery || 10) * 1000;
+            this.aim = 0;
+            this.rally = -1;
+            this.wait = 0;
+            this.counts = { ticks: 0, games: 0, victories: 0, levels: 0, bestScore: 0 };
+            this.samples = [];
+            this.started = performance.now();
+            this.nextSample = this.started + this.sampleEvery;
+            this.resetWindow();
+        }
+
+        nextSeed() {
+            return Math.floor(this.rng() * 4294967296);
+        }
+
+        // Antes de applyPointer, em todo tick
+        steer() {
+            const game = this.game;
+            this.counts.ticks++;
+            if (game.gameState !== "playing" || game.ballStuckToBar) {
+                if (++this.wait < AUTOPILOT_WAIT) return;
+                this.wait = 0;
+                if (game.gameState === "gameOver" || game.gameState === "victory") {
+                    this.counts.games++;
+                    if (game.gameState === "victory") this.counts.victories++;
+                    this.counts.bestScore = Math.max(this.counts.bestScore, game.score);
+                    game.resetGame(this.nextSeed());
+                } else if (game.gameState === "levelComplete") {
+                    this.counts.levels++;
+                }
+                // Em pausa (aba escondida num teste longo) só espera
+                if (game.gameState !== "paused") game.pendingAction = true;
+                return;
+            }
+
+            if (game.rallyHits !== this.rally) {
+                this.rally = game.rallyHits;
+                this.aim = (this.rng() - 0.5) * BAR_W * 0.7;
+            }
+            const target = this.landingX() - this.aim;
+            const current = game.pointerX ?? game.barPosition[0] + BAR_W / 2;
+            game.pointerX = current + Math.max(-AUTOPILOT_PADDLE_SPEED, Math.min(AUTOPILOT_PADDLE_SPEED, target - current));
+        }
+
+        // x da bola ao chegar na altura da barra, em linha reta, passando
+        // pelo teto se ela sobe e dobrando a reta nas paredes. Os tijolos
+        // desviam a bola no caminho; a previsão é refeita a cada tick.
+        landingX() {
+            const game = this.game;
+            const x = game.ballPosition[0];
+            const y = game.ballPosition[1];
+            const vx = game.ballVelocity[0];
+            const vy = game.ballVelocity[1];
+            if (vy === 0) return x;
+            const barY = game.barPosition[1] - R;
+            const distance = vy > 0 ? barY - y : (y - R) + (barY - R);
+            const span = W - 2 * R;
+            let u = (x - R + vx * distance / Math.abs(vy)) % (2 * span);
+            if (u < 0) u += 2 * span;
+            return R + (u <= span ? u : 2 * span - u);
+        }
+
+        resetWindow() {
+            this.frames = 0;
+            this.work = 0;
+            this.worst = 0;
+            this.ticks = 0;
+        }
+
+        // Depois de cada frame: trabalho do frame e ticks que ele rodou
+        frame(work, ticks) {
+            this.frames++;
+            this.work += work;
+            this.worst = Math.max(this.worst, work);
+            this.ticks += ticks;
+            const now = performance.now();
+            if (now < this.nextSample) return;
+            this.nextSample = now + this.sampleEvery;
+
+            const heap = heapSize();
+            this.samples.push({
+                t: Math.round(now - this.started) / 1000,
+                ticks: this.counts.ticks,
+                games: this.counts.games,
+                heapMB: heap === null ? null : Math.round(heap / 1048576 * 100) / 100,
+                particles: this.game.particles.count,
+                trail: this.game.trail.length,
+                frames: this.frames,
+                workMs: Math.round(this.work / Math.max(1, this.frames) * 1000) / 1000,
+                worstMs: Math.round(this.worst * 1000) / 1000,
+                ticksPerFrame: Math.round(this.ticks / Math.max(1, this.frames) * 100) / 100,
+                quality: this.game.quality.level.name
+            });
+            if (this.samples.length > AUTOPILOT_SAMPLES) this.samples.shift();
+            this.resetWindow();
+        }
+
+        // Contagens, amostras e a deriva entre a primeira e a última amostra
+        report() {
+            const first = this.samples[0];
+            const last = this.samples[this.samples.length - 1];
+            const drift = first && last !== first ? {
+                seconds: last.t - first.t,
+                heapMB: first.heapMB === null ? null : Math.round((last.heapMB - first.heapMB) * 100) / 100,
+                workMs: Math.round((last.workMs - first.workMs) * 1000) / 1000,
+                particles: last.particles - first.particles
+            } : null;
+            return Object.assign({
+                attract: this.attract, speed: this.speed, seed: this.seed,
+                seconds: Math.round(performance.now() - this.started) / 1000,
+                samples: this.samples.slice(), drift: drift
+            }, this.counts);
         }
     }
 
-    // Os balões são do Streamlit e só saem de um rerun do Python: o jogo pede
-    // clicando no botão escondido que o app deixa no documento pai.
-    function celebrate() {
-        try {
-            const button = window.parent.document.querySelector('div[data-testid="stButton"] button');
-            if (button) button.click();
-        } catch (e) { /* sem acesso ao pai: segue sem balões */ }
-    }
-
     class BreakoutGame {
         constructor(canvas, sounds) {
             this.canvas = canvas;
@@ -246,22 +1610,27 @@ GAME_JS = """
             this.canvas.width = W;
             this.canvas.height = H;
 
-            // Posição pedida pelo ponteiro, aplicada uma vez por frame. Ler o
-            // rect a cada mousemove forçava recálculo de layout e travava a
-            // barra por instantes quando o mouse se movia rápido.
+            // Posição pedida pelo ponteiro (já em coordenadas do jogo, ver
+            // bindInput), aplicada uma vez por tick
             this.pointerX = null;
-            this.canvasRect = null;
-            this.frameLeft = 0;
+            // Posição nova que ainda não passou por um tick
+            this.pointerMoved = false;
 
-            this.logo = new Image();
-            this.logo.src = cfg.logo;
+            // Imagem pronta para desenhar, entregue por setLogo quando carrega
+            this.logo = null;
             this.logoWidth = 211;
             this.logoHeight = 71;
             this.logoX = (W - this.logoWidth) / 2;
             this.logoY = (H - this.logoHeight) / 2;
 
             this.highScore = parseInt(store.get("breakout:highscore", "0"), 10) || 0;
-            this.particles = [];
+            this.playerStats = new PlayerStats();
+            this.telemetry = cfg.telemetry ? new Telemetry(cfg.telemetryInterval) : null;
+            this.rallyHits = 0;
+            this.sprites = new SpriteAtlas();
+            this.particles = new ParticlePool(cfg.maxParticles, this.sprites);
+            // Chamadas de desenho no frame, para o perfilador
+            this.drawCalls = 0;
             this.shakeMag = 0;
             this.shakeTime = 0;
             this.shakeDuration = 1;
@@ -269,9 +1638,35 @@ GAME_JS = """
             this.flashDuration = 1;
             this.flashColor = "#FFFFFF";
             this.paddleFlash = 0;
+            this.shakeX = 0;
+            this.shakeY = 0;
+
+            // Clique/toque/Espaço só marcam a ação; quem a executa é o próximo
+            // tick, para a física ver a entrada sempre no mesmo ponto do passo.
+            this.pendingAction = false;
+            this.accumulator = 0;
+            // Replay da última partida encerrada (ReplayRecorder.finish)
+            this.lastReplay = null;
+
+            this.profiler = null;
+            this.impacts = 0;
+            this.quality = new QualityGovernor(cfg.quality);
+            this.lastFrame = 0;
+            // Render sob demanda: fora da partida, com os efeitos já apagados,
+            // o frame é sempre igual ao anterior e o loop dorme até wake()
+            this.sleeping = false;
+            this.stillFrames = 0;
+            // Cena de estresse em andamento (BenchRunner), ou null
+            this.bench = null;
+            // Partida de demonstração (setDemo) e o jogador automático dela
+            this.demo = false;
+            this.live = null;
+            this.autopilot = null;
+            this.attractTimer = 0;
+            // Demonstração encerrada pelo tempo: só volta depois de uma entrada
+            this.attractSpent = false;
 
             this.resetGame();
-            this.setupEvents();
 
             this.lastTime = performance.now();
             this.gameLoop(this.lastTime);
@@ -279,17 +1674,27 @@ GAME_JS = """
 
         // ---------- estado ----------
 
-        resetGame() {
+        // Cada partida tem uma semente (cfg.seed fixa todas, para testes). Dela
+        // saem duas sequências: rng, da física, usada só em resetBall, e fxRng,
+        // das partículas e do tremor. Separadas, a quantidade de partículas
+        // criadas nunca altera a trajetória da bola.
+        resetGame(seed = cfg.seed ?? randomSeed()) {
+            this.seed = seed >>> 0;
+            this.rng = mulberry32(this.seed);
+            this.fxRng = mulberry32(this.seed ^ 0x9E3779B9);
             this.score = 0;
             this.lives = cfg.lives;
             this.level = 1;
             this.newRecord = false;
             this.gameState = "initial";
             this.barPosition = [W / 2 - BAR_W / 2, H - BAR_H - 10];
+            this.prevBarX = this.barPosition[0];
+            this.recorder = this.demo ? null : new ReplayRecorder(this.seed, this.barPosition[0]);
             this.startLevel();
         }
 
         startLevel() {
+            this.levelTicks = 0;
             this.createBricks();
             this.resetBall();
         }
@@ -297,117 +1702,100 @@ GAME_JS = """
         resetBall() {
             this.speed = cfg.ballSpeed * (1 + cfg.levelSpeedStep * (this.level - 1));
             this.maxSpeed = this.speed * cfg.rallyMax;
-            const direction = Math.random() < 0.5 ? -1 : 1;
+            const direction = this.rng() < 0.5 ? -1 : 1;
             this.ballVelocity = [
                 direction * this.speed * Math.SQRT1_2,
                 -this.speed * Math.SQRT1_2
             ];
             this.ballPosition = [this.barPosition[0] + BAR_W / 2, this.barPosition[1] - R];
+            // Bola reposicionada não deve ser interpolada desde onde estava
+            this.prevBall = [this.ballPosition[0], this.ballPosition[1]];
             this.ballStuckToBar = true;
             this.trail = [];
+            this.rallyHits = 0;
         }
 
+        // Tijolos como um Uint8Array de acertos restantes por célula da grade
+        // (0 = já caiu) mais um contador dos que faltam. Posição, tamanho e cor
+        // saem da linha/coluna (brickX, brickY, brickColor).
         createBricks() {
-            this.bricks = [];
+            if (!this.brickHits) {
+                this.brickHits = new Uint8Array(ROWS * COLS);
+                // A parede só muda quando um tijolo é atingido: fica desenhada
+                // numa camada fora da tela e o render apenas a copia.
+                this.brickLayer = createLayer(W, BRICK_TOP + ROWS * BRICK_H);
+                this.brickCtx = this.brickLayer.getContext("2d");
+            }
             // A partir do nível 2 as fileiras de cima passam a exigir 2 acertos.
             const toughRows = Math.min(Math.max(this.level - 1, 0), 3);
-            for (let row = 0; row < cfg.brickRows; row++) {
-                for (let col = 0; col < cfg.brickColumns; col++) {
-                    this.bricks.push({
-                        x: col * BRICK_W + 1,
-                        y: row * BRICK_H + 50,
-                        width: BRICK_W - 2,
-                        height: BRICK_H - 2,
-                        color: cfg.brickColors[row % cfg.brickColors.length],
-                        hits: row < toughRows ? 2 : 1
-                    });
-                }
+            this.brickHits.fill(2, 0, toughRows * COLS);
+            this.brickHits.fill(1, toughRows * COLS);
+            this.bricksLeft = ROWS * COLS;
+
+            this.brickCtx.clearRect(0, 0, this.brickLayer.width, this.brickLayer.height);
+            for (let cell = 0; cell < ROWS * COLS; cell++) this.paintBrick(cell);
+        }
+
+        // Redesenha uma célula da camada de tijolos (apaga se o tijolo caiu)
+        paintBrick(cell) {
+            const ctx = this.brickCtx;
+            const row = Math.floor(cell / COLS);
+            const col = cell - row * COLS;
+            const hits = this.brickHits[cell];
+            ctx.clearRect(col * BRICK_W, brickY(row), BRICK_W, BRICK_H);
+            if (hits === 0) return;
+            const x = brickX(col);
+            const y = brickY(row);
+            ctx.fillStyle = brickColor(row);
+            ctx.fillRect(x, y, BRICK_IW, BRICK_IH);
+            if (hits > 1) {
+                // Tijolo reforçado: moldura branca até levar o primeiro acerto
+                ctx.strokeStyle = "#FFFFFF";
+                ctx.lineWidth = 3;
+                ctx.strokeRect(x + 2, y + 2, BRICK_IW - 4, BRICK_IH - 4);
+                ctx.lineWidth = 1;
             }
         }
 
         addScore(points) {
             this.score += points;
-            if (this.score > this.highScore) {
+            if (!this.demo && this.score > this.highScore) {
                 this.highScore = this.score;
                 this.newRecord = true;
                 store.set("breakout:highscore", String(this.highScore));
             }
         }
 
-        // ---------- eventos ----------
-
-        setupEvents() {
-            this.refreshRects();
-
-            // O movimento é escutado no documento inteiro, e não só no canvas:
-            // num gesto rápido o cursor sai da área do jogo e os eventos parariam
-            // de chegar, deixando a barra parada até o mouse voltar.
-            document.addEventListener("pointermove", (e) => this.setPointer(e.clientX));
-            try {
-                window.parent.document.addEventListener("pointermove", (e) => {
-                    this.setPointer(e.clientX - this.frameLeft);
-                });
-                window.parent.addEventListener("scroll", () => this.refreshRects(), true);
-            } catch (e) { /* sem acesso ao pai: o listener local já cobre o canvas */ }
-
-            this.canvas.addEventListener("click", () => this.handleAction());
-            this.canvas.addEventListener("touchstart", (e) => {
-                e.preventDefault();
-                this.setPointer(e.touches[0].clientX);
-                this.handleAction();
-            }, { passive: false });
-            this.canvas.addEventListener("touchmove", (e) => {
-                e.preventDefault();
-                this.setPointer(e.touches[0].clientX);
-            }, { passive: false });
-
-            document.addEventListener("keydown", (e) => {
-                if (e.code === "Space") {
-                    e.preventDefault();
-                    this.handleAction();
-                } else if (e.code === "KeyP" || e.code === "Escape") {
-                    e.preventDefault();
-                    this.togglePause();
-                } else if (e.code === "KeyM") {
-                    e.preventDefault();
-                    this.onMuteToggle();
-                }
-            });
-
-            document.addEventListener("visibilitychange", () => {
-                if (document.hidden && this.gameState === "playing") this.togglePause();
-            });
-        }
-
-        // Ler geometria força o browser a recalcular layout, então os rects são
-        // medidos só quando de fato mudam (resize, scroll), nunca por evento.
-        refreshRects() {
-            this.canvasRect = this.canvas.getBoundingClientRect();
-            try {
-                const frame = window.frameElement;
-                this.frameLeft = frame ? frame.getBoundingClientRect().left : 0;
-            } catch (e) {
-                this.frameLeft = 0;
-            }
-        }
+        // ---------- entrada ----------
+        // Chamadas por bindInput na página, ou pelas mensagens dela no worker
 
-        // Guarda a intenção do ponteiro; o canvas escala por CSS, então o pixel
-        // da tela vira coordenada do jogo aqui.
-        setPointer(clientX) {
-            const rect = this.canvasRect;
-            if (!rect || !rect.width) return;
-            this.pointerX = (clientX - rect.left) * (W / rect.width);
+        setPointerX(x) {
+            this.endAttract();
+            this.pointerX = x;
+            this.pointerMoved = true;
+            this.wake();
         }
 
+        // A barra anda em pixels inteiros: é assim que o replay a grava.
         applyPointer() {
+            this.pointerMoved = false;
             if (this.pointerX === null) return;
-            this.barPosition[0] = Math.max(0, Math.min(W - BAR_W, this.pointerX - BAR_W / 2));
+            const x = Math.floor(this.pointerX - BAR_W / 2 + 0.5);
+            this.barPosition[0] = Math.max(0, Math.min(W - BAR_W, x));
+        }
+
+        requestAction() {
+            this.endAttract();
+            this.pendingAction = true;
+            this.sounds.unlock();
+            this.wake();
         }
 
         handleAction() {
             if (this.gameState === "initial") {
                 this.gameState = "playing";
                 this.ballStuckToBar = false;
+                if (this.telemetry) this.telemetry.add(EVENT_GAME_START, this.level, this.seed);
             } else if (this.gameState === "playing") {
                 this.ballStuckToBar = false;
             } else if (this.gameState === "levelComplete") {
@@ -420,92 +1808,349 @@ GAME_JS = """
         }
 
         togglePause() {
+            if (this.endAttract()) return;
+            this.wake();
             if (this.gameState === "playing") {
                 this.gameState = "paused";
+                store.flush();
             } else if (this.gameState === "paused") {
                 this.gameState = "playing";
                 this.lastTime = performance.now();
+                this.accumulator = 0;
+            }
+        }
+
+        // Aba escondida no meio da partida pausa o jogo. A telemetria
+        // pendente sai já, sem compressão: no modo worker o pagehide só
+        // consegue mandar um recado para o worker, e o lote não voltaria a
+        // tempo; escondida, a aba pode nem chegar ao pagehide (celular).
+        onHidden() {
+            if (this.gameState === "playing") this.togglePause();
+            if (this.telemetry) this.telemetry.flush(false);
+        }
+
+        // Ligar zera as amostras; desligado, o loop não mede nada
+        setProfiling(enabled) {
+            this.profiler = enabled ? new FrameProfiler() : null;
+            this.wake();
+        }
+
+        toggleProfiling() {
+            this.setProfiling(!this.profiler);
+        }
+
+        profileStats() {
+            return this.profiler ? this.profiler.snapshot() : null;
+        }
+
+        // Nível atual e trocas recentes do QualityGovernor, em dados simples
+        // (passam pela mensagem do worker)
+        qualityStatus() {
+            const quality = this.quality;
+            return { level: quality.level.name, auto: quality.auto, log: quality.log.slice() };
+        }
+
+        setLogo(image) {
+            this.logo = image;
+            this.wake();
+        }
+
+        // Valores do IndexedDB que chegaram com o jogo já rodando (store.open)
+        applyStorage(entries) {
+            if (IN_WORKER) Object.assign(cfg.storage, entries);
+            if ("breakout:highscore" in entries) {
+                this.highScore = parseInt(store.get("breakout:highscore", "0"), 10) || 0;
             }
+            if ("breakout:stats" in entries) this.playerStats = new PlayerStats();
+            this.wake();
+        }
+
+        flushTelemetry() {
+            if (this.telemetry) this.telemetry.flush(false);
         }
 
-        onMuteToggle() {
-            const muted = this.sounds.toggleMute();
-            const button = document.getElementById("muteBtn");
-            if (button) {
-                button.textContent = muted ? "🔇 Mudo" : "🔊 Som";
-                button.setAttribute("aria-pressed", String(muted));
+        // ---------- demonstração ----------
+
+        // Partida de demonstração (autopiloto, cenas de estresse): joga como
+        // qualquer outra, mas sem som, replay, recorde, estatísticas,
+        // telemetria ou eventos para o servidor.
+        setDemo(enabled) {
+            if (enabled === this.demo) return;
+            this.demo = enabled;
+            if (enabled) {
+                this.live = { sounds: this.sounds, telemetry: this.telemetry };
+                this.sounds = SILENT_SOUNDS;
+                this.telemetry = null;
+                this.recorder = null;
+            } else {
+                this.sounds = this.live.sounds;
+                this.telemetry = this.live.telemetry;
+                this.live = null;
             }
-            this.canvas.focus();
+        }
+
+        // Liga o jogador automático (Autopilot) numa partida nova. Com
+        // options.live a partida é de verdade, com replay, placar e
+        // telemetria, para testar o caminho inteiro por horas.
+        startAutopilot(options = {}) {
+            if (this.bench) return false;
+            this.cancelAttract();
+            this.autopilot = new Autopilot(this, options);
+            this.setDemo(!options.live);
+            this.resetGame(this.autopilot.nextSeed());
+            this.wake();
+            return true;
+        }
+
+        // Desliga e devolve o relatório final (null se não estava ligado)
+        stopAutopilot() {
+            if (!this.autopilot) return null;
+            const report = this.autopilot.report();
+            this.autopilot = null;
+            this.setDemo(false);
+            this.resetGame();
+            this.wake();
+            return report;
+        }
+
+        autopilotReport() {
+            return this.autopilot ? this.autopilot.report() : null;
+        }
+
+        // Qualquer entrada do jogador encerra a demonstração e volta à tela
+        // inicial; o clique que a encerrou já começa a partida.
+        endAttract() {
+            this.attractSpent = false;
+            if (!this.autopilot || !this.autopilot.attract) return false;
+            this.stopAutopilot();
+            return true;
+        }
+
+        // Fim da demonstração por tempo (cfg.attractLength): volta à tela
+        // inicial e deixa o loop dormir, sem agendar outra até uma entrada
+        finishAttract() {
+            this.stopAutopilot();
+            this.attractSpent = true;
+        }
+
+        // Parado na tela inicial ou de fim de partida, a demonstração começa
+        // depois de cfg.attractDelay segundos sem entrada
+        scheduleAttract() {
+            if (!cfg.attractDelay || this.attractSpent || this.autopilot || this.bench || this.attractTimer) return;
+            if (this.gameState !== "initial" && this.gameState !== "gameOver" && this.gameState !== "victory") return;
+            this.attractTimer = setTimeout(() => {
+                this.attractTimer = 0;
+                this.startAutopilot({ attract: true });
+            }, cfg.attractDelay * 1000);
+        }
+
+        cancelAttract() {
+            clearTimeout(this.attractTimer);
+            this.attractTimer = 0;
         }
 
         // ---------- efeitos ----------
 
         addShake(magnitude, duration) {
+            magnitude *= this.quality.level.shake;
+            if (magnitude <= 0) return;
             this.shakeMag = Math.max(this.shakeMag, magnitude);
             this.shakeTime = Math.max(this.shakeTime, duration);
             this.shakeDuration = Math.max(this.shakeDuration, this.shakeTime);
         }
 
         addFlash(color, duration) {
+            if (this.quality.level.flash <= 0) return;
             this.flashColor = color;
             this.flashTime = duration;
             this.flashDuration = duration;
         }
 
         spawnParticles(x, y, color, count, speed) {
-            for (let i = 0; i < count && this.particles.length < MAX_PARTICLES; i++) {
-                const angle = Math.random() * Math.PI * 2;
-                const magnitude = speed * (0.3 + Math.random() * 0.7);
-                const life = 0.35 + Math.random() * 0.35;
-                this.particles.push({
-                    x: x,
-                    y: y,
-                    vx: Math.cos(angle) * magnitude,
-                    vy: Math.sin(angle) * magnitude - 40,
-                    life: life,
-                    maxLife: life,
-                    size: 2 + Math.random() * 2,
-                    color: color
-                });
+            const pool = this.particles;
+            const scale = this.quality.level.particles;
+            const limit = Math.floor(pool.capacity * scale);
+            count = Math.ceil(count * scale);
+            const colorIndex = pool.colorIndex(color);
+            if (colorIndex < 0) return;
+            for (let i = 0; i < count && pool.count < limit; i++) {
+                const angle = this.fxRng() * Math.PI * 2;
+                const magnitude = speed * (0.3 + this.fxRng() * 0.7);
+                const life = 0.35 + this.fxRng() * 0.35;
+                const k = pool.count++;
+                pool.x[k] = x;
+                pool.y[k] = y;
+                pool.vx[k] = Math.cos(angle) * magnitude;
+                pool.vy[k] = Math.sin(angle) * magnitude - 40;
+                pool.life[k] = life;
+                pool.maxLife[k] = life;
+                pool.size[k] = 2 + this.fxRng() * 2;
+                pool.color[k] = colorIndex;
             }
         }
 
-        // Roda em todos os frames, inclusive nos estados de menu: os efeitos
-        // precisam terminar de decair mesmo depois do game over.
+        // Roda em todos os ticks, inclusive nos estados de menu: os efeitos
+        // precisam terminar de decair mesmo depois do game over. O deslocamento
+        // do tremor é sorteado aqui, por tick, e não no render.
         updateEffects(deltaTime) {
             this.shakeTime = Math.max(0, this.shakeTime - deltaTime);
             if (this.shakeTime === 0) {
                 this.shakeMag = 0;
                 this.shakeDuration = 1;
+                this.shakeX = 0;
+                this.shakeY = 0;
+            } else {
+                const intensity = (this.shakeTime / this.shakeDuration) * this.shakeMag;
+                this.shakeX = (this.fxRng() * 2 - 1) * intensity;
+                this.shakeY = (this.fxRng() * 2 - 1) * intensity;
             }
             this.flashTime = Math.max(0, this.flashTime - deltaTime);
             this.paddleFlash = Math.max(0, this.paddleFlash - deltaTime);
 
-            for (let i = this.particles.length - 1; i >= 0; i--) {
-                const particle = this.particles[i];
-                particle.life -= deltaTime;
-                if (particle.life <= 0) {
-                    this.particles.splice(i, 1);
-                    continue;
-                }
-                particle.vy += 500 * deltaTime;
-                particle.x += particle.vx * deltaTime;
-                particle.y += particle.vy * deltaTime;
-            }
+            this.particles.update(deltaTime);
         }
 
         // ---------- loop ----------
 
+        // Passo fixo: a simulação avança em ticks de 1/fps, tantos quantos
+        // couberem no tempo real acumulado, e o render interpola bola e barra
+        // entre os dois últimos ticks. Assim a partida não depende da taxa de
+        // atualização da tela, e telas de 240Hz não pagam física extra.
         gameLoop(currentTime) {
-            const deltaTime = Math.min(currentTime - this.lastTime, 100) / 1000;
+            const profiler = this.profiler;
+            const bench = this.bench;
+            if (profiler) profiler.beginFrame(currentTime);
+            const workStart = performance.now();
+            // Numa cena de estresse todo frame é um tick, seja qual for a tela;
+            // o autopiloto pode acelerar o relógio do jogo
+            const speed = this.autopilot ? this.autopilot.speed : 1;
+            const frameTime = bench ? STEP : Math.min(currentTime - this.lastTime, 100) * speed / 1000;
             this.lastTime = currentTime;
+            if (bench) bench.beforeFrame();
+
+            this.accumulator += frameTime;
+            let ticks = 0;
+            while (this.accumulator >= STEP) {
+                this.tick();
+                this.accumulator -= STEP;
+                ticks++;
+            }
+            this.render(this.accumulator / STEP);
+            this.sounds.flush();
+            if (profiler) profiler.endFrame(ticks);
+            if (bench) bench.afterFrame();
+            const work = performance.now() - workStart;
+            if (this.autopilot) {
+                this.autopilot.frame(work, ticks);
+                if (this.autopilot.attract && this.autopilot.counts.ticks >= cfg.attractLength * cfg.fps) {
+                    this.finishAttract();
+                }
+            }
+            if (this.lastFrame) {
+                const interval = currentTime - this.lastFrame;
+                this.quality.sample(work, interval);
+                if (this.telemetry && interval < 250) this.telemetry.frame(this.level, work, interval > FRAME_BUDGET * 1.5);
+            }
+            this.lastFrame = currentTime;
+
+            // Dois frames parados seguidos, cada um com pelo menos um tick: o
+            // último desenho já é o definitivo. Frames sem tick (tela acima
+            // de 60Hz, ou logo depois de wake()) não contam: neles a entrada
+            // ainda não foi aplicada.
+            if (!this.isStill()) this.stillFrames = 0;
+            else if (ticks > 0) this.stillFrames++;
+            if (this.stillFrames >= 2) {
+                this.sleeping = true;
+                this.scheduleAttract();
+                return;
+            }
+            requestFrame((time) => this.gameLoop(time));
+        }
+
+        // Nada se mexe sem entrada nova: só nas telas fora da partida, sem
+        // tremor, clarão ou partículas, e com o perfilador (que se redesenha)
+        // e o jogador automático (que "clica" depois de esperar nas telas
+        // fora da partida) desligados. A bola presa à barra fica de fora
+        // porque conta como partida e a gravação do replay anda por tick.
+        isStill() {
+            return this.gameState !== "playing" &&
+                this.autopilot === null &&
+                !this.pendingAction &&
+                this.shakeTime === 0 &&
+                this.flashTime === 0 &&
+                this.paddleFlash === 0 &&
+                this.particles.count === 0 &&
+                this.profiler === null &&
+                // Ponteiro já aplicado e a interpolação do render chegou ao fim
+                !this.pointerMoved &&
+                this.prevBarX === this.barPosition[0] &&
+                this.prevBall[0] === this.ballPosition[0] &&
+                this.prevBall[1] === this.ballPosition[1];
+        }
+
+        // Retoma o loop depois de um sono. O tempo dormido não vira ticks:
+        // o relógio recomeça do agora.
+        wake() {
+            if (!this.sleeping) return;
+            this.cancelAttract();
+            this.sleeping = false;
+            this.stillFrames = 0;
+            this.lastTime = performance.now();
+            this.lastFrame = 0;
+            this.accumulator = 0;
+            requestFrame((time) => this.gameLoop(time));
+        }
+
+        tick() {
+            this.prevBall[0] = this.ballPosition[0];
+            this.prevBall[1] = this.ballPosition[1];
+            this.prevBarX = this.barPosition[0];
 
+            // A ação que reinicia a partida não entra no replay da nova
+            let action = false;
+            if (this.pendingAction) {
+                this.pendingAction = false;
+                action = this.recorder !== null;
+                this.handleAction();
+            }
+            const profiler = this.profiler;
+            let t = profiler ? performance.now() : 0;
+            if (this.autopilot) this.autopilot.steer();
             this.applyPointer();
-            if (this.gameState === "playing") this.update(deltaTime);
-            this.updateEffects(deltaTime);
-            this.render();
+            if (profiler) t = profiler.lap("pointer", t);
+            if (this.gameState === "playing") {
+                this.impacts = 0;
+                this.levelTicks++;
+                this.update(STEP);
+                if (profiler) {
+                    t = profiler.lap("update", t);
+                    profiler.add("impacts", this.impacts);
+                }
+            }
+            this.updateEffects(STEP);
+            if (profiler) profiler.lap("effects", t);
+
+            // Ticks em pausa não mexem na física e ficam de fora do replay
+            if (this.recorder && this.gameState !== "paused") {
+                this.recorder.record(action, this.barPosition[0]);
+                if (this.gameState === "gameOver" || this.gameState === "victory") this.finishReplay();
+            }
+        }
 
-            requestAnimationFrame((time) => this.gameLoop(time));
+        // Fecha o replay da partida. O do recorde fica guardado junto com ele,
+        // para que a pontuação possa ser conferida depois.
+        finishReplay() {
+            this.lastReplay = this.recorder.finish(this.score, this.level, this.lives, this.gameState === "victory");
+            this.recorder = null;
+            if (this.newRecord) store.set("breakout:highscoreReplay", this.lastReplay);
+            this.playerStats.gameEnded(this.level, this.score, this.gameState === "victory");
+            store.flush();
+            if (this.telemetry) {
+                this.telemetry.add(EVENT_GAME_END, this.level, this.score, this.gameState === "victory" ? 1 : 0);
+                this.telemetry.flush();
+            }
+            // O placar do servidor lê pontos, nível e resultado do próprio replay
+            appChannel.send({ type: "score", replay: this.lastReplay });
         }
 
         update(deltaTime) {
@@ -515,228 +2160,350 @@ GAME_JS = """
                 return;
             }
 
-            // Divide o movimento em sub-passos de no máximo um raio de bola,
-            // para não atravessar tijolos/barra em frames lentos (tunneling)
+            // Colisão contínua: em vez de andar em sub-passos, calcula o instante
+            // exato do próximo impacto (paredes, fundo, barra ou tijolo) dentro
+            // do tick, avança a bola até lá, resolve e repete com o tempo que
+            // sobrou. O custo depende do número de impactos, não da velocidade,
+            // e nenhuma velocidade atravessa tijolo (tunneling).
             const frameScale = deltaTime * cfg.fps;
-            const speed = Math.hypot(this.ballVelocity[0], this.ballVelocity[1]);
-            const steps = Math.max(1, Math.ceil((speed * frameScale) / R));
+            let remaining = 1;
+            for (let hits = 0; hits < MAX_HITS; hits++) {
+                const x = this.ballPosition[0];
+                const y = this.ballPosition[1];
+                const dx = this.ballVelocity[0] * frameScale;
+                const dy = this.ballVelocity[1] * frameScale;
+
+                // Em empate de tempo vale a ordem dos testes abaixo
+                let t = Infinity;
+                let hit = HIT_NONE;
+                let axisX = false;
+                if (dx < 0) {
+                    t = Math.max(0, (R - x) / dx);
+                    hit = HIT_LEFT;
+                } else if (dx > 0) {
+                    t = Math.max(0, (W - R - x) / dx);
+                    hit = HIT_RIGHT;
+                }
+                if (dy < 0) {
+                    const ty = Math.max(0, (R - y) / dy);
+                    if (ty < t) {
+                        t = ty;
+                        hit = HIT_TOP;
+                    }
+                } else if (dy > 0) {
+                    const ty = Math.max(0, (H - R - y) / dy);
+                    if (ty < t) {
+                        t = ty;
+                        hit = HIT_BOTTOM;
+                    }
+                }
+                if (this.sweepPaddle(x, y, dx, dy) && sweepHit.t < t) {
+                    t = sweepHit.t;
+                    hit = HIT_PADDLE;
+                }
+                const cell = this.sweepBricks(x, y, dx, dy, Math.min(t, remaining));
+                if (cell >= 0 && sweepHit.t < t) {
+                    t = sweepHit.t;
+                    hit = HIT_BRICK;
+                    axisX = sweepHit.axisX;
+                }
 
-            for (let i = 0; i < steps; i++) {
-                this.ballPosition[0] += this.ballVelocity[0] * frameScale / steps;
-                this.ballPosition[1] += this.ballVelocity[1] * frameScale / steps;
-                if (!this.handleCollisions()) return;
+                if (t > remaining) {
+                    this.ballPosition[0] = x + dx * remaining;
+                    this.ballPosition[1] = y + dy * remaining;
+                    break;
+                }
+                this.ballPosition[0] = x + dx * t;
+                this.ballPosition[1] = y + dy * t;
+                remaining -= t;
+                this.impacts++;
+
+                if (hit === HIT_LEFT) {
+                    this.ballPosition[0] = R;
+                    this.ballVelocity[0] = Math.abs(this.ballVelocity[0]);
+                    this.sounds.play("bounce");
+                } else if (hit === HIT_RIGHT) {
+                    this.ballPosition[0] = W - R;
+                    this.ballVelocity[0] = -Math.abs(this.ballVelocity[0]);
+                    this.sounds.play("bounce");
+                } else if (hit === HIT_TOP) {
+                    this.ballPosition[1] = R;
+                    this.ballVelocity[1] = Math.abs(this.ballVelocity[1]);
+                    this.sounds.play("bounce");
+                } else if (hit === HIT_BOTTOM) {
+                    this.loseBall();
+                    return;
+                } else if (hit === HIT_PADDLE) {
+                    this.hitPaddle();
+                } else if (!this.hitBrick(cell, axisX)) {
+                    return;
+                }
             }
 
             this.trail.push([this.ballPosition[0], this.ballPosition[1]]);
-            if (this.trail.length > 12) this.trail.shift();
-        }
-
-        // Retorna false quando a bola foi perdida ou o nível terminou (interrompe os sub-passos)
-        handleCollisions() {
-            // Colisão com paredes
-            if (this.ballPosition[0] - R <= 0) {
-                this.ballPosition[0] = R;
-                this.ballVelocity[0] = Math.abs(this.ballVelocity[0]);
-                this.sounds.play("bounce");
-            } else if (this.ballPosition[0] + R >= W) {
-                this.ballPosition[0] = W - R;
-                this.ballVelocity[0] = -Math.abs(this.ballVelocity[0]);
-                this.sounds.play("bounce");
-            }
-            if (this.ballPosition[1] - R <= 0) {
-                this.ballPosition[1] = R;
-                this.ballVelocity[1] = Math.abs(this.ballVelocity[1]);
-                this.sounds.play("bounce");
-            }
-
-            // Colisão com o fundo (perda de vida)
-            if (this.ballPosition[1] + R >= H) {
-                this.lives--;
-                this.sounds.play("loseLife");
-                this.spawnParticles(this.ballPosition[0], H - R, cfg.colors.red, 18, 140);
-                this.addShake(8, 0.35);
-                this.addFlash(cfg.colors.red, 0.4);
-                if (this.lives <= 0) {
-                    this.gameState = "gameOver";
-                    this.sounds.play("gameOver");
-                    this.addShake(10, 0.5);
-                } else {
-                    this.resetBall();
-                }
-                return false;
+            while (this.trail.length > this.quality.level.trail) this.trail.shift();
+        }
+
+        // Colisão com o fundo (perda de vida)
+        loseBall() {
+            this.lives--;
+            if (this.telemetry) {
+                this.telemetry.add(EVENT_LIFE_LOST, this.level, this.lives, this.rallyHits, Math.round(this.ballPosition[0]));
+            }
+            this.sounds.play("loseLife");
+            this.spawnParticles(this.ballPosition[0], H - R, cfg.colors.red, 18, 140);
+            this.addShake(8, 0.35);
+            this.addFlash(cfg.colors.red, 0.4);
+            if (this.lives <= 0) {
+                this.gameState = "gameOver";
+                this.sounds.play("gameOver");
+                this.addShake(10, 0.5);
+            } else {
+                this.resetBall();
             }
+        }
 
-            // Colisão com a barra (apenas com a bola descendo, considerando o raio)
-            if (
-                this.ballVelocity[1] > 0 &&
-                this.ballPosition[1] + R >= this.barPosition[1] &&
-                this.ballPosition[1] - R <= this.barPosition[1] + BAR_H &&
-                this.ballPosition[0] + R >= this.barPosition[0] &&
-                this.ballPosition[0] - R <= this.barPosition[0] + BAR_W
-            ) {
-                const hitPos = Math.max(0, Math.min(1,
-                    (this.ballPosition[0] - this.barPosition[0]) / BAR_W
-                ));
-                this.speed = Math.min(this.speed * cfg.rallyAccel, this.maxSpeed);
-                const angle = (hitPos - 0.5) * Math.PI * 0.8;
-                this.ballVelocity[0] = Math.sin(angle) * this.speed;
-                this.ballVelocity[1] = -Math.cos(angle) * this.speed;
-                this.ballPosition[1] = this.barPosition[1] - R;
-                this.paddleFlash = 0.12;
-                this.addShake(1, 0.05);
-                this.sounds.play("bounce");
-            }
-
-            // Colisão com tijolos
-            for (let i = this.bricks.length - 1; i >= 0; i--) {
-                const brick = this.bricks[i];
-                if (
-                    this.ballPosition[0] + R >= brick.x &&
-                    this.ballPosition[0] - R <= brick.x + brick.width &&
-                    this.ballPosition[1] + R >= brick.y &&
-                    this.ballPosition[1] - R <= brick.y + brick.height
-                ) {
-                    // Rebate no eixo de menor penetração: lateral inverte X, topo/fundo inverte Y
-                    const overlapX = this.ballPosition[0] < brick.x + brick.width / 2
-                        ? this.ballPosition[0] + R - brick.x
-                        : brick.x + brick.width - (this.ballPosition[0] - R);
-                    const overlapY = this.ballPosition[1] < brick.y + brick.height / 2
-                        ? this.ballPosition[1] + R - brick.y
-                        : brick.y + brick.height - (this.ballPosition[1] - R);
-                    if (overlapX < overlapY) {
-                        this.ballVelocity[0] *= -1;
-                    } else {
-                        this.ballVelocity[1] *= -1;
-                    }
+        // Colisão com a barra (apenas com a bola descendo, considerando o
+        // raio). A barra anda por salto entre ticks, então além da varredura
+        // vale também a bola que ela já encontrou sobreposta.
+        sweepPaddle(x, y, dx, dy) {
+            if (dy <= 0) return false;
+            const left = this.barPosition[0] - R;
+            const right = this.barPosition[0] + BAR_W + R;
+            const top = this.barPosition[1] - R;
+            const bottom = this.barPosition[1] + BAR_H + R;
+            if (x >= left && x <= right && y >= top && y <= bottom) {
+                sweepHit.t = 0;
+                return true;
+            }
+            return sweepBox(x, y, dx, dy, left, top, right, bottom);
+        }
 
-                    const centerX = brick.x + brick.width / 2;
-                    const centerY = brick.y + brick.height / 2;
-                    brick.hits--;
-                    if (brick.hits <= 0) {
-                        this.bricks.splice(i, 1);
-                        this.addScore(10);
-                        this.spawnParticles(centerX, centerY, brick.color, 14, 160);
-                        this.addShake(3, 0.12);
-                        this.sounds.play("brick");
-                    } else {
-                        this.addScore(5);
-                        this.spawnParticles(centerX, centerY, "#FFFFFF", 6, 90);
-                        this.addShake(1.5, 0.07);
-                        this.sounds.play("brick", 0.5);
-                    }
+        hitPaddle() {
+            const hitPos = Math.max(0, Math.min(1,
+                (this.ballPosition[0] - this.barPosition[0]) / BAR_W
+            ));
+            this.speed = Math.min(this.speed * cfg.rallyAccel, this.maxSpeed);
+            const angle = (hitPos - 0.5) * Math.PI * 0.8;
+            this.ballVelocity[0] = exactSin(angle) * this.speed;
+            this.ballVelocity[1] = -exactCos(angle) * this.speed;
+            this.ballPosition[1] = this.barPosition[1] - R;
+            this.paddleFlash = 0.12;
+            this.rallyHits++;
+            this.addShake(1, 0.05);
+            this.sounds.play("bounce");
+        }
 
-                    if (this.bricks.length === 0) {
-                        this.addFlash("#FFFFFF", 0.35);
-                        if (this.level >= cfg.maxLevel) {
-                            this.gameState = "victory";
-                            this.sounds.play("victory");
-                            this.addShake(6, 0.5);
-                        } else {
-                            this.gameState = "levelComplete";
-                            this.sounds.play("victory", 0.6);
-                        }
-                        celebrate();
-                        return false;
+        // Primeiro tijolo vivo que a bola varre até maxT (-1 se nenhum),
+        // consultando só as células da grade sob a caixa do trajeto. Em empate
+        // de tempo vence o de maior índice (linha a linha). O tempo e o eixo
+        // de entrada ficam em sweepHit.
+        sweepBricks(x, y, dx, dy, maxT) {
+            const endX = x + dx * maxT;
+            const endY = y + dy * maxT;
+            const rowFirst = Math.max(0, Math.floor((Math.min(y, endY) - R - BRICK_TOP) / BRICK_H));
+            const rowLast = Math.min(ROWS - 1, Math.floor((Math.max(y, endY) + R - BRICK_TOP) / BRICK_H));
+            const colFirst = Math.max(0, Math.floor((Math.min(x, endX) - R) / BRICK_W));
+            const colLast = Math.min(COLS - 1, Math.floor((Math.max(x, endX) + R) / BRICK_W));
+            let best = -1;
+            let bestT = maxT;
+            let bestAxisX = false;
+            for (let row = rowLast; row >= rowFirst; row--) {
+                const top = brickY(row) - R;
+                for (let col = colLast; col >= colFirst; col--) {
+                    const cell = row * COLS + col;
+                    if (this.brickHits[cell] === 0) continue;
+                    const left = brickX(col) - R;
+                    if (
+                        sweepBox(x, y, dx, dy, left, top, left + BRICK_IW + 2 * R, top + BRICK_IH + 2 * R) &&
+                        (sweepHit.t < bestT || (best < 0 && sweepHit.t <= bestT))
+                    ) {
+                        best = cell;
+                        bestT = sweepHit.t;
+                        bestAxisX = sweepHit.axisX;
                     }
-                    break;
                 }
             }
+            sweepHit.t = bestT;
+            sweepHit.axisX = bestAxisX;
+            return best;
+        }
+
+        // Retorna false quando o nível terminou (interrompe o movimento)
+        hitBrick(cell, axisX) {
+            const row = Math.floor(cell / COLS);
+            const x = brickX(cell - row * COLS);
+            const y = brickY(row);
+
+            // Rebate no eixo por onde a bola entrou: lateral inverte X,
+            // topo/fundo inverte Y. A bola fica encostada na face atingida,
+            // com a mesma conta de sweepBricks para não reentrar no tijolo.
+            if (axisX) {
+                const left = x - R;
+                this.ballPosition[0] = this.ballVelocity[0] > 0 ? left : left + BRICK_IW + 2 * R;
+                this.ballVelocity[0] *= -1;
+            } else {
+                const top = y - R;
+                this.ballPosition[1] = this.ballVelocity[1] > 0 ? top : top + BRICK_IH + 2 * R;
+                this.ballVelocity[1] *= -1;
+            }
+            return this.damageBrick(cell);
+        }
+
+        // Um acerto no tijolo: pontos, efeitos e, no último, fim do nível.
+        // Retorna false quando o nível terminou.
+        damageBrick(cell) {
+            const row = Math.floor(cell / COLS);
+            const centerX = brickX(cell - row * COLS) + BRICK_IW / 2;
+            const centerY = brickY(row) + BRICK_IH / 2;
+            this.brickHits[cell]--;
+            this.paintBrick(cell);
+            if (this.telemetry) this.telemetry.add(EVENT_BRICK, this.level, cell, this.brickHits[cell]);
+            if (this.brickHits[cell] === 0) {
+                this.bricksLeft--;
+                this.addScore(10);
+                this.spawnParticles(centerX, centerY, brickColor(row), 14, 160);
+                this.addShake(3, 0.12);
+                this.sounds.play("brick");
+            } else {
+                this.addScore(5);
+                this.spawnParticles(centerX, centerY, "#FFFFFF", 6, 90);
+                this.addShake(1.5, 0.07);
+                this.sounds.play("brick", 0.5);
+            }
 
+            if (this.bricksLeft === 0) {
+                this.addFlash("#FFFFFF", 0.35);
+                if (!this.demo) this.playerStats.levelCompleted(this.level, this.levelTicks / cfg.fps);
+                if (this.telemetry) {
+                    this.telemetry.add(EVENT_LEVEL_COMPLETE, this.level, this.levelTicks / cfg.fps, this.lives);
+                }
+                // Os balões são do Streamlit: o Python solta ao receber o evento
+                if (this.level >= cfg.maxLevel) {
+                    this.gameState = "victory";
+                    this.sounds.play("victory");
+                    this.addShake(6, 0.5);
+                    if (!this.demo) appChannel.send({ type: "victory", score: this.score });
+                } else {
+                    this.gameState = "levelComplete";
+                    this.sounds.play("victory", 0.6);
+                    if (!this.demo) appChannel.send({ type: "levelComplete", level: this.level, score: this.score });
+                }
+                return false;
+            }
             return true;
         }
 
         // ---------- render ----------
 
-        render() {
+        // alpha: fração do próximo tick já decorrida, para a interpolação
+        render(alpha = 1) {
             const ctx = this.ctx;
+            this.drawBallX = this.prevBall[0] + (this.ballPosition[0] - this.prevBall[0]) * alpha;
+            this.drawBallY = this.prevBall[1] + (this.ballPosition[1] - this.prevBall[1]) * alpha;
+            this.drawBarX = this.prevBarX + (this.barPosition[0] - this.prevBarX) * alpha;
+
+            const profiler = this.profiler;
+            const start = profiler ? performance.now() : 0;
+            let t = start;
 
             // Fundo desenhado sem shake, para o tremor não revelar as bordas
             ctx.fillStyle = cfg.colors.black;
             ctx.fillRect(0, 0, W, H);
+            this.drawCalls = 1;
 
             ctx.save();
-            if (this.shakeTime > 0) {
-                const intensity = (this.shakeTime / this.shakeDuration) * this.shakeMag;
-                ctx.translate(
-                    (Math.random() * 2 - 1) * intensity,
-                    (Math.random() * 2 - 1) * intensity
-                );
-            }
+            if (this.shakeTime > 0) ctx.translate(this.shakeX, this.shakeY);
 
             this.drawLogo(ctx);
+            if (profiler) t = profiler.lap("logo", t);
             this.drawBricks(ctx);
+            if (profiler) t = profiler.lap("bricks", t);
             this.drawTrail(ctx);
+            if (profiler) t = profiler.lap("trail", t);
             this.drawBall(ctx);
+            if (profiler) t = profiler.lap("ball", t);
             this.drawBar(ctx);
+            if (profiler) t = profiler.lap("bar", t);
             this.drawParticles(ctx);
+            if (profiler) t = profiler.lap("particles", t);
             ctx.restore();
 
             if (this.flashTime > 0) {
-                ctx.globalAlpha = (this.flashTime / this.flashDuration) * 0.35;
+                ctx.globalAlpha = (this.flashTime / this.flashDuration) * 0.35 * this.quality.level.flash;
                 ctx.fillStyle = this.flashColor;
                 ctx.fillRect(0, 0, W, H);
                 ctx.globalAlpha = 1;
+                this.drawCalls++;
             }
 
+            if (profiler) t = performance.now();
             this.drawHud(ctx);
+            if (profiler) t = profiler.lap("hud", t);
             this.drawMessages(ctx);
+            if (profiler) {
+                profiler.lap("messages", t);
+                profiler.add("render", performance.now() - start);
+                profiler.add("draws", this.drawCalls);
+                if (!this.bench) this.drawProfiler(ctx, profiler);
+            }
         }
 
         drawLogo(ctx) {
-            // naturalWidth > 0 garante imagem decodificada com sucesso
-            if (!this.logo.complete || this.logo.naturalWidth === 0) return;
+            if (!this.logo) return;
             ctx.globalAlpha = this.gameState === "playing" ? 0.2 : 1.0;
             ctx.drawImage(this.logo, this.logoX, this.logoY, this.logoWidth, this.logoHeight);
             ctx.globalAlpha = 1.0;
+            this.drawCalls++;
         }
 
         drawBricks(ctx) {
-            for (const brick of this.bricks) {
-                ctx.fillStyle = brick.color;
-                ctx.fillRect(brick.x, brick.y, brick.width, brick.height);
-                if (brick.hits > 1) {
-                    // Tijolo reforçado: moldura branca até levar o primeiro acerto
-                    ctx.strokeStyle = "#FFFFFF";
-                    ctx.lineWidth = 3;
-                    ctx.strokeRect(brick.x + 2, brick.y + 2, brick.width - 4, brick.height - 4);
-                    ctx.lineWidth = 1;
-                }
-            }
+            ctx.drawImage(this.brickLayer, 0, 0);
+            this.drawCalls++;
         }
 
+        // Com o rastro mais curto (qualidade menor) o fade anda em passos de
+        // 2 ou 4 sprites; no começo, antes de encher, vai no mais próximo.
         drawTrail(ctx) {
             const total = this.trail.length;
-            ctx.fillStyle = cfg.colors.red;
+            const atlas = this.sprites;
+            const cell = atlas.cell;
             for (let i = 0; i < total; i++) {
-                const fade = (i + 1) / total;
-                ctx.globalAlpha = fade * 0.3;
-                ctx.beginPath();
-                ctx.arc(this.trail[i][0], this.trail[i][1], R * fade * 0.9, 0, Math.PI * 2);
-                ctx.fill();
+                const k = Math.max(1, Math.round((i + 1) / total * TRAIL_SPRITES));
+                ctx.drawImage(
+                    atlas.layer, k * cell, 0, cell, cell,
+                    this.trail[i][0] - cell / 2, this.trail[i][1] - cell / 2, cell, cell
+                );
             }
-            ctx.globalAlpha = 1;
+            this.drawCalls += total;
         }
 
         drawBall(ctx) {
-            ctx.beginPath();
-            ctx.arc(this.ballPosition[0], this.ballPosition[1], R, 0, Math.PI * 2);
-            ctx.fillStyle = cfg.colors.red;
-            ctx.fill();
-            ctx.closePath();
+            const atlas = this.sprites;
+            const cell = atlas.cell;
+            ctx.drawImage(atlas.layer, 0, 0, cell, cell, this.drawBallX - cell / 2, this.drawBallY - cell / 2, cell, cell);
+            this.drawCalls++;
         }
 
         drawBar(ctx) {
             ctx.fillStyle = this.paddleFlash > 0 ? "#FFFFFF" : cfg.colors.blue;
-            ctx.fillRect(this.barPosition[0], this.barPosition[1], BAR_W, BAR_H);
+            ctx.fillRect(this.drawBarX, this.barPosition[1], BAR_W, BAR_H);
+            this.drawCalls++;
         }
 
+        // Cor e transparência já estão no sprite: nenhuma troca de estado
         drawParticles(ctx) {
-            for (const particle of this.particles) {
-                ctx.globalAlpha = Math.max(0, particle.life / particle.maxLife);
-                ctx.fillStyle = particle.color;
-                ctx.fillRect(particle.x, particle.y, particle.size, particle.size);
+            const pool = this.particles;
+            const layer = this.sprites.layer;
+            const top = this.sprites.cell;
+            for (let i = 0; i < pool.count; i++) {
+                const alpha = Math.min(PARTICLE_ALPHAS - 1, Math.floor(pool.life[i] / pool.maxLife[i] * PARTICLE_ALPHAS));
+                ctx.drawImage(
+                    layer, alpha * PARTICLE_SPRITE, top + pool.color[i] * PARTICLE_SPRITE,
+                    PARTICLE_SPRITE, PARTICLE_SPRITE, pool.x[i], pool.y[i], pool.size[i], pool.size[i]
+                );
             }
-            ctx.globalAlpha = 1;
+            this.drawCalls += pool.count;
         }
 
         drawHud(ctx) {
@@ -751,9 +2518,29 @@ GAME_JS = """
             ctx.textAlign = "right";
             ctx.fillStyle = "#AAAAAA";
             ctx.fillText("Recorde: " + this.highScore, W - 10, 30);
+            this.drawCalls += 2;
+        }
+
+        // Painel do perfilador, logo abaixo do HUD
+        drawProfiler(ctx, profiler) {
+            const lines = profiler.hudLines(performance.now());
+            ctx.fillStyle = "rgba(0, 0, 0, 0.7)";
+            ctx.fillRect(8, 40, 330, (lines.length + 1) * 16 + 8);
+            ctx.font = "12px monospace";
+            ctx.textAlign = "left";
+            ctx.fillStyle = "#7CFC00";
+            for (let i = 0; i < lines.length; i++) ctx.fillText(lines[i], 14, 56 + i * 16);
+            ctx.fillText(
+                "qualidade " + this.quality.level.name + (this.quality.auto ? " (auto)" : ""),
+                14, 56 + lines.length * 16
+            );
         }
 
         drawMessages(ctx) {
+            if (this.autopilot && this.autopilot.attract) {
+                this.drawAttract(ctx);
+                return;
+            }
             if (this.gameState === "playing" && !this.ballStuckToBar) return;
 
             let title = "";
@@ -788,6 +2575,7 @@ GAME_JS = """
             if (this.gameState !== "playing" && this.gameState !== "initial") {
                 ctx.fillStyle = "rgba(0, 0, 0, 0.45)";
                 ctx.fillRect(0, 0, W, H);
+                this.drawCalls++;
             }
 
             ctx.textAlign = "center";
@@ -798,11 +2586,28 @@ GAME_JS = """
             ctx.font = "20px Arial, sans-serif";
             ctx.fillStyle = "#DDDDDD";
             ctx.fillText(subtitle, W / 2, H / 2 + 110);
+            this.drawCalls += 2;
 
             if (this.newRecord && (this.gameState === "gameOver" || this.gameState === "victory")) {
                 ctx.font = "24px Arial Black, Arial, sans-serif";
                 ctx.fillStyle = cfg.colors.yellow;
                 ctx.fillText("Novo recorde: " + this.highScore, W / 2, H / 2 + 150);
+                this.drawCalls++;
+            }
+        }
+
+        // Convite por cima da demonstração, piscando a cada segundo
+        drawAttract(ctx) {
+            ctx.textAlign = "center";
+            ctx.font = "16px Arial, sans-serif";
+            ctx.fillStyle = "#AAAAAA";
+            ctx.fillText("DEMONSTRAÇÃO", W / 2, H / 2 + 40);
+            this.drawCalls++;
+            if (Math.floor(performance.now() / 500) % 2 === 0) {
+                ctx.font = "44px Arial Black, Arial, sans-serif";
+                ctx.fillStyle = "#FFFFFF";
+                ctx.fillText(ACTION + " para jogar", W / 2, H / 2 + 90);
+                this.drawCalls++;
             }
         }
     }
@@ -824,60 +2629,577 @@ GAME_JS = """
         } catch (e) { /* cross-origin: mantém a altura definida no Python */ }
     }
 
-    window.addEventListener("DOMContentLoaded", () => {
+    // ---------- página ----------
+
+    // Liga os eventos do DOM ao jogo: target é o BreakoutGame ou, no modo
+    // worker, o WorkerGame que repassa as chamadas. Devolve refreshRects
+    // para quem acompanha mudanças de layout.
+    function bindInput(canvas, target, onMute) {
+        // Ler geometria força o browser a recalcular layout, então os rects são
+        // medidos só quando de fato mudam (resize, scroll), nunca por evento.
+        let canvasRect = null;
+        let frameLeft = 0;
+        const refreshRects = () => {
+            canvasRect = canvas.getBoundingClientRect();
+            try {
+                const frame = window.frameElement;
+                frameLeft = frame ? frame.getBoundingClientRect().left : 0;
+            } catch (e) {
+                frameLeft = 0;
+            }
+        };
+        // O canvas escala por CSS, então o pixel da tela vira coordenada do jogo aqui
+        const setPointer = (clientX) => {
+            if (!canvasRect || !canvasRect.width) return;
+            target.setPointerX((clientX - canvasRect.left) * (W / canvasRect.width));
+        };
+        refreshRects();
+
+        // O movimento é escutado no documento inteiro, e não só no canvas:
+        // num gesto rápido o cursor sai da área do jogo e os eventos parariam
+        // de chegar, deixando a barra parada até o mouse voltar.
+        document.addEventListener("pointermove", (e) => setPointer(e.clientX));
+        try {
+            window.parent.document.addEventListener("pointermove", (e) => {
+                setPointer(e.clientX - frameLeft);
+            });
+            window.parent.addEventListener("scroll", refreshRects, true);
+        } catch (e) { /* sem acesso ao pai: o listener local já cobre o canvas */ }
+
+        canvas.addEventListener("click", () => target.requestAction());
+        canvas.addEventListener("touchstart", (e) => {
+            e.preventDefault();
+            setPointer(e.touches[0].clientX);
+            target.requestAction();
+        }, { passive: false });
+        canvas.addEventListener("touchmove", (e) => {
+            e.preventDefault();
+            setPointer(e.touches[0].clientX);
+        }, { passive: false });
+
+        document.addEventListener("keydown", (e) => {
+            if (e.code === "Space") {
+                e.preventDefault();
+                target.requestAction();
+            } else if (e.code === "KeyP" || e.code === "Escape") {
+                e.preventDefault();
+                target.togglePause();
+            } else if (e.code === "KeyM") {
+                e.preventDefault();
+                onMute();
+            } else if (e.code === "KeyF") {
+                e.preventDefault();
+                target.toggleProfiling();
+            }
+        });
+
+        document.addEventListener("visibilitychange", () => {
+            if (document.hidden) target.onHidden();
+        });
+        return refreshRects;
+    }
+
+    function updateMuteButton(button, muted) {
+        button.textContent = muted ? "🔇 Mudo" : "🔊 Som";
+        button.setAttribute("aria-pressed", String(muted));
+    }
+
+    // naturalWidth > 0 garante imagem decodificada com sucesso
+    function loadLogo(src, onReady) {
+        const image = new Image();
+        image.addEventListener("load", () => {
+            if (image.naturalWidth > 0) onReady(image);
+        });
+        image.src = src;
+    }
+
+    function debugParam() {
+        try {
+            return new URLSearchParams(window.parent.location.search).get("debug");
+        } catch (e) {
+            return null;   // pai inacessível: só pela tecla F
+        }
+    }
+
+    // Modo "worker": o canvas vira OffscreenCanvas e física e desenho rodam
+    // num Web Worker, longe dos reruns e do layout da página do Streamlit.
+    // Precisa de OffscreenCanvas com contexto 2D, que Safari antigo não tem.
+    function workerSupported() {
+        if (!GAME_SOURCE || typeof Worker === "undefined" || typeof OffscreenCanvas === "undefined") return false;
+        if (!("transferControlToOffscreen" in HTMLCanvasElement.prototype)) return false;
+        try {
+            return Boolean(new OffscreenCanvas(1, 1).getContext("2d"));
+        } catch (e) {
+            return false;
+        }
+    }
+
+    // Lado da página do jogo no worker: mesmas chamadas de entrada do
+    // BreakoutGame, viradas mensagens. Na volta, o worker manda sons (um lote
+    // por frame), gravações do store e eventos do canal.
+    class WorkerGame {
+        constructor(worker, sounds) {
+            this.worker = worker;
+            this.sounds = sounds;
+            this.requests = new Map();
+            this.nextRequest = 0;
+            worker.onmessage = (e) => this.receive(e.data);
+            worker.onerror = (e) => console.error("Erro no worker do jogo:", e.message);
+        }
+
+        call(method, args, transfer) {
+            this.worker.postMessage({ type: "call", method: method, args: args || [] }, transfer || []);
+        }
+
+        request(method, args) {
+            const id = this.nextRequest++;
+            return new Promise((resolve) => {
+                this.requests.set(id, resolve);
+                this.worker.postMessage({ type: "call", method: method, args: args || [], id: id });
+            });
+        }
+
+        receive(message) {
+            if (message.type === "sounds") {
+                for (const [name, volume] of message.sounds) this.sounds.play(name, volume);
+                this.sounds.flush();
+            } else if (message.type === "store") {
+                store.set(message.key, message.value);
+            } else if (message.type === "storeFlush") {
+                store.flush();
+            } else if (message.type === "channel") {
+                appChannel.send(message.event);
+                // Aba escondida: timers estrangulados, e a página pode sair
+                // a qualquer momento. Entrega na hora.
+                if (document.hidden) appChannel.flush();
+            } else if (message.type === "result") {
+                const resolve = this.requests.get(message.id);
+                this.requests.delete(message.id);
+                if (resolve) resolve(message.result);
+            }
+        }
+
+        setPointerX(x) { this.call("setPointerX", [x]); }
+        // O desbloqueio do áudio precisa acontecer aqui, dentro do gesto
+        requestAction() {
+            this.sounds.unlock();
+            this.call("requestAction");
+        }
+        togglePause() { this.call("togglePause"); }
+        onHidden() { this.call("onHidden"); }
+        setProfiling(enabled) { this.call("setProfiling", [enabled]); }
+        toggleProfiling() { this.call("toggleProfiling"); }
+        // No worker as estatísticas chegam por mensagem: devolve uma Promise
+        profileStats() { return this.request("profileStats"); }
+        qualityStatus() { return this.request("qualityStatus"); }
+        flushTelemetry() { this.call("flushTelemetry"); }
+        applyStorage(entries) { this.call("applyStorage", [entries]); }
+        startAutopilot(options) { return this.request("startAutopilot", [options || {}]); }
+        stopAutopilot() { return this.request("stopAutopilot"); }
+        autopilotReport() { return this.request("autopilotReport"); }
+        setLogo(image) {
+            createImageBitmap(image).then((bitmap) => this.call("setLogo", [bitmap], [bitmap]));
+        }
+    }
+
+    // Cria o worker a partir deste mesmo script e só transfere o canvas
+    // depois que ele responde: se falhar antes disso, o canvas continua
+    // livre para o modo de sempre.
+    function startWorker(canvas, sounds) {
+        return new Promise((resolve, reject) => {
+            const workerCfg = Object.assign({}, cfg, {
+                sounds: null,
+                logo: null,
+                isTouch: IS_TOUCH,
+                storage: store.snapshot()
+            });
+            const source = "self.__BREAKOUT_CFG__ = " + JSON.stringify(workerCfg) + ";" + GAME_SOURCE;
+            const url = URL.createObjectURL(new Blob([source], { type: "text/javascript" }));
+            let worker = null;
+            let timer = 0;
+            const fail = (error) => {
+                clearTimeout(timer);
+                if (worker) worker.terminate();
+                URL.revokeObjectURL(url);
+                reject(error);
+            };
+            try {
+                worker = new Worker(url);
+            } catch (e) {
+                fail(e);
+                return;
+            }
+            timer = setTimeout(() => fail(new Error("worker não respondeu")), 2000);
+            worker.onerror = (e) => {
+                e.preventDefault();
+                fail(new Error(e.message));
+            };
+            worker.onmessage = (e) => {
+                if (e.data.type !== "ready") return;
+                clearTimeout(timer);
+                URL.revokeObjectURL(url);
+                const offscreen = canvas.transferControlToOffscreen();
+                worker.postMessage({ type: "init", canvas: offscreen }, [offscreen]);
+                resolve(new WorkerGame(worker, sounds));
+            };
+        });
+    }
+
+    // ---------- worker ----------
+
+    // Sons pedidos no worker: flush(), uma vez por frame, manda o lote
+    // para o SoundBank da página. O desbloqueio é feito lá, no gesto.
+    class RemoteSounds {
+        constructor() {
+            this.queue = [];
+        }
+        play(name, volume = 1) {
+            this.queue.push([name, volume]);
+        }
+        flush() {
+            if (!this.queue.length) return;
+            self.postMessage({ type: "sounds", sounds: this.queue });
+            this.queue = [];
+        }
+        unlock() {}
+    }
+
+    const WORKER_CALLS = [
+        "setPointerX", "requestAction", "togglePause", "onHidden",
+        "setProfiling", "toggleProfiling", "profileStats", "qualityStatus", "setLogo", "flushTelemetry", "applyStorage",
+        "startAutopilot", "stopAutopilot", "autopilotReport"
+    ];
+
+    function runWorker() {
+        let game = null;
+        self.onmessage = (e) => {
+            const message = e.data;
+            if (message.type === "init") {
+                game = new BreakoutGame(message.canvas, new RemoteSounds());
+            } else if (message.type === "call" && game && WORKER_CALLS.includes(message.method)) {
+                const result = game[message.method].apply(game, message.args);
+                if (message.id !== undefined) self.postMessage({ type: "result", id: message.id, result: result });
+            }
+        };
+        self.postMessage({ type: "ready" });
+    }
+
+    function startGame(storeReady) {
         try {
             const canvas = document.getElementById("gameCanvas");
             if (!canvas) throw new Error("Canvas não encontrado");
 
-            const sounds = new SoundBank(cfg.sounds);
-            const game = new BreakoutGame(canvas, sounds);
-
+            const sounds = new SoundBank(cfg.sounds, cfg.audioLoading);
             const muteBtn = document.getElementById("muteBtn");
-            muteBtn.textContent = sounds.muted ? "🔇 Mudo" : "🔊 Som";
-            muteBtn.setAttribute("aria-pressed", String(sounds.muted));
-            muteBtn.addEventListener("click", () => game.onMuteToggle());
+            updateMuteButton(muteBtn, sounds.muted);
+            const toggleMute = () => {
+                updateMuteButton(muteBtn, sounds.toggleMute());
+                canvas.focus();
+            };
+            muteBtn.addEventListener("click", toggleMute);
 
             canvas.focus();
             fitFrame();
-            const onLayoutChange = () => {
-                fitFrame();
-                game.refreshRects();
+
+            const start = (game, thread) => {
+                const refreshRects = bindInput(canvas, game, toggleMute);
+                const onLayoutChange = () => {
+                    fitFrame();
+                    refreshRects();
+                };
+                window.addEventListener("resize", onLayoutChange);
+                window.addEventListener("scroll", refreshRects);
+                new ResizeObserver(onLayoutChange).observe(canvas);
+                loadLogo(cfg.logo, (image) => game.setLogo(image));
+                storeReady.then((entries) => {
+                    if (!entries) return;
+                    if ("breakout:muted" in entries) {
+                        sounds.muted = entries["breakout:muted"] === "1";
+                        updateMuteButton(muteBtn, sounds.muted);
+                    }
+                    game.applyStorage(entries);
+                });
+                if (debugParam() === "perf") game.setProfiling(true);
+                // Telemetria pendente sai sem compressão e sem esperar o timer
+                window.addEventListener("pagehide", () => {
+                    game.flushTelemetry();
+                    appChannel.flush();
+                });
+
+                // Superfície de inspeção usada pelos testes de ponta a ponta.
+                // No modo worker, game é o WorkerGame e stats() e quality() são
+                // Promises.
+                window.__breakout = {
+                    game: game,
+                    sounds: sounds,
+                    isTouch: IS_TOUCH,
+                    thread: thread,
+                    quality: () => game.qualityStatus(),
+                    store: store,
+                    playerStats: () => JSON.parse(store.get("breakout:stats", "null")),
+                    profile: {
+                        start: () => game.setProfiling(true),
+                        stop: () => game.setProfiling(false),
+                        stats: () => game.profileStats()
+                    },
+                    // Cenas de estresse (bench.py); só na thread principal
+                    bench: thread === "main" ? new BenchRunner(game) : null,
+                    // Jogador automático para testes longos; no worker, Promises
+                    autopilot: {
+                        start: (options) => game.startAutopilot(options),
+                        stop: () => game.stopAutopilot(),
+                        report: () => game.autopilotReport()
+                    }
+                };
             };
-            window.addEventListener("resize", onLayoutChange);
-            window.addEventListener("scroll", () => game.refreshRects());
-            new ResizeObserver(onLayoutChange).observe(canvas);
 
-            // Superfície de inspeção usada pelos testes de ponta a ponta
-            window.__breakout = { game: game, sounds: sounds, isTouch: IS_TOUCH };
+            if (cfg.renderThread === "worker" && workerSupported()) {
+                startWorker(canvas, sounds).then(
+                    (game) => start(game, "worker"),
+                    (e) => {
+                        console.warn("Worker indisponível, jogo na thread principal:", e);
+                        start(new BreakoutGame(canvas, sounds), "main");
+                    }
+                );
+            } else {
+                start(new BreakoutGame(canvas, sounds), "main");
+            }
         } catch (e) {
             console.error("Erro ao inicializar o jogo:", e);
         }
-    });
+    }
+
+    // O jogo pinta e começa já, com o que está no localStorage (ou os
+    // padrões); recorde, mudo e estatísticas do IndexedDB chegam depois.
+    function startPage() {
+        store.loadLocal();
+        startGame(store.open());
+        // Últimas chances de gravar o que ficou pendente
+        window.addEventListener("pagehide", () => store.flush());
+        document.addEventListener("visibilitychange", () => {
+            if (document.hidden) store.flush();
+        });
+    }
+
+    if (IN_WORKER) {
+        runWorker();
+    } else {
+        window.addEventListener("DOMContentLoaded", startPage);
+    }
 })();
 """
 
-breakout_html = (
-    "<!DOCTYPE html><html><head><meta charset='utf-8'><style>" + GAME_CSS + "</style></head>"
-    "<body><div id='wrap'>"
-    "<canvas id='gameCanvas' tabindex='0'></canvas>"
-    "<div id='controls'>"
-    "<button id='muteBtn' type='button' aria-label='Ativar ou desativar o som'>🔊 Som</button>"
-    "</div>"
-    "</div>"
-    "<script>window.__BREAKOUT_CFG__ = " + json.dumps(GAME_CONFIG) + ";</script>"
-    "<script>" + GAME_JS + "</script>"
-    "</body></html>"
-)
+# Tempo de montagem x tempo de acerto no cache, somado entre todas as sessões
+# do processo. Aparece no log do Streamlit.
+class BundleStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.builds = 0
+        self.build_seconds = 0.0
+        self.hits = 0
+        self.hit_seconds = 0.0
+        # Cada sessão executa o script numa thread própria, e o
+        # cache_resource monta na thread de quem pediu: o que foi registrado
+        # nesta thread é desta execução, mesmo com sessões simultâneas.
+        self.local = threading.local()
+
+    def begin(self):
+        self.local.built = False
+
+    # Se a execução atual (desde begin) montou o bundle
+    def built(self):
+        return getattr(self.local, "built", False)
+
+    def record(self, built, seconds):
+        with self.lock:
+            if built:
+                self.builds += 1
+                self.build_seconds += seconds
+            else:
+                self.hits += 1
+                self.hit_seconds += seconds
+        self.local.built = built
+
+    def summary(self):
+        with self.lock:
+            return {
+                "builds": self.builds,
+                "build_ms": round(1000 * self.build_seconds / max(1, self.builds), 3),
+                "hits": self.hits,
+                "hit_ms": round(1000 * self.hit_seconds / max(1, self.hits), 3),
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def bundle_stats():
+    return BundleStats()
+
+
+# Custo de cada execução do script inteiro x do fragmento do canal, somado
+# entre as sessões do processo (aparece em ?debug=memoria).
+class RunStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.runs = {}
+
+    def record(self, name, seconds):
+        with self.lock:
+            count, total = self.runs.get(name, (0, 0.0))
+            self.runs[name] = (count + 1, total + seconds)
+
+    def summary(self):
+        with self.lock:
+            summary = {}
+            for name, (count, total) in self.runs.items():
+                summary[name + "_runs"] = count
+                summary[name + "_ms"] = round(1000 * total / count, 3)
+            return summary
+
+
+@st.cache_resource(show_spinner=False)
+def run_stats():
+    return RunStats()
+
+
+# Tudo o que muda o HTML final: constantes, código do jogo, modo dos recursos
+# e o estado dos arquivos de som/. É a chave do bundle compartilhado.
+def bundle_key(static_assets, stamps):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([GAME_CONFIG, static_assets, stamps], sort_keys=True).encode())
+    digest.update(GAME_CSS.encode())
+    digest.update(GAME_JS.encode())
+    return digest.hexdigest()
+
+
+# O HTML do jogo é igual para todas as sessões: montado uma vez por processo
+# (e de novo só quando a chave muda) e compartilhado, só leitura, entre elas.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def build_page(key, static_assets, stamps):
+    start = time.perf_counter()
+    store = asset_store(stamps)
+    sound_data = "" if static_assets else (
+        "<script type='application/json' id='" + SOUND_DATA_ID + "'>"
+        + json.dumps(inline_sounds(store)) + "</script>"
+    )
+    html = (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><style>" + GAME_CSS + "</style></head>"
+        "<body><div id='wrap'>"
+        "<canvas id='gameCanvas' tabindex='0'></canvas>"
+        "<div id='controls'>"
+        "<button id='muteBtn' type='button' aria-label='Ativar ou desativar o som'>🔊 Som</button>"
+        "</div>"
+        "</div>"
+        + sound_data +
+        "<script>window.__BREAKOUT_CFG__ = " + json.dumps(page_config(static_assets, store)) + ";</script>"
+        "<script>" + GAME_JS + "</script>"
+        "</body></html>"
+    )
+    bundle_stats().record(True, time.perf_counter() - start)
+    return html
+
+
+def breakout_page():
+    start = time.perf_counter()
+    static_assets = use_static_assets()
+    stamps = asset_stamps()
+    report_asset_errors(asset_store(stamps))
+    stats = bundle_stats()
+    stats.begin()
+    html = build_page(bundle_key(static_assets, stamps), static_assets, stamps)
+    elapsed = time.perf_counter() - start
+    if stats.built():
+        logger.info("Bundle do jogo montado em %.1f ms (%d bytes)", 1000 * elapsed, len(html))
+    else:
+        stats.record(False, elapsed)
+        logger.debug("Bundle do jogo do cache em %.3f ms (%s)", 1000 * elapsed, stats.summary())
+    return html
+
+
+breakout_html = breakout_page()
 
 # Renderiza o jogo
 components.html(breakout_html, height=WINDOW_HEIGHT + 60, scrolling=False)
 
-# Canal de celebração: os balões são um recurso do Streamlit, não do canvas, e só
-# podem ser disparados a partir do Python. O jogo, dentro do iframe, clica neste
-# botão (escondido via CSS) ao concluir um nível ou zerar o jogo. O rerun que isso
-# provoca não recarrega o iframe, então a partida em andamento é preservada.
-if st.button("celebrar", key="celebrate"):
-    st.balloons()
+
+# Placar do servidor: uma instância por processo, compartilhada entre sessões
+@st.cache_resource(show_spinner=False)
+def leaderboard():
+    return Leaderboard(verify_interval=LEADERBOARD_VERIFY_INTERVAL, verify_workers=LEADERBOARD_VERIFY_WORKERS)
+
+
+def player_name():
+    return st.session_state.get("player", "").strip()[:20] or "Anônimo"
+
+
+# Fim de partida vindo do jogo. Pontos, nível e resultado saem do replay, não
+# de campos soltos, mas aqui o replay só é lido, não refeito (uma partida
+# longa leva segundos): o placar entra "a conferir" e só é comprovado quando
+# a conferência em segundo plano do Leaderboard refaz a partida. Se não
+# bater, sai do placar.
+def submit_score(event):
+    try:
+        replay = decode(event["replay"])
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning("Placar recusado: %s", e)
+        return None
+    return leaderboard().submit(player_name(), replay.score, replay.level, replay.victory, event["replay"])
+
+
+# Telemetria do jogo: uma thread por processo grava os lotes de todas as sessões
+@st.cache_resource(show_spinner=False)
+def telemetry():
+    return TelemetryStore()
+
+
+# Canal do jogo e placar num fragmento: um evento do jogo (ou trocar o nome)
+# reexecuta só este trecho, sem passar de novo por assets, bundle e iframe do
+# jogo. Os eventos de um mesmo frame chegam juntos, num único rerun.
+@st.fragment
+def game_events():
+    start = time.perf_counter()
+    celebrate = False
+    pending_scores = []
+    for event in receive():
+        kind = event.get("type")
+        if kind in ("levelComplete", "victory"):
+            celebrate = True
+        elif kind == "score":
+            pending_scores.append(submit_score(event))
+        elif kind == "telemetry":
+            if TELEMETRY_ENABLED:
+                telemetry().submit(event)
+        else:
+            logger.warning("Evento desconhecido do jogo: %r", kind)
+    # Os balões são um recurso do Streamlit, não do canvas
+    if celebrate:
+        st.balloons()
+    # Espera (pouco) o lote ser gravado, para o placar abaixo já trazer a partida
+    for done in pending_scores:
+        if done:
+            done.wait(timeout=1.0)
+
+    with st.expander("🏆 Placar", expanded=False):
+        st.text_input("Seu nome no placar", key="player", max_chars=20, placeholder="Anônimo")
+        board = leaderboard()
+        top = board.top(LEADERBOARD_SIZE)
+        if top:
+            st.table([
+                {"Jogador": row["player"], "Pontos": row["score"],
+                 "Nível": "🏆" if row["victory"] else row["level"],
+                 "Replay": "✔" if row["verified"] else "⏳"}
+                for row in top
+            ])
+            if not all(row["verified"] for row in top):
+                st.caption("⏳ replay ainda não conferido pelo servidor")
+        else:
+            st.caption("Nenhuma partida no placar ainda.")
+        best = board.best(player_name())
+        if best is not None:
+            st.caption(f"Seu recorde: {best} pontos")
+    run_stats().record("fragment", time.perf_counter() - start)
+
+
+game_events()
 
 st.markdown("""
 <div style="text-align: center;">
@@ -903,12 +3225,8 @@ st.markdown("""
         height: auto !important;
         flex-basis: auto !important;
     }
-    /* Botão do canal de celebração: precisa existir e ser clicável pelo JS do
-       jogo, mas nunca aparecer. Fica fora da tela em vez de display:none, que
-       impediria o clique. */
-    div[data-testid="stElementContainer"]:has(div[data-testid="stButton"]) {
-        position: absolute;
-        left: -9999px;
+    /* Canal de eventos do jogo (channel.py): componente sem conteúdo visível */
+    div[data-testid="stElementContainer"]:has(iframe[title$="breakout_channel"]) {
         height: 0 !important;
         flex-basis: 0 !important;
     }
@@ -933,3 +3251,21 @@ st.markdown("""
     }
 </style>
 """, unsafe_allow_html=True)
+
+run_stats().record("script", time.perf_counter() - script_start)
+
+# Relatório de memória do servidor, só com ?debug=memoria na URL. Fica no fim
+# da página para não mudar a posição do iframe entre um rerun e outro.
+if st.query_params.get("debug") == "memoria":
+    report = memory_report({
+        "assets_kb": asset_store(asset_stamps()).nbytes(),
+        "bundle_kb": len(breakout_html),
+    })
+    report["bundle"] = bundle_stats().summary()
+    report["leaderboard"] = dict(leaderboard().stats)
+    if TELEMETRY_ENABLED:
+        report["telemetry"] = dict(telemetry().stats)
+    report["reruns"] = run_stats().summary()
+    logger.info("Memória: %s", report)
+    with st.expander("Memória do servidor", expanded=True):
+        st.json(report)
@@ -0,0 +1,268 @@
+import argparse
+import atexit
+import logging
+import multiprocessing
+import queue
+import sqlite3
+import threading
+import time
+
+from config import LEADERBOARD_DB, LEADERBOARD_SIZE, LEADERBOARD_TTL
+
+logger = logging.getLogger(__name__)
+
+# Placar compartilhado por todas as sessões do processo, em SQLite.
+#
+# - WAL: leitores não bloqueiam o escritor nem uns aos outros.
+# - Escrita: só uma thread escreve. As sessões só enfileiram o resultado, e a
+#   thread junta o que chegou em poucos milissegundos num único INSERT em
+#   lote, numa única transação. Centenas de fins de partida simultâneos viram
+#   poucos commits.
+# - Leitura: um pool fixo de conexões só leitura. Os resultados ficam em
+#   cache por alguns segundos; cada commit invalida o cache na hora.
+# - Índices: (score DESC, created) atende o top N e (player, score DESC) o
+#   recorde de cada jogador, sem varrer a tabela.
+# - Conferência: o placar entra com os números que o replay declara e fica
+#   "a conferir" (verified NULL) até uma thread refazer a partida com
+#   replay.py, em outros processos, a cada verify_interval segundos.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    victory INTEGER NOT NULL,
+    created REAL NOT NULL,
+    replay TEXT,
+    verified INTEGER            -- NULL até replay.py conferir; depois 1 ou 0
+);
+CREATE INDEX IF NOT EXISTS scores_rank ON scores (score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_player ON scores (player, score DESC);
+"""
+
+# Placares reprovados na conferência do replay (verified = 0) não aparecem;
+# os ainda não conferidos (NULL) aparecem marcados
+TOP_SQL = (
+    "SELECT player, score, level, victory, verified FROM scores WHERE verified IS NOT 0 "
+    "ORDER BY score DESC, created LIMIT ?"
+)
+BEST_SQL = "SELECT MAX(score) FROM scores WHERE player = ? AND verified IS NOT 0"
+INSERT_SQL = (
+    "INSERT INTO scores (player, score, level, victory, created, replay) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+# Replays conferidos por rodada da thread de conferência
+VERIFY_BATCH = 256
+
+
+class Leaderboard:
+    def __init__(self, path=LEADERBOARD_DB, readers=4, ttl=LEADERBOARD_TTL,
+                 batch_delay=0.05, batch_max=500, verify_interval=0, verify_workers=1):
+        self.path = path
+        self.ttl = ttl
+        self.batch_delay = batch_delay
+        self.batch_max = batch_max
+
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        self._readers = queue.Queue()
+        for _ in range(readers):
+            conn = self._connect()
+            conn.execute("PRAGMA query_only = ON")
+            self._readers.put(conn)
+
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.version = 0
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "cache_hits": 0, "queries": 0}
+
+        self._pending = queue.Queue()
+        self._thread = threading.Thread(target=self._write_loop, name="leaderboard-writer", daemon=True)
+        self._thread.start()
+
+        # Conferência em segundo plano (desligada com verify_interval=0)
+        self.verify_interval = verify_interval
+        self.verify_workers = verify_workers
+        self._closing = threading.Event()
+        self._verifier = None
+        if verify_interval > 0:
+            self._verifier = threading.Thread(target=self._verify_loop, name="leaderboard-verifier", daemon=True)
+            self._verifier.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        # check_same_thread=False: cada conexão é usada por uma thread de cada
+        # vez (o pool e a thread de escrita garantem isso), mas não sempre a
+        # mesma, já que o Streamlit roda cada rerun numa thread.
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    # ---------- escrita ----------
+
+    # Enfileira um resultado. O evento devolvido fica pronto quando o lote
+    # que o contém foi gravado, para quem quiser mostrar o placar já com ele.
+    def submit(self, player, score, level, victory, replay=None):
+        done = threading.Event()
+        row = (player, int(score), int(level), int(bool(victory)), time.time(), replay)
+        self._pending.put((row, done))
+        with self._lock:
+            self.stats["queued"] += 1
+        return done
+
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.batch_delay
+            while len(batch) < self.batch_max:
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        try:
+            with self._writer:
+                self._writer.executemany(INSERT_SQL, [row for row, _ in batch])
+        except sqlite3.Error as e:
+            logger.error("Falha ao gravar %d placares: %s", len(batch), e)
+        else:
+            with self._lock:
+                self.version += 1
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+        for _, done in batch:
+            done.set()
+
+    # Espera a fila esvaziar e encerra a thread de escrita
+    def close(self):
+        self._closing.set()
+        if not self._thread.is_alive():
+            return
+        self._pending.put(None)
+        self._thread.join(timeout=10)
+        self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+    # ---------- leitura ----------
+
+    def _query(self, sql, args):
+        key = (sql, args)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > now and entry[1] == self.version:
+                self.stats["cache_hits"] += 1
+                return entry[2]
+            version = self.version
+            self.stats["queries"] += 1
+        conn = self._readers.get()
+        try:
+            rows = conn.execute(sql, args).fetchall()
+        finally:
+            self._readers.put(conn)
+        with self._lock:
+            # Um recorde por jogador consultado: descarta os vencidos de vez em quando
+            if len(self._cache) > 1024:
+                self._cache = {k: v for k, v in self._cache.items() if v[0] > now and v[1] == self.version}
+            self._cache[key] = (now + self.ttl, version, rows)
+        return rows
+
+    def top(self, limit=LEADERBOARD_SIZE):
+        return [
+            {"player": player, "score": score, "level": level, "victory": bool(victory),
+             "verified": verified == 1}
+            for player, score, level, victory, verified in self._query(TOP_SQL, (limit,))
+        ]
+
+    def best(self, player):
+        return self._query(BEST_SQL, (player,))[0][0]
+
+    # ---------- conferência ----------
+
+    # Confere com replay.py os placares ainda não conferidos, os mais
+    # antigos primeiro (até limit deles). Além de a partida bater com o
+    # replay, o replay tem que declarar os números gravados na linha.
+    def verify_pending(self, workers=None, limit=None, context=None):
+        from replay import decode, verify_many
+
+        def claims(text):
+            try:
+                replay = decode(text)
+            except ValueError:
+                return None
+            return replay.score, replay.level, int(bool(replay.victory))
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, replay, score, level, victory FROM scores "
+                "WHERE verified IS NULL AND replay IS NOT NULL ORDER BY id LIMIT ?",
+                (-1 if limit is None else limit,),
+            ).fetchall()
+            ok = verify_many([row[1] for row in rows], workers, context=context) if rows else []
+            ok = [valid and claims(replay) == (score, level, victory)
+                  for (_, replay, score, level, victory), valid in zip(rows, ok)]
+            with conn:
+                conn.executemany(
+                    "UPDATE scores SET verified = ? WHERE id = ?",
+                    [(int(valid), row[0]) for row, valid in zip(rows, ok)],
+                )
+        finally:
+            conn.close()
+        if rows:
+            with self._lock:
+                self.version += 1
+        return sum(ok), len(rows)
+
+    # Uma partida longa leva segundos para ser refeita: a conferência roda
+    # em processos à parte (spawn, não fork: este processo tem threads), e a
+    # thread só espera por eles.
+    def _verify_loop(self):
+        context = multiprocessing.get_context("spawn")
+        while not self._closing.wait(self.verify_interval):
+            try:
+                valid, total = self.verify_pending(self.verify_workers, VERIFY_BATCH, context)
+            except Exception:
+                logger.exception("Falha na conferência dos replays do placar")
+                continue
+            if total:
+                logger.info("Replays do placar conferidos: %d de %d aprovados", valid, total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Placar do Breakout")
+    parser.add_argument("--db", default=LEADERBOARD_DB)
+    parser.add_argument("--top", type=int, default=LEADERBOARD_SIZE)
+    parser.add_argument("--verify", action="store_true",
+                        help="confere os replays dos placares ainda não conferidos")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    board = Leaderboard(args.db)
+    if args.verify:
+        valid, total = board.verify_pending(args.workers)
+        print(f"{valid}/{total} replays conferem")
+    for position, row in enumerate(board.top(args.top), start=1):
+        print(f"{position:>3}. {row['player']:<20} {row['score']:>7}  nível {row['level']}"
+              + ("  🏆" if row["victory"] else "") + ("" if row["verified"] else "  ⏳ a conferir"))
+    board.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+import argparse
+import base64
+import gc
+import gzip
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+# Teste de carga do app: N sessões simuladas do game.py com o AppTest do
+# Streamlit, todas no mesmo processo (e com os mesmos cache_resource), como
+# num servidor de verdade. Cada sessão faz a execução inicial e depois reruns
+# de três tipos:
+#
+# - "rerun": execução sem evento novo (trocar o nome, clicar na página);
+# - "event": fim de nível vindo do canal do jogo, que solta os balões;
+# - "score": fim de partida com replay, gravado no placar, mais um lote de
+#   telemetria.
+#
+# Mede a latência de cada tipo (percentis), o tamanho do que o script manda
+# ao navegador (iframe do jogo e o resto da página) e quanto a memória
+# residente cresce por sessão aberta. O relatório sai em JSON e é conferido
+# contra THRESHOLDS e, se houver, contra um relatório anterior (--baseline).
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(APP_DIR, "game.py")
+REPORT_VERSION = 1
+
+# Limites absolutos: passar de um deles é regressão
+THRESHOLDS = {
+    "first_run_p95_ms": 3000.0,
+    "rerun_p95_ms": 400.0,
+    "event_p95_ms": 400.0,
+    "score_p95_ms": 1500.0,
+    "iframe_bytes": 160 * 1024,
+    "page_bytes": 200 * 1024,
+    "rss_per_session_mb": 8.0,
+}
+
+# Com --baseline, quanto cada número pode piorar em relação ao anterior
+TOLERANCE = 0.25
+
+# Diferenças menores que estas são ruído de medição, não regressão
+SLACK = {"ms": 20.0, "bytes": 256, "mb": 0.5}
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+
+    def at(q):
+        return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+    return {
+        "n": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": at(0.50),
+        "p90": at(0.90),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": round(values[-1], 3),
+    }
+
+
+# Partidas de verdade para os eventos "score": o placar confere o replay
+def sample_replays(count):
+    from replay import encode, record_games
+
+    replays = record_games(count * 2, max_ticks=60 * 60 * 5, aim_error=120.0, seed=1)
+    if not replays:
+        raise RuntimeError("O jogador automático não encerrou nenhuma partida")
+    return [encode(r) for r in replays[:count]]
+
+
+# Lote de telemetria no formato do Telemetry do GAME_JS
+def telemetry_batch(session, seq):
+    events = [[1000.0 + i, 1, 1, 10.0, 2.0, 3.0] for i in range(40)]
+    events.append([2000.0, 6, 1, 4.2, 300.0, 0.0])
+    data = gzip.compress(json.dumps({"v": 1, "session": session, "seq": seq, "dropped": 0, "events": events}).encode())
+    return {"type": "telemetry", "encoding": "gzip", "data": base64.b64encode(data).decode()}
+
+
+# Bytes que a execução manda ao navegador: o HTML do iframe do jogo e a
+# soma de todos os elementos da página (inclusive o iframe)
+def page_bytes(at):
+    iframe = sum(len(node.proto.srcdoc) for node in at.get("iframe"))
+    total = 0
+    stack = [at._tree]
+    while stack:
+        node = stack.pop()
+        proto = getattr(node, "proto", None)
+        if proto is not None:
+            total += proto.ByteSize()
+        children = getattr(node, "children", None)
+        if children:
+            stack.extend(children.values())
+    return iframe, total
+
+
+# Partes do HTML do jogo, para saber o que cresceu quando o iframe cresce
+def iframe_parts(at):
+    html = at.get("iframe")[0].proto.srcdoc
+    parts = {"total": len(html)}
+    marker = "window.__BREAKOUT_CFG__ = "
+    start = html.find(marker)
+    if start >= 0:
+        end = html.find(";</script>", start)
+        parts["config"] = end - start - len(marker)
+        script = html.find("<script>", end)
+        parts["game_js"] = html.find("</script>", script) - script - len("<script>")
+    sounds = html.find("type='application/json'")
+    if sounds >= 0:
+        parts["inline_sounds"] = html.find("</script>", sounds) - sounds
+    return parts
+
+
+class Session:
+    def __init__(self, index, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = index
+        self.token = f"loadtest-{index}"
+        self.seq = 0
+        self.at = AppTest.from_file(APP_FILE, default_timeout=timeout)
+        self.times = {"first_run": [], "rerun": [], "event": [], "score": []}
+        self.errors = []
+
+    def run(self, kind):
+        start = time.perf_counter()
+        self.at.run()
+        self.times[kind].append(1000 * (time.perf_counter() - start))
+        if self.at.exception:
+            self.errors.append(f"{kind}: {self.at.exception[0].message}")
+
+    # Os eventos chegam como valor do componente do canal, do mesmo jeito
+    # que o channel_frontend os manda
+    def send(self, kind, events):
+        for event in events:
+            self.seq += 1
+            event["seq"] = self.seq
+        self.at.session_state["breakout_channel"] = {"token": self.token, "events": events}
+        self.run(kind)
+
+    # Uma rodada: rerun sem evento, fim de nível e fim de partida
+    def play_round(self, i, replays):
+        self.run("rerun")
+        self.send("event", [{"type": "levelComplete", "level": 1 + i % 5, "score": 100 * (i + 1)}])
+        self.send("score", [
+            {"type": "score", "replay": replays[(self.index + i) % len(replays)]},
+            telemetry_batch(self.token, i + 1),
+        ])
+
+
+def measure(sessions, reruns, timeout):
+    from memory import process_rss
+
+    replays = sample_replays(8)
+
+    # Mexer no session_state do AppTest fora de uma execução gera um aviso
+    # por rerun; aqui ele é esperado. (Filtro, não nível: o AppTest refaz os
+    # níveis dos loggers do Streamlit a cada execução.)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        lambda record: "missing ScriptRunContext" not in record.getMessage()
+    )
+
+    # Uma sessão de aquecimento fora da conta: imports, caches do processo e
+    # a montagem do bundle acontecem uma vez só
+    warmup = Session(-1, timeout)
+    warmup.run("first_run")
+    warmup.play_round(0, replays)
+    if warmup.errors:
+        raise RuntimeError("Falha no aquecimento: " + "; ".join(warmup.errors))
+    iframe, total = page_bytes(warmup.at)
+    parts = iframe_parts(warmup.at)
+    del warmup
+    gc.collect()
+    rss_start = process_rss()
+
+    # As sessões ficam vivas até o fim, como abas abertas no servidor, e se
+    # revezam rodada a rodada. O AppTest não aguenta execuções em paralelo
+    # (ele troca estado global do Streamlit), então o revezamento é numa
+    # thread só; com a GIL, o servidor de verdade não fica muito longe disso.
+    opened = [Session(i, timeout) for i in range(sessions)]
+    start = time.perf_counter()
+    for session in opened:
+        session.run("first_run")
+    for i in range(reruns):
+        for session in opened:
+            session.play_round(i, replays)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    rss_end = process_rss()
+
+    times = {kind: [] for kind in opened[0].times} if opened else {}
+    errors = []
+    for session in opened:
+        for kind, values in session.times.items():
+            times[kind].extend(values)
+        errors.extend(f"sessão {session.index}: {error}" for error in session.errors)
+
+    import streamlit
+
+    return {
+        "version": REPORT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "sessions": sessions,
+        "reruns": reruns,
+        "seconds": round(elapsed, 2),
+        "runs_per_second": round(sum(len(v) for v in times.values()) / max(elapsed, 1e-9), 1),
+        "latency_ms": {kind: percentiles(values) for kind, values in times.items()},
+        "payload": {"iframe_bytes": iframe, "page_bytes": total, "iframe_parts": parts},
+        "memory": {
+            "rss_start_mb": round(rss_start / 2**20, 1),
+            "rss_end_mb": round(rss_end / 2**20, 1),
+            "rss_per_session_mb": round((rss_end - rss_start) / 2**20 / max(1, sessions), 3),
+        },
+        "errors": errors,
+    }
+
+
+# Números conferidos: nome no relatório, unidade e como ler do relatório
+METRICS = {
+    "first_run_p95_ms": ("ms", lambda r: r["latency_ms"]["first_run"]["p95"]),
+    "rerun_p95_ms": ("ms", lambda r: r["latency_ms"]["rerun"]["p95"]),
+    "event_p95_ms": ("ms", lambda r: r["latency_ms"]["event"]["p95"]),
+    "score_p95_ms": ("ms", lambda r: r["latency_ms"]["score"]["p95"]),
+    "iframe_bytes": ("bytes", lambda r: r["payload"]["iframe_bytes"]),
+    "page_bytes": ("bytes", lambda r: r["payload"]["page_bytes"]),
+    "rss_per_session_mb": ("mb", lambda r: r["memory"]["rss_per_session_mb"]),
+}
+
+
+def metric(report, name):
+    try:
+        return METRICS[name][1](report)
+    except (KeyError, TypeError):
+        return None
+
+
+# Lista de regressões (vazia se tudo passou)
+def check(report, thresholds=THRESHOLDS, baseline=None, tolerance=TOLERANCE):
+    failures = list(report["errors"])
+    for name, limit in thresholds.items():
+        value = metric(report, name)
+        if value is not None and value > limit:
+            failures.append(f"{name} = {value} passa do limite {limit}")
+    if baseline is not None:
+        for name, (unit, _) in METRICS.items():
+            value, before = metric(report, name), metric(baseline, name)
+            if value is None or before is None:
+                continue
+            if value > before * (1 + tolerance) + SLACK[unit]:
+                failures.append(f"{name} = {value} piorou mais de {tolerance:.0%} (antes {before})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do Breakout com o AppTest do Streamlit")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--reruns", type=int, default=5, help="rodadas de reruns por sessão")
+    parser.add_argument("--timeout", type=float, default=30.0, help="segundos por execução")
+    parser.add_argument("--out", default="loadtest.json")
+    parser.add_argument("--baseline", help="relatório anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    # Placar e telemetria do teste num diretório temporário, longe dos dados
+    # do app. Precisa vir antes de qualquer import de config.
+    scratch = tempfile.mkdtemp(prefix="breakout-loadtest-")
+    os.environ.setdefault("BREAKOUT_DB", os.path.join(scratch, "leaderboard.db"))
+    os.environ.setdefault("BREAKOUT_TELEMETRY_DIR", os.path.join(scratch, "telemetry"))
+    # O app lê .streamlit/config.toml (rota estática) do diretório atual
+    os.chdir(APP_DIR)
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = measure(args.sessions, args.reruns, args.timeout)
+    report["thresholds"] = THRESHOLDS
+    report["failures"] = check(report, THRESHOLDS, baseline, args.tolerance)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{args.sessions} sessões x {args.reruns} rodadas em {report['seconds']}s "
+          f"({report['runs_per_second']} execuções/s)")
+    print("execução    n   média     p50     p95     p99  (ms)")
+    for kind, row in report["latency_ms"].items():
+        if row:
+            print(f"{kind:<9} {row['n']:>4} {row['mean']:>7.1f} {row['p50']:>7.1f} {row['p95']:>7.1f} {row['p99']:>7.1f}")
+    payload = report["payload"]
+    print(f"iframe do jogo: {payload['iframe_bytes']} bytes ({payload['iframe_parts']}); "
+          f"página: {payload['page_bytes']} bytes")
+    memory = report["memory"]
+    print(f"RSS {memory['rss_start_mb']} → {memory['rss_end_mb']} MB "
+          f"({memory['rss_per_session_mb']} MB por sessão)")
+    for failure in report["failures"]:
+        print("REGRESSÃO:", failure)
+    print(f"relatório em {args.out}")
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
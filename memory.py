@@ -0,0 +1,46 @@
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Medições de memória do processo do Streamlit, para acompanhar quanto cada
+# sessão de jogo custa de fato no servidor.
+
+
+# Memória residente atual em bytes. /proc só existe no Linux; fora dele fica
+# o pico (ru_maxrss), que é o que o resource oferece.
+def process_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS reporta em bytes, Linux em KiB
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Sessões abertas no servidor. A API do runtime é interna do Streamlit, então
+# qualquer mudança nela só desliga a contagem.
+def session_count():
+    try:
+        from streamlit.runtime import get_instance
+        return get_instance()._session_mgr.num_active_sessions()
+    except Exception:
+        return None
+
+
+def memory_report(shared):
+    rss = process_rss()
+    sessions = session_count()
+    report = {
+        "rss_mb": round(rss / 2**20, 1),
+        "sessions": sessions,
+        "rss_per_session_mb": round(rss / 2**20 / sessions, 2) if sessions else None,
+    }
+    report.update({name: round(size / 2**10, 1) for name, size in shared.items()})
+    return report
@@ -0,0 +1,455 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from config import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, BAR_WIDTH, BAR_HEIGHT, BALL_RADIUS,
+    BRICK_ROWS, BRICK_COLUMNS, BRICK_HEIGHT, BRICK_TOP, FPS,
+    MAX_LEVEL, BALL_SPEED, LEVEL_SPEED_STEP, RALLY_ACCEL, RALLY_MAX, LIVES,
+)
+
+# Motor de física headless: reproduz BreakoutGame.tick/update e as colisões
+# do GAME_JS (game.py) para N partidas independentes, guardadas como arrays
+# NumPy e avançadas todas juntas, um tick de passo fixo por chamada de step().
+# Serve para rodar balanço de dificuldade offline sem navegador. Efeitos
+# visuais e sons não existem aqui; o que importa é a mesma sequência de
+# estados, pontos e vidas. O sorteio da direção da bola usa o mesmo mulberry32
+# do JS, então a mesma semente dá a mesma partida nos dois lados.
+#
+# Qualquer mudança nas regras do JS precisa ser espelhada aqui, com as mesmas
+# operações na mesma ordem: a mesma semente e as mesmas entradas dão a mesma
+# partida bit a bit, e é isso que permite conferir replays (replay.py).
+
+# Estados do jogo (o "paused" do JS não existe: pausar é só não chamar step)
+INITIAL, PLAYING, LEVEL_COMPLETE, GAME_OVER, VICTORY = range(5)
+STATE_NAMES = ("initial", "playing", "levelComplete", "gameOver", "victory")
+
+W = WINDOW_WIDTH
+H = WINDOW_HEIGHT
+R = BALL_RADIUS
+BAR_Y = H - BAR_HEIGHT - 10
+STEP = 1 / FPS
+MAX_HITS = 16
+
+
+# Seno e cosseno por série de Taylor, como exactSin/exactCos no JS: np.sin e
+# Math.sin podem diferir no último bit, a série calculada igual não.
+def _series_terms(count=22):
+    sin_terms, cos_terms = [], []
+    fact = 1.0
+    for n in range(count):
+        if n:
+            fact *= n
+        (sin_terms if n % 2 else cos_terms).append((1.0 if n % 4 < 2 else -1.0) / fact)
+    return sin_terms, cos_terms
+
+
+SIN_TERMS, COS_TERMS = _series_terms()
+
+
+def _taylor(terms, x2):
+    total = terms[-1]
+    for term in terms[-2::-1]:
+        total = total * x2 + term
+    return total
+
+
+def exact_sin(x):
+    return x * _taylor(SIN_TERMS, x * x)
+
+
+def exact_cos(x):
+    return _taylor(COS_TERMS, x * x)
+
+
+# mulberry32 vetorizado: state é um array uint32 por partida, avançado no
+# lugar. Retorna floats em [0, 1) bit a bit iguais aos do JS.
+def mulberry32(state, idx):
+    a = state[idx] + np.uint32(0x6D2B79F5)
+    state[idx] = a
+    t = (a ^ (a >> np.uint32(15))) * (a | np.uint32(1))
+    t = (t + (t ^ (t >> np.uint32(7))) * (t | np.uint32(61))) ^ t
+    return (t ^ (t >> np.uint32(14))) / 4294967296.0
+
+
+class BreakoutBatch:
+    # Os parâmetros de dificuldade aceitam escalar ou array de tamanho n, para
+    # comparar várias configurações no mesmo lote.
+    def __init__(self, n, ball_speed=BALL_SPEED, level_speed_step=LEVEL_SPEED_STEP,
+                 rally_accel=RALLY_ACCEL, rally_max=RALLY_MAX, lives=LIVES,
+                 max_level=MAX_LEVEL, rows=BRICK_ROWS, columns=BRICK_COLUMNS,
+                 seed=None):
+        self.n = n
+        self.rows = rows
+        self.columns = columns
+        self.brick_w = W // columns
+        # Gerador do NumPy só para sortear sementes e para os jogadores
+        # automáticos; a física usa o mulberry32 de cada partida (rng_state).
+        self.rng = np.random.default_rng(seed)
+        self.seed = np.zeros(n, dtype=np.uint32)
+        self.rng_state = np.zeros(n, dtype=np.uint32)
+
+        self.ball_speed = self._param(ball_speed)
+        self.level_speed_step = self._param(level_speed_step)
+        self.rally_accel = self._param(rally_accel)
+        self.rally_max = self._param(rally_max)
+        self.start_lives = self._param(lives, np.int32)
+        self.max_level = self._param(max_level, np.int32)
+
+        self.ball_x = np.zeros(n)
+        self.ball_y = np.zeros(n)
+        self.vx = np.zeros(n)
+        self.vy = np.zeros(n)
+        self.speed = np.zeros(n)
+        self.max_speed = np.zeros(n)
+        self.bar_x = np.zeros(n)
+        self.stuck = np.ones(n, dtype=bool)
+        self.state = np.zeros(n, dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.lives = np.zeros(n, dtype=np.int32)
+        self.level = np.zeros(n, dtype=np.int32)
+        self.hits = np.zeros((n, rows, columns), dtype=np.uint8)
+        self.bricks_left = np.zeros(n, dtype=np.int32)
+
+        # Contadores para as análises de balanço
+        self.frames = np.zeros(n, dtype=np.int64)
+        self.paddle_hits = np.zeros(n, dtype=np.int64)
+        self.bricks_broken = np.zeros(n, dtype=np.int64)
+        self.lives_lost = np.zeros(n, dtype=np.int64)
+
+        # Geometria fixa da grade, igual à de createBricks
+        self._brick_x = np.arange(columns) * self.brick_w + 1.0
+        self._brick_y = np.arange(rows) * BRICK_HEIGHT + float(BRICK_TOP)
+        self._brick_width = self.brick_w - 2.0
+        self._brick_height = BRICK_HEIGHT - 2.0
+        self._bricks_bottom = self._brick_y[-1] + self._brick_height
+
+        self.reset()
+
+    def _param(self, value, dtype=np.float64):
+        return np.broadcast_to(np.asarray(value, dtype=dtype), (self.n,)).copy()
+
+    def _indices(self, mask):
+        if mask is None:
+            return np.arange(self.n)
+        mask = np.asarray(mask)
+        return np.flatnonzero(mask) if mask.dtype == bool else mask
+
+    # ---------- estado ----------
+
+    # Equivalente a resetGame. Sem seeds, cada partida sorteia a sua.
+    def reset(self, mask=None, seeds=None):
+        idx = self._indices(mask)
+        if seeds is None:
+            seeds = self.rng.integers(0, 2**32, idx.size, dtype=np.uint32)
+        self.seed[idx] = seeds
+        self.rng_state[idx] = seeds
+        self.score[idx] = 0
+        self.lives[idx] = self.start_lives[idx]
+        self.level[idx] = 1
+        self.state[idx] = INITIAL
+        self.bar_x[idx] = W / 2 - BAR_WIDTH / 2
+        self._start_level(idx)
+
+    def _start_level(self, idx):
+        self._create_bricks(idx)
+        self._reset_ball(idx)
+
+    def _reset_ball(self, idx):
+        speed = self.ball_speed[idx] * (1 + self.level_speed_step[idx] * (self.level[idx] - 1))
+        self.speed[idx] = speed
+        self.max_speed[idx] = speed * self.rally_max[idx]
+        direction = np.where(mulberry32(self.rng_state, idx) < 0.5, -1.0, 1.0)
+        self.vx[idx] = direction * speed * math.sqrt(0.5)
+        self.vy[idx] = -speed * math.sqrt(0.5)
+        self.ball_x[idx] = self.bar_x[idx] + BAR_WIDTH / 2
+        self.ball_y[idx] = BAR_Y - R
+        self.stuck[idx] = True
+
+    def _create_bricks(self, idx):
+        # A partir do nível 2 as fileiras de cima passam a exigir 2 acertos.
+        tough_rows = np.clip(self.level[idx] - 1, 0, 3)
+        rows = np.arange(self.rows)[None, :, None]
+        self.hits[idx] = np.where(rows < tough_rows[:, None, None], 2, 1)
+        self.bricks_left[idx] = self.rows * self.columns
+
+    # ---------- entrada ----------
+
+    # Equivalente a applyPointer: NaN significa "sem ponteiro" naquela partida.
+    # A barra anda em pixels inteiros, como no JS.
+    def set_paddle(self, pointer_x):
+        pointer_x = np.broadcast_to(np.asarray(pointer_x, dtype=np.float64), (self.n,))
+        with np.errstate(invalid="ignore"):
+            target = np.maximum(0, np.minimum(W - BAR_WIDTH, np.floor(pointer_x - BAR_WIDTH / 2 + 0.5)))
+        self.bar_x = np.where(np.isnan(pointer_x), self.bar_x, target)
+
+    # Posição da barra já resolvida, como gravada num replay, para as partidas
+    # de mask. Valores fora da tela são limitados como no applyPointer.
+    def set_bar(self, bar_x, mask=None):
+        idx = self._indices(mask)
+        self.bar_x[idx] = np.clip(bar_x, 0, W - BAR_WIDTH)
+
+    # Equivalente a handleAction (clique, toque ou Espaço).
+    def action(self, mask=None):
+        idx = self._indices(mask)
+        state = self.state[idx]
+        launch = idx[(state == INITIAL) | (state == PLAYING)]
+        next_level = idx[state == LEVEL_COMPLETE]
+        restart = idx[(state == GAME_OVER) | (state == VICTORY)]
+
+        self.state[launch] = PLAYING
+        self.stuck[launch] = False
+        if next_level.size:
+            self.level[next_level] += 1
+            self._start_level(next_level)
+            self.state[next_level] = PLAYING
+        if restart.size:
+            self.reset(restart)
+
+    # ---------- loop ----------
+
+    # Avança um tick de passo fixo. No tick() do JS a ação pendente e o
+    # ponteiro são aplicados antes da física: chame action() e set_paddle()
+    # nessa ordem antes de step().
+    def step(self):
+        playing = self.state == PLAYING
+        self.frames[playing] += 1
+
+        stuck = np.flatnonzero(playing & self.stuck)
+        self.ball_x[stuck] = self.bar_x[stuck] + BAR_WIDTH / 2
+        self.ball_y[stuck] = BAR_Y - R
+
+        idx = np.flatnonzero(playing & ~self.stuck)
+        if not idx.size:
+            return
+
+        # Colisão contínua, como update(): acha o instante do próximo impacto
+        # no tick, avança até ele, resolve e repete com o tempo que sobrou.
+        # Em empate de tempo vale a ordem das colunas (paredes em X, paredes
+        # em Y, barra, tijolo), a mesma dos testes no JS.
+        frame_scale = STEP * FPS
+        remaining = np.ones(idx.size)
+        for _ in range(MAX_HITS):
+            x = self.ball_x[idx]
+            y = self.ball_y[idx]
+            dx = self.vx[idx] * frame_scale
+            dy = self.vy[idx] * frame_scale
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                wall_x = np.where(dx < 0, np.maximum(0, (R - x) / dx),
+                                  np.where(dx > 0, np.maximum(0, (W - R - x) / dx), np.inf))
+                wall_y = np.where(dy < 0, np.maximum(0, (R - y) / dy),
+                                  np.where(dy > 0, np.maximum(0, (H - R - y) / dy), np.inf))
+            paddle = self._sweep_paddle(idx, x, y, dx, dy)
+            # Só quem pode alcançar a faixa dos tijolos neste tick faz a varredura
+            brick = np.full(idx.size, -1)
+            brick_t = np.full(idx.size, np.inf)
+            brick_axis_x = np.zeros(idx.size, dtype=bool)
+            near = np.flatnonzero(np.minimum(y, y + dy * remaining) - R <= self._bricks_bottom)
+            if near.size:
+                brick[near], brick_t[near], brick_axis_x[near] = self._sweep_bricks(
+                    idx[near], x[near], y[near], dx[near], dy[near], remaining[near]
+                )
+            times = np.stack([wall_x, wall_y, paddle, brick_t], axis=1)
+            event = np.argmin(times, axis=1)
+            t = times[np.arange(idx.size), event]
+
+            free = t > remaining
+            t = np.where(free, remaining, t)
+            self.ball_x[idx] = x + dx * t
+            self.ball_y[idx] = y + dy * t
+            remaining = remaining - t
+
+            keep = ~free
+            hit = np.flatnonzero(keep & (event == 0))
+            games = idx[hit]
+            self.ball_x[games] = np.where(dx[hit] < 0, R, W - R)
+            self.vx[games] = np.where(dx[hit] < 0, np.abs(self.vx[games]), -np.abs(self.vx[games]))
+
+            hit = np.flatnonzero(keep & (event == 1))
+            top = dy[hit] < 0
+            games = idx[hit[top]]
+            self.ball_y[games] = R
+            self.vy[games] = np.abs(self.vy[games])
+            lost = hit[~top]
+            self._lose_life(idx[lost])
+            keep[lost] = False
+
+            self._hit_paddle(idx[keep & (event == 2)])
+
+            hit = np.flatnonzero(keep & (event == 3))
+            cleared = self._hit_brick(idx[hit], brick[hit], brick_axis_x[hit])
+            keep[hit[cleared]] = False
+
+            idx, remaining = idx[keep], remaining[keep]
+            if not idx.size:
+                break
+
+    def _lose_life(self, idx):
+        self.lives[idx] -= 1
+        self.lives_lost[idx] += 1
+        over = self.lives[idx] <= 0
+        self.state[idx[over]] = GAME_OVER
+        self._reset_ball(idx[~over])
+
+    # Colisão com a barra (apenas com a bola descendo, considerando o raio),
+    # como sweepPaddle: bola já sobreposta bate em t = 0.
+    def _sweep_paddle(self, idx, x, y, dx, dy):
+        left = self.bar_x[idx] - R
+        right = self.bar_x[idx] + BAR_WIDTH + R
+        top = BAR_Y - R
+        bottom = BAR_Y + BAR_HEIGHT + R
+        overlap = (x >= left) & (x <= right) & (y >= top) & (y <= bottom)
+        t, _ = sweep_box(x, y, dx, dy, left, top, right, bottom)
+        t = np.where(overlap, 0.0, t)
+        return np.where(dy > 0, t, np.inf)
+
+    def _hit_paddle(self, idx):
+        if not idx.size:
+            return
+        hit_pos = np.clip((self.ball_x[idx] - self.bar_x[idx]) / BAR_WIDTH, 0, 1)
+        speed = np.minimum(self.speed[idx] * self.rally_accel[idx], self.max_speed[idx])
+        angle = (hit_pos - 0.5) * math.pi * 0.8
+        self.speed[idx] = speed
+        self.vx[idx] = exact_sin(angle) * speed
+        self.vy[idx] = -exact_cos(angle) * speed
+        self.ball_y[idx] = BAR_Y - R
+        self.paddle_hits[idx] += 1
+
+    # Primeiro tijolo vivo varrido dentro do tempo que resta, como
+    # sweepBricks: menor instante, e em empate o de maior índice. A janela de
+    # células cobre o maior deslocamento possível num tick; retorna a célula
+    # (-1 se nenhuma), o instante (inf se nenhum) e se a entrada foi lateral.
+    def _sweep_bricks(self, idx, x, y, dx, dy, remaining):
+        span_x = np.minimum(x, x + dx * remaining) - R
+        span_y = np.minimum(y, y + dy * remaining) - R
+        reach = np.abs(np.concatenate([dx, dy])).max(initial=0.0) + 2 * R
+        window_rows = np.arange(int(reach // BRICK_HEIGHT) + 2)
+        window_cols = np.arange(int(reach // self.brick_w) + 2)
+        rows = np.floor((span_y - BRICK_TOP) / BRICK_HEIGHT).astype(np.intp)[:, None] + window_rows
+        cols = np.floor(span_x / self.brick_w).astype(np.intp)[:, None] + window_cols
+        valid = (
+            ((rows >= 0) & (rows < self.rows))[:, :, None] &
+            ((cols >= 0) & (cols < self.columns))[:, None, :]
+        )
+        rows = np.clip(rows, 0, self.rows - 1)
+        cols = np.clip(cols, 0, self.columns - 1)
+        valid &= self.hits[idx[:, None, None], rows[:, :, None], cols[:, None, :]] > 0
+
+        left = (self._brick_x[cols] - R)[:, None, :]
+        top = (self._brick_y[rows] - R)[:, :, None]
+        t, axis_x = sweep_box(
+            x[:, None, None], y[:, None, None], dx[:, None, None], dy[:, None, None],
+            left, top, left + self._brick_width + 2 * R, top + self._brick_height + 2 * R,
+        )
+        t = np.where(valid & (t <= remaining[:, None, None]), t, np.inf).reshape(idx.size, -1)
+        cells = (rows[:, :, None] * self.columns + cols[:, None, :]).reshape(idx.size, -1)
+        axis_x = axis_x.reshape(idx.size, -1)
+
+        best_t = t.min(axis=1, initial=np.inf)
+        tied = np.where(t == best_t[:, None], cells, -1)
+        pick = np.argmax(tied, axis=1)
+        rows_i = np.arange(idx.size)
+        cell = np.where(np.isinf(best_t), -1, tied[rows_i, pick])
+        return cell, best_t, axis_x[rows_i, pick]
+
+    # Retorna quem zerou o nível, como hitBrick.
+    def _hit_brick(self, games, cell, axis_x):
+        if not games.size:
+            return np.zeros(0, dtype=bool)
+        row, col = np.divmod(cell, self.columns)
+        left = self._brick_x[col] - R
+        top = self._brick_y[row] - R
+
+        # Rebate no eixo por onde a bola entrou, encostando na face atingida
+        vx = self.vx[games]
+        vy = self.vy[games]
+        self.ball_x[games] = np.where(
+            axis_x, np.where(vx > 0, left, left + self._brick_width + 2 * R), self.ball_x[games]
+        )
+        self.ball_y[games] = np.where(
+            axis_x, self.ball_y[games], np.where(vy > 0, top, top + self._brick_height + 2 * R)
+        )
+        self.vx[games] = np.where(axis_x, -vx, vx)
+        self.vy[games] = np.where(axis_x, vy, -vy)
+
+        self.hits[games, row, col] -= 1
+        broken = self.hits[games, row, col] == 0
+        self.score[games] += np.where(broken, 10, 5)
+        self.bricks_left[games] -= broken
+        self.bricks_broken[games] += broken
+
+        done = self.bricks_left[games] == 0
+        finished = games[done]
+        self.state[finished] = np.where(
+            self.level[finished] >= self.max_level[finished], VICTORY, LEVEL_COMPLETE
+        )
+        return done
+
+
+# Versão vetorizada de sweepBox (slabs de um ponto contra caixas expandidas
+# pelo raio): instante de entrada (inf se não bate) e se entrou pelas laterais.
+def sweep_box(x, y, dx, dy, left, top, right, bottom):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tx1 = (left - x) / dx
+        tx2 = (right - x) / dx
+        ty1 = (top - y) / dy
+        ty2 = (bottom - y) / dy
+    inside_x = (x >= left) & (x <= right)
+    inside_y = (y >= top) & (y <= bottom)
+    enter_x = np.where(dx != 0, np.minimum(tx1, tx2), np.where(inside_x, -np.inf, np.inf))
+    exit_x = np.where(dx != 0, np.maximum(tx1, tx2), np.where(inside_x, np.inf, -np.inf))
+    enter_y = np.where(dy != 0, np.minimum(ty1, ty2), np.where(inside_y, -np.inf, np.inf))
+    exit_y = np.where(dy != 0, np.maximum(ty1, ty2), np.where(inside_y, np.inf, -np.inf))
+    enter = np.maximum(enter_x, enter_y)
+    exit_ = np.minimum(exit_x, exit_y)
+    hit = (enter <= exit_) & (exit_ > 0)
+    return np.where(hit, np.maximum(0, enter), np.inf), enter_x > enter_y
+
+
+# Jogador automático simples para as rodadas de balanço: segue a bola com um
+# erro aleatório de mira, relança a bola e avança de nível sozinho.
+def track_ball(batch, aim_error=20.0):
+    return batch.ball_x + batch.rng.normal(0.0, aim_error, batch.n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rodada de balanço headless do Breakout")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--frames", type=int, default=3600)
+    parser.add_argument("--aim-error", type=float, default=20.0)
+    parser.add_argument("--ball-speed", type=float, default=BALL_SPEED)
+    parser.add_argument("--level-speed-step", type=float, default=LEVEL_SPEED_STEP)
+    parser.add_argument("--rally-accel", type=float, default=RALLY_ACCEL)
+    parser.add_argument("--rally-max", type=float, default=RALLY_MAX)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    batch = BreakoutBatch(
+        args.games, ball_speed=args.ball_speed, level_speed_step=args.level_speed_step,
+        rally_accel=args.rally_accel, rally_max=args.rally_max, seed=args.seed,
+    )
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        batch.set_paddle(track_ball(batch, args.aim_error))
+        waiting = (batch.state == INITIAL) | (batch.state == LEVEL_COMPLETE) | (
+            (batch.state == PLAYING) & batch.stuck
+        )
+        batch.action(waiting)
+        batch.step()
+    elapsed = time.perf_counter() - start
+
+    total = args.games * args.frames
+    print(f"{total} frames em {elapsed:.2f}s ({total / elapsed:,.0f} frames/s)")
+    for state, name in enumerate(STATE_NAMES):
+        print(f"  {name:>14}: {np.count_nonzero(batch.state == state)}")
+    levels = np.bincount(batch.level, minlength=MAX_LEVEL + 1)[1:]
+    print("  nível alcançado:", dict(enumerate(levels.tolist(), start=1)))
+    print(f"  pontos médios: {batch.score.mean():.1f}")
+    print(f"  rebatidas por vida perdida: {batch.paddle_hits.sum() / max(1, batch.lives_lost.sum()):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+import argparse
+import base64
+import binascii
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import WINDOW_WIDTH, BAR_WIDTH, FPS
+from physics import (
+    BreakoutBatch, track_ball,
+    INITIAL, PLAYING, LEVEL_COMPLETE, GAME_OVER, VICTORY,
+)
+
+# Conferência de replays gravados pelo ReplayRecorder do GAME_JS (game.py).
+# Um replay traz a semente, as entradas de cada tick (posição da barra e
+# ações) e o resultado declarado; a partida é simulada de novo no motor
+# headless (physics.py), que reproduz o JS bit a bit, e o placar só vale se
+# estado final, pontos, nível e vidas baterem. Muitos replays são simulados
+# juntos num lote do NumPy, e os lotes se dividem entre processos.
+#
+# Formato (versão 1): varints LEB128 em base64 —
+#   versão, semente, ticks, pontos, nível, vidas, vitória (0/1),
+#   nº de ações, ticks das ações (delta do anterior),
+#   barra por tick: delta zigzag do tick anterior; delta 0 vem seguido de
+#   quantos ticks a barra ficou parada.
+
+REPLAY_VERSION = 1
+# Limites de duração aceitos. A barra parada vira uma sequência de poucos
+# bytes, então um replay minúsculo pode declarar horas de jogo, e conferir
+# custa um passo do NumPy por tick: os limites valem antes de simular. Com
+# folga larga sobre partidas reais (o jogador automático faz 4 níveis em
+# ~7 minutos e nunca passa de 30 ticks por ponto).
+MAX_TICKS = FPS * 60 * 40                # 40 minutos
+MAX_TICKS_PER_LEVEL = FPS * 60 * 12      # por nível alcançado
+BASE_TICKS = FPS * 60 * 5                # mais PER_POINT_TICKS por ponto
+PER_POINT_TICKS = FPS * 2
+MAX_STILL_TICKS = FPS * 60 * 2           # barra parada seguida
+# Posição inicial da barra, a mesma de resetGame
+START_BAR_X = int(WINDOW_WIDTH / 2 - BAR_WIDTH / 2)
+
+
+class Replay:
+    def __init__(self, seed, score, level, lives, victory, actions, paddle):
+        self.seed = seed
+        self.score = score
+        self.level = level
+        self.lives = lives
+        self.victory = victory
+        # Ticks com ação (int) e posição da barra em cada tick (int16)
+        self.actions = actions
+        self.paddle = paddle
+
+    @property
+    def ticks(self):
+        return len(self.paddle)
+
+
+def _varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data) or shift > 35:
+            raise ValueError("Replay truncado")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, pos
+
+
+def decode(text):
+    try:
+        data = base64.b64decode(text, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Replay inválido: {e}") from None
+
+    header = []
+    pos = 0
+    for _ in range(8):
+        value, pos = _varint(data, pos)
+        header.append(value)
+    version, seed, ticks, score, level, lives, victory, action_count = header
+    if version != REPLAY_VERSION:
+        raise ValueError(f"Versão de replay não suportada: {version}")
+    if ticks > MAX_TICKS or action_count > ticks or seed >= 2**32:
+        raise ValueError("Replay fora dos limites")
+    if ticks > MAX_TICKS_PER_LEVEL * max(1, level) or ticks > BASE_TICKS + PER_POINT_TICKS * score:
+        raise ValueError("Replay longo demais para o placar declarado")
+
+    actions = np.empty(action_count, dtype=np.int64)
+    tick = 0
+    for i in range(action_count):
+        delta, pos = _varint(data, pos)
+        tick += delta
+        actions[i] = tick
+    if action_count and (actions[-1] >= ticks or np.any(np.diff(actions) <= 0)):
+        raise ValueError("Ações fora de ordem")
+
+    paddle = np.empty(ticks, dtype=np.int16)
+    x = START_BAR_X
+    i = 0
+    still = 0
+    while i < ticks:
+        value, pos = _varint(data, pos)
+        if value == 0:
+            run, pos = _varint(data, pos)
+            if run == 0 or i + run > ticks:
+                raise ValueError("Sequência da barra inválida")
+            # Sequências seguidas somam: a barra continua parada
+            still += run
+            if still > MAX_STILL_TICKS:
+                raise ValueError("Barra parada por tempo demais")
+            paddle[i:i + run] = x
+            i += run
+        else:
+            still = 0
+            x += -(value + 1) // 2 if value & 1 else value // 2
+            if not 0 <= x <= WINDOW_WIDTH - BAR_WIDTH:
+                raise ValueError("Barra fora da tela")
+            paddle[i] = x
+            i += 1
+    if pos != len(data):
+        raise ValueError("Bytes sobrando no replay")
+    return Replay(seed, score, level, lives, bool(victory), actions, paddle)
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+# Inverso de decode, igual ao ReplayRecorder.finish do JS
+def encode(replay):
+    out = bytearray()
+    header = (REPLAY_VERSION, replay.seed, replay.ticks, replay.score,
+              replay.level, replay.lives, int(replay.victory), len(replay.actions))
+    for value in header:
+        _write_varint(out, int(value))
+    previous = 0
+    for tick in replay.actions:
+        _write_varint(out, int(tick) - previous)
+        previous = int(tick)
+
+    deltas = np.diff(replay.paddle.astype(np.int64), prepend=START_BAR_X)
+    still = 0
+    for delta in deltas.tolist():
+        if delta == 0:
+            still += 1
+            continue
+        if still:
+            _write_varint(out, 0)
+            _write_varint(out, still)
+            still = 0
+        _write_varint(out, 2 * delta if delta > 0 else -2 * delta - 1)
+    if still:
+        _write_varint(out, 0)
+        _write_varint(out, still)
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+# Simula os replays num único lote. Cada partida para no seu último tick;
+# retorna estado, pontos, nível e vidas de cada uma nesse momento.
+def simulate(replays):
+    n = len(replays)
+    ticks = np.array([r.ticks for r in replays], dtype=np.int64)
+    total = int(ticks.max(initial=0))
+    paddle = np.zeros((n, total), dtype=np.int16)
+    actions = np.zeros((n, total), dtype=bool)
+    for i, r in enumerate(replays):
+        paddle[i, :r.ticks] = r.paddle
+        actions[i, r.actions] = True
+
+    batch = BreakoutBatch(n)
+    batch.reset(seeds=np.array([r.seed for r in replays], dtype=np.uint32))
+    result = {
+        "state": batch.state.copy(),
+        "score": batch.score.copy(),
+        "level": batch.level.copy(),
+        "lives": batch.lives.copy(),
+    }
+    # Mesma ordem do tick() no JS: ação, barra, física
+    for t in range(total):
+        live = ticks > t
+        act = live & actions[:, t]
+        if act.any():
+            batch.action(act)
+        batch.set_bar(paddle[live, t], live)
+        batch.step()
+        ended = np.flatnonzero(ticks == t + 1)
+        for name, values in result.items():
+            values[ended] = getattr(batch, name)[ended]
+    return result
+
+
+def verify(replays):
+    if not replays:
+        return np.zeros(0, dtype=bool)
+    result = simulate(replays)
+    claimed_state = np.array([VICTORY if r.victory else GAME_OVER for r in replays])
+    return (
+        (result["state"] == claimed_state)
+        & (result["score"] == [r.score for r in replays])
+        & (result["level"] == [r.level for r in replays])
+        & (result["lives"] == [r.lives for r in replays])
+    )
+
+
+# Confere replays em texto; os que nem decodificam são reprovados.
+def verify_texts(texts):
+    ok = [False] * len(texts)
+    decoded = []
+    positions = []
+    for i, text in enumerate(texts):
+        try:
+            decoded.append(decode(text))
+        except ValueError:
+            continue
+        positions.append(i)
+    for i, valid in zip(positions, verify(decoded)):
+        ok[i] = bool(valid)
+    return ok
+
+
+# Ticks declarados no cabeçalho, sem decodificar a barra (0 se nem isso lê)
+def claimed_ticks(text):
+    try:
+        data = base64.b64decode(text, validate=True)
+        pos = 0
+        for _ in range(3):
+            value, pos = _varint(data, pos)
+    except (binascii.Error, ValueError):
+        return 0
+    return value
+
+
+# Confere muitos replays em paralelo. Replays de duração parecida vão para o
+# mesmo lote (o lote anda até o tick do mais longo), e cada lote roda num
+# processo do pool; com poucos replays os lotes encolhem para ocupar todos.
+# A duração sai dos ticks do cabeçalho, não do tamanho do texto: a barra
+# parada comprime, e um texto curto pode ser uma partida longa. Os lotes
+# mais longos vão primeiro, para nenhum deles sobrar sozinho no fim.
+def verify_many(texts, workers=None, chunk_size=256, context=None):
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, min(chunk_size, math.ceil(len(texts) / workers)))
+    ticks = [claimed_ticks(text) for text in texts]
+    order = sorted(range(len(texts)), key=lambda i: ticks[i], reverse=True)
+    chunks = [order[i:i + chunk_size] for i in range(0, len(order), chunk_size)]
+    ok = [False] * len(texts)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        results = pool.map(verify_texts, [[texts[i] for i in chunk] for chunk in chunks])
+        for chunk, chunk_ok in zip(chunks, results):
+            for i, valid in zip(chunk, chunk_ok):
+                ok[i] = valid
+    return ok
+
+
+# Gera replays jogando com o jogador automático de physics.py, gravando as
+# entradas na mesma ordem do tick() do JS. Só entram as partidas encerradas.
+def record_games(games, max_ticks, aim_error, seed=None):
+    batch = BreakoutBatch(games, seed=seed)
+    seeds = batch.seed.copy()
+    paddle = np.zeros((games, max_ticks), dtype=np.int16)
+    actions = np.zeros((games, max_ticks), dtype=bool)
+    ticks = np.full(games, -1, dtype=np.int64)
+    for t in range(max_ticks):
+        live = ticks < 0
+        if not live.any():
+            break
+        waiting = live & ((batch.state == INITIAL) | (batch.state == LEVEL_COMPLETE) | (
+            (batch.state == PLAYING) & batch.stuck
+        ))
+        batch.action(waiting)
+        batch.set_paddle(np.where(live, track_ball(batch, aim_error), np.nan))
+        batch.step()
+        paddle[:, t] = batch.bar_x
+        actions[:, t] = waiting
+        ended = live & ((batch.state == GAME_OVER) | (batch.state == VICTORY))
+        ticks[ended] = t + 1
+
+    replays = []
+    for i in np.flatnonzero(ticks > 0):
+        replays.append(Replay(
+            int(seeds[i]), int(batch.score[i]), int(batch.level[i]), int(batch.lives[i]),
+            bool(batch.state[i] == VICTORY), np.flatnonzero(actions[i, :ticks[i]]),
+            paddle[i, :ticks[i]].copy(),
+        ))
+    return replays
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conferência de replays do Breakout")
+    parser.add_argument("files", nargs="*", help="arquivos com um replay (base64) por linha")
+    parser.add_argument("--bench", type=int, default=0,
+                        help="gera N replays com o jogador automático e confere todos")
+    parser.add_argument("--max-ticks", type=int, default=FPS * 60 * 10)
+    parser.add_argument("--aim-error", type=float, default=45.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    texts = []
+    for path in args.files:
+        with open(path) as f:
+            texts.extend(line.strip() for line in f if line.strip())
+    if args.bench:
+        replays = record_games(args.bench, args.max_ticks, args.aim_error, args.seed)
+        texts.extend(encode(r) for r in replays)
+        print(f"{len(replays)} de {args.bench} partidas encerradas em até {args.max_ticks} ticks")
+    if not texts:
+        parser.error("nenhum replay para conferir")
+
+    start = time.perf_counter()
+    ok = verify_many(texts, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    played = 0
+    for text in texts:
+        try:
+            played += decode(text).ticks
+        except ValueError:
+            pass
+    print(f"{sum(ok)}/{len(texts)} replays conferem")
+    print(f"{played / FPS / 60:.1f} min de jogo conferidos em {elapsed:.2f}s "
+          f"({played / FPS / max(elapsed, 1e-9):,.0f}x o tempo real)")
+    return 0 if all(ok) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
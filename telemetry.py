@@ -0,0 +1,346 @@
+import argparse
+import atexit
+import base64
+import binascii
+import glob
+import json
+import logging
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+
+from config import MAX_LEVEL, TELEMETRY_DIR, TELEMETRY_FILE_BYTES, TELEMETRY_FILES
+
+logger = logging.getLogger(__name__)
+
+# Telemetria de jogo vinda do navegador (Telemetry, no GAME_JS de game.py).
+# Cada lote traz as linhas [ms, tipo, nível, a, b, c] juntadas no anel do
+# jogo em alguns segundos, em JSON comprimido com gzip.
+#
+# - submit nunca bloqueia a sessão: só confere o tamanho e enfileira. A fila
+#   tem teto; com ela cheia o lote é descartado e contado.
+# - Uma thread descomprime (com teto de tamanho, contra lote malicioso),
+#   valida e grava em lote num arquivo SQLite. Passando de
+#   TELEMETRY_FILE_BYTES o arquivo é fechado e outro começa; só os
+#   TELEMETRY_FILES mais novos ficam no disco.
+
+TELEMETRY_VERSION = 1
+MAX_BATCH_TEXT = 256 * 1024      # base64/JSON recebido
+MAX_BATCH_BYTES = 1024 * 1024    # JSON depois de descomprimido
+MAX_BATCH_EVENTS = 8192
+
+# Faixa do INTEGER do SQLite; fora dela o execute estoura (OverflowError)
+SQLITE_MIN_INT = -2 ** 63
+SQLITE_MAX_INT = 2 ** 63 - 1
+
+EVENT_BRICK = 1
+EVENT_LIFE_LOST = 2
+EVENT_LEVEL_COMPLETE = 3
+EVENT_GAME_START = 4
+EVENT_GAME_END = 5
+EVENT_FRAMES = 6
+EVENT_TYPES = {
+    EVENT_BRICK: "brick",
+    EVENT_LIFE_LOST: "life_lost",
+    EVENT_LEVEL_COMPLETE: "level_complete",
+    EVENT_GAME_START: "game_start",
+    EVENT_GAME_END: "game_end",
+    EVENT_FRAMES: "frames",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    received REAL NOT NULL,
+    dropped INTEGER NOT NULL        -- eventos perdidos no anel do navegador
+);
+CREATE TABLE IF NOT EXISTS events (
+    batch INTEGER NOT NULL,
+    ms INTEGER NOT NULL,            -- performance.now() da página
+    type INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    a REAL,
+    b REAL,
+    c REAL
+);
+"""
+
+
+# Número do JSON que cabe numa coluna do SQLite: finito (o json aceita
+# 1e999 e NaN) e dentro da faixa do INTEGER
+def _number(value):
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and SQLITE_MIN_INT <= value <= SQLITE_MAX_INT)
+
+
+def _integer(batch, key):
+    value = batch.get(key, 0)
+    if not isinstance(value, int) or isinstance(value, bool) or not _number(value):
+        raise ValueError(f"Campo {key!r} fora do formato")
+    return value
+
+
+def decode_batch(event):
+    data = event.get("data")
+    if not isinstance(data, str) or len(data) > MAX_BATCH_TEXT:
+        raise ValueError("Lote ausente ou grande demais")
+    encoding = event.get("encoding")
+    if encoding == "gzip":
+        try:
+            raw = base64.b64decode(data, validate=True)
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"Lote inválido: {e}") from None
+        inflater = zlib.decompressobj(wbits=31)
+        try:
+            text = inflater.decompress(raw, MAX_BATCH_BYTES)
+        except zlib.error as e:
+            raise ValueError(f"Lote inválido: {e}") from None
+        if inflater.unconsumed_tail:
+            raise ValueError("Lote grande demais")
+    elif encoding == "json":
+        text = data
+    else:
+        raise ValueError(f"Codificação desconhecida: {encoding!r}")
+
+    try:
+        batch = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"Lote inválido: {e}") from None
+    if not isinstance(batch, dict) or batch.get("v") != TELEMETRY_VERSION:
+        raise ValueError("Versão de telemetria não suportada")
+    session = batch.get("session")
+    events = batch.get("events")
+    if not isinstance(session, str) or not isinstance(events, list) or len(events) > MAX_BATCH_EVENTS:
+        raise ValueError("Lote fora do formato")
+    rows = []
+    for row in events:
+        if (not isinstance(row, list) or len(row) != 6
+                or not all(_number(value) for value in row)
+                or int(row[1]) not in EVENT_TYPES):
+            raise ValueError("Evento fora do formato")
+        rows.append((int(row[0]), int(row[1]), int(row[2]), row[3], row[4], row[5]))
+    return session[:64], _integer(batch, "seq"), _integer(batch, "dropped"), rows
+
+
+class TelemetryStore:
+    def __init__(self, directory=TELEMETRY_DIR, file_bytes=TELEMETRY_FILE_BYTES,
+                 max_files=TELEMETRY_FILES, max_pending=256, batch_delay=0.5):
+        self.directory = directory
+        self.file_bytes = file_bytes
+        self.max_files = max_files
+        self.batch_delay = batch_delay
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.stats = {"received": 0, "written": 0, "events": 0, "rejected": 0, "overflow": 0, "files": 0}
+        self._conn = None
+        self.path = None
+
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._write_loop, name="telemetry-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---------- entrada ----------
+
+    # Enfileira um lote como veio do canal; False se foi descartado
+    def submit(self, event):
+        data = event.get("data")
+        if not isinstance(data, str) or len(data) > MAX_BATCH_TEXT:
+            with self._lock:
+                self.stats["rejected"] += 1
+            return False
+        try:
+            self._pending.put_nowait((event, time.time()))
+        except queue.Full:
+            with self._lock:
+                self.stats["overflow"] += 1
+            return False
+        with self._lock:
+            self.stats["received"] += 1
+        return True
+
+    # ---------- escrita ----------
+
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            items = [item]
+            stop = False
+            deadline = time.monotonic() + self.batch_delay
+            while True:
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                items.append(item)
+            # Um lote que escape da validação não pode derrubar a thread:
+            # sem ela, a fila só enche até o fim do processo
+            try:
+                self._write(items)
+            except Exception:
+                logger.exception("Falha inesperada ao gravar %d lotes de telemetria", len(items))
+                with self._lock:
+                    self.stats["rejected"] += len(items)
+            if stop:
+                break
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def _write(self, items):
+        decoded = []
+        for event, received in items:
+            try:
+                decoded.append((received, decode_batch(event)))
+            except ValueError as e:
+                logger.warning("Lote de telemetria recusado: %s", e)
+                with self._lock:
+                    self.stats["rejected"] += 1
+        if not decoded:
+            return
+        try:
+            conn = self._file()
+            with conn:
+                events = 0
+                for received, (session, seq, dropped, rows) in decoded:
+                    batch_id = conn.execute(
+                        "INSERT INTO batches (session, seq, received, dropped) VALUES (?, ?, ?, ?)",
+                        (session, seq, received, dropped),
+                    ).lastrowid
+                    conn.executemany(
+                        "INSERT INTO events (batch, ms, type, level, a, b, c) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [(batch_id,) + row for row in rows],
+                    )
+                    events += len(rows)
+        except sqlite3.Error as e:
+            logger.error("Falha ao gravar %d lotes de telemetria: %s", len(decoded), e)
+            return
+        with self._lock:
+            self.stats["written"] += len(decoded)
+            self.stats["events"] += events
+
+    # Arquivo atual, trocado por um novo quando passa do tamanho
+    def _file(self):
+        if self._conn and os.path.getsize(self.path) >= self.file_bytes:
+            self._conn.close()
+            self._conn = None
+        if self._conn is None:
+            # Horário de abertura e pid no nome: processos diferentes nunca
+            # escrevem no mesmo arquivo
+            name = f"telemetry-{time.time_ns() // 1_000_000}-{os.getpid()}.db"
+            self.path = os.path.join(self.directory, name)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.executescript(SCHEMA)
+            with self._lock:
+                self.stats["files"] += 1
+            self._prune()
+        return self._conn
+
+    def _prune(self):
+        for path in telemetry_files(self.directory)[:-self.max_files]:
+            if path == self.path:
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Não consegui apagar %s: %s", path, e)
+
+    # Grava o que estiver na fila e encerra a thread
+    def close(self):
+        if not self._thread.is_alive():
+            return
+        self._pending.put(None)
+        self._thread.join(timeout=10)
+
+
+# Arquivos de telemetria do mais antigo ao mais novo (o nome leva o horário)
+def telemetry_files(directory=TELEMETRY_DIR):
+    return sorted(
+        glob.glob(os.path.join(directory, "telemetry-*.db")),
+        key=lambda path: int(os.path.basename(path).split("-")[1]),
+    )
+
+
+# Resumo por nível de todos os arquivos: entradas, conclusões, tempo médio,
+# vidas perdidas e rebatidas por rally, mais o custo dos frames.
+def summarize(directory=TELEMETRY_DIR):
+    def new_level():
+        return {"completed": 0, "seconds": 0.0, "lives_lost": 0, "rally": 0.0, "ended": 0}
+
+    levels = {level: new_level() for level in range(1, MAX_LEVEL + 1)}
+    games = victories = 0
+    frame_ms = []
+    seen = set()
+    for path in telemetry_files(directory):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            seen.update(session for (session,) in conn.execute("SELECT DISTINCT session FROM batches"))
+            rows = conn.execute(
+                "SELECT type, level, COUNT(*), SUM(a), SUM(b) FROM events "
+                "WHERE type IN (?, ?, ?) GROUP BY type, level",
+                (EVENT_LIFE_LOST, EVENT_LEVEL_COMPLETE, EVENT_GAME_END),
+            ).fetchall()
+            for kind, level, count, sum_a, sum_b in rows:
+                entry = levels.setdefault(level, new_level())
+                if kind == EVENT_LIFE_LOST:
+                    entry["lives_lost"] += count
+                    entry["rally"] += sum_b or 0.0
+                elif kind == EVENT_LEVEL_COMPLETE:
+                    entry["completed"] += count
+                    entry["seconds"] += sum_a or 0.0
+                else:
+                    entry["ended"] += count
+                    games += count
+                    victories += int(sum_b or 0)
+            frame_ms.extend(a for (a,) in conn.execute("SELECT a FROM events WHERE type = ?", (EVENT_FRAMES,)))
+        finally:
+            conn.close()
+    return {
+        "sessions": len(seen),
+        "games": games,
+        "victories": victories,
+        "levels": {
+            level: {
+                "completed": entry["completed"],
+                "avg_seconds": round(entry["seconds"] / entry["completed"], 1) if entry["completed"] else None,
+                "lives_lost": entry["lives_lost"],
+                "avg_rally": round(entry["rally"] / entry["lives_lost"], 1) if entry["lives_lost"] else None,
+                "games_ended": entry["ended"],
+            }
+            for level, entry in sorted(levels.items())
+        },
+        "frame_ms": round(sum(frame_ms) / len(frame_ms), 2) if frame_ms else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetria do Breakout")
+    parser.add_argument("--dir", default=TELEMETRY_DIR)
+    args = parser.parse_args()
+
+    summary = summarize(args.dir)
+    print(f"{summary['sessions']} sessões, {summary['games']} partidas, {summary['victories']} vitórias")
+    print("nível  concluído  tempo médio  vidas perdidas  rebatidas/rally  fim de jogo")
+    for level, row in summary["levels"].items():
+        seconds = f"{row['avg_seconds']:.1f}s" if row["avg_seconds"] is not None else "-"
+        rally = f"{row['avg_rally']:.1f}" if row["avg_rally"] is not None else "-"
+        print(f"{level:>5}  {row['completed']:>9}  {seconds:>11}  {row['lives_lost']:>14}  {rally:>15}  {row['games_ended']:>11}")
+    if summary["frame_ms"] is not None:
+        print(f"trabalho médio por frame: {summary['frame_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()